@@ -0,0 +1,335 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+# every store the helpers write to starts empty in a scratch directory, so a run neither writes into the tree nor
+# times against artifacts a previous run or the app left behind
+scratch_path = tempfile.mkdtemp(prefix='portfolio_benchmarks_')
+for variable, folder in [('PORTFOLIO_DATA_STORE', 'store'), ('PORTFOLIO_CACHE_DIR', 'cache'),
+                         ('PORTFOLIO_ASSET_DIR', 'assets'), ('PORTFOLIO_GEOMETRY_DIR', 'geometry'),
+                         ('PORTFOLIO_STATIC_GEO_DIR', 'geometry/subsets'), ('PORTFOLIO_PRERENDER_DIR', 'prerender'),
+                         ('PORTFOLIO_AGGREGATE_DIR', 'aggregates'), ('PORTFOLIO_MODEL_DIR', 'models'),
+                         ('PORTFOLIO_STATE_DIR', 'state'), ('PORTFOLIO_PRICE_DIR', 'prices')]:
+    os.environ[variable] = os.path.join(scratch_path, folder)
+
+import pandas as pd
+import helper_funcs.helper_funcs as helpf
+import helper_funcs.charts as pltchart
+import helper_funcs.clustering as clust
+import helper_funcs.datasets as dsets
+import helper_funcs.market_data as mktdata
+import helper_funcs.price_store as pricestore
+import helper_funcs.profitability as prof
+import helper_funcs.result_cache as rcache
+import helper_funcs.rfm_state as rfmstate
+import helper_funcs.segments as segs
+import helper_funcs.stocks as stocks
+import benchmarks.synthetic as synth
+
+baseline_path = os.path.join(repo_root, 'benchmarks', 'baselines.json')
+ticker_count = 16
+
+
+def focus_area_graph(rows, seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        node_weight_list, edge_weight_list = helpf.generate_network_data(synth.generate_focus_areas(rows, seed))
+        return helpf.generate_network(node_weight_list, edge_weight_list)
+
+
+def scored_features(rows, seed):
+    rfm_df = clust.compute_rfm(clust.clean_transactions(synth.generate_transactions(rows, seed)))
+    return clust.score_rfm(rfm_df)[['R_Score', 'F_Score', 'M_Score']]
+
+
+def eurovision_years(votes_df):
+    return sorted(set(votes_df['year']))
+
+
+def uncached(function):
+    # a fresh in-memory cache per call, so functions built on cached helpers are timed cold
+    def run_uncached(benchmark_input):
+        rcache.set_backend(rcache.MemoryBackend())
+        return function(benchmark_input)
+    return run_uncached
+
+
+def run_network_data(network_list):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return helpf.generate_network_data(network_list)
+
+
+def run_filter_data_frame(votes_df):
+    return pltchart.filter_data_frame(votes_df, year=eurovision_years(votes_df), full_name=True)
+
+
+def run_plot_network(votes_df):
+    return pltchart.plot_network.__wrapped__(votes_df, year=eurovision_years(votes_df))
+
+
+def network_votes(rows, seed):
+    # the simplified map geometry is built once per process and reused by every chart, building it here keeps that
+    # one-off cost out of the first timed repeat
+    votes_df = synth.generate_eurovision_votes(rows, seed)
+    run_plot_network(votes_df)
+    return votes_df
+
+
+def run_rfm_table(transaction_data):
+    transaction_data = clust.clean_transactions(transaction_data)
+    return clust.score_rfm(clust.compute_rfm(transaction_data))
+
+
+def run_rfm_partials(transaction_data):
+    # the out of core path over in memory slices, so it is comparable with rfm_table
+    chunk_rows = max(1, len(transaction_data) // 10)
+    return clust.finish_rfm(clust.fold_partials(clust.rfm_partial(transaction_data.iloc[start:start + chunk_rows])
+                                                for start in range(0, len(transaction_data), chunk_rows)))
+
+
+def rfm_history(rows, seed):
+    # state over all but the last 1% of the transactions, which arrive as the new batch
+    transaction_data = synth.generate_transactions(rows, seed)
+    split = len(transaction_data) - max(1, len(transaction_data) // 100)
+    state = rfmstate.merge_state(rfmstate.new_state(), clust.rfm_partial(transaction_data.iloc[:split]))
+    return state, transaction_data.iloc[split:]
+
+
+def run_rfm_state_append(state_input):
+    state, transaction_batch = state_input
+    return rfmstate.state_rfm(rfmstate.merge_state(state, clust.rfm_partial(transaction_batch))[0])
+
+
+def stored_state(rows, seed):
+    # a store and a saved state over all but the last 1% of the transactions, then the store gains the rest
+    transaction_data = synth.generate_transactions(rows, seed)
+    split = len(transaction_data) - max(1, len(transaction_data) // 100)
+    source = os.path.join(scratch_path, 'online_retail.csv')
+    transaction_data.iloc[:split].to_csv(source, index=False)
+    dsets.materialize_dataset('online_retail', source=source, force=True)
+    rfmstate.refresh_state('online_retail')
+    state_files = {}
+    for part in ['customers', 'invoices']:
+        file_path = rfmstate.state_file('online_retail', part)
+        with open(file_path, 'rb') as file:
+            state_files[file_path] = file.read()
+    transaction_data.to_csv(source, index=False)
+    dsets.materialize_dataset('online_retail', source=source, force=True)
+    return state_files
+
+
+def run_rfm_state_refresh(state_files):
+    # the saved state is put back first so every repeat folds the same append, from the store through to disk
+    for file_path, content in state_files.items():
+        with open(file_path, 'wb') as file:
+            file.write(content)
+    return rfmstate.refresh_state('online_retail')
+
+
+def fitted_segments(rows, seed):
+    rfm_df = clust.compute_rfm(clust.clean_transactions(synth.generate_transactions(rows, seed)))
+    return segs.fit_model(rfm_df), rfm_df
+
+
+def run_score_customers(segment_input):
+    # what a rerun pays between scheduled refits
+    segment_model, rfm_df = segment_input
+    return segs.score_customers(segment_model, rfm_df)
+
+
+def run_clean_orders(orders_df):
+    orders_df = prof.normalise_columns(orders_df.copy())
+    return prof.add_profit_columns(prof.clean_orders(orders_df))
+
+
+def clean_orders(rows, seed):
+    return run_clean_orders(synth.generate_orders(rows, seed))
+
+
+def run_scenario_grid(orders_df):
+    return prof.evaluate_scenarios(prof.scenario_inputs(orders_df), prof.scenario_range, prof.scenario_range)
+
+
+def bootstrapped_orders(rows, seed):
+    orders_df = clean_orders(rows, seed)
+    return len(orders_df), prof.profit_bootstrap(orders_df)
+
+
+def run_profit_interval(bootstrap_input):
+    # what the Financial Modelling tab pays per simulation once the resamples are cached
+    order_count, bootstrap_df = bootstrap_input
+    return prof.simulated_profit_interval(bootstrap_df, order_count, 30.0, 6.0)
+
+
+def price_request(rows, seed):
+    symbols = ['^GSPC'] + [f'TICKER{index}' for index in range(ticker_count)]
+    end = pd.Timestamp('2024-01-02') + pd.offsets.BDay(rows)
+    return symbols, end - pd.offsets.BDay(rows), end
+
+
+def run_fetch_prices(request):
+    # the offline fixture provider, so this times the fan out and framing rather than the network
+    symbols, start, end = request
+    return mktdata.fetch_prices(symbols, start, end, provider=mktdata.FixtureProvider())
+
+
+def stored_prices(rows, seed):
+    # a store already holding the range, so a repeated Run Analysis is timed without any fetching
+    pricestore.price_path = tempfile.mkdtemp(prefix='price_store_')
+    symbols, start, end = price_request(rows, seed)
+    pricestore.read_prices(symbols, start, end, provider=mktdata.FixtureProvider())
+    return symbols, start, end
+
+
+def run_read_prices(request):
+    symbols, start, end = request
+    return pricestore.read_prices(symbols, start, end, provider=mktdata.FixtureProvider())
+
+
+def run_compare_tickers(prices):
+    price_data, market_data = prices
+    return stocks.compare_tickers(price_data, market_data, 5)
+
+
+# name: (base size key, setup(rows, seed) returning the input, function timed against that input)
+benchmark_dict = {
+    'generate_network_data': ('focus_areas', synth.generate_focus_areas, run_network_data),
+    'centrality_detection': ('focus_areas', focus_area_graph, helpf.centrality_detection.__wrapped__),
+    'clique_detection': ('focus_areas', focus_area_graph, helpf.clique_detection),
+    'filter_data_frame': ('eurovision_votes', synth.generate_eurovision_votes, run_filter_data_frame),
+    'plot_network': ('eurovision_votes', network_votes, run_plot_network),
+    'rfm_table': ('transactions', synth.generate_transactions, run_rfm_table),
+    'rfm_partials': ('transactions', synth.generate_transactions, run_rfm_partials),
+    'elbow_inertia': ('transactions', scored_features, uncached(clust.elbow_inertia)),
+    'kmeans_clusters': ('transactions', scored_features, uncached(clust.fit_clusters)),
+    'k_sweep_scores': ('transactions', scored_features,
+                       uncached(lambda features: clust.k_sweep(features, with_scores=True))),
+    'rfm_state_append': ('transactions', rfm_history, run_rfm_state_append),
+    'rfm_state_refresh': ('transactions', stored_state, run_rfm_state_refresh),
+    'score_customers': ('transactions', fitted_segments, run_score_customers),
+    'clean_orders': ('orders', synth.generate_orders, run_clean_orders),
+    'scenario_grid': ('orders', clean_orders, run_scenario_grid),
+    'profit_bootstrap': ('orders', clean_orders, prof.profit_bootstrap),
+    'profit_interval': ('orders', bootstrapped_orders, run_profit_interval),
+    'fetch_prices': ('price_days', price_request, run_fetch_prices),
+    'read_prices': ('price_days', stored_prices, run_read_prices),
+    'compare_tickers': ('price_days', lambda rows, seed: synth.generate_prices(ticker_count, rows, seed),
+                        run_compare_tickers)
+}
+
+
+def disable_network():
+    # The suite must never depend on the data sources or yfinance being reachable
+    def blocked_connect(*args, **kwargs):
+        raise RuntimeError('Network access is disabled while benchmarking')
+    socket.socket.connect = blocked_connect
+    socket.create_connection = blocked_connect
+
+
+def measure(function, benchmark_input, repeat):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function(benchmark_input)
+        timings.append(time.perf_counter() - start_time)
+    # Peak memory is measured on a separate run so tracing does not skew the timings
+    tracemalloc.start()
+    function(benchmark_input)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak_bytes
+
+
+def run_benchmarks(names, scales, repeat, seed=0, max_rows=None):
+    results = {}
+    for name in names:
+        size_key, setup, function = benchmark_dict[name]
+        results[name] = {}
+        for scale in scales:
+            rows = synth.base_sizes[size_key] * scale
+            if max_rows and rows > max_rows:
+                print(f'{name:<24}{scale:>5}x{rows:>12} rows    skipped, above --max-rows')
+                continue
+            benchmark_input = setup(rows, seed)
+            median_seconds, peak_bytes = measure(function, benchmark_input, repeat)
+            results[name][str(scale)] = {'rows': rows,
+                                         'median_seconds': round(median_seconds, 6),
+                                         'rows_per_second': round(rows / median_seconds, 1),
+                                         'peak_bytes': peak_bytes}
+            print(f'{name:<24}{scale:>5}x{rows:>12} rows{median_seconds:>12.4f}s'
+                  f'{rows / median_seconds:>16.0f} rows/s{peak_bytes / 2 ** 20:>10.1f} MB')
+    return results
+
+
+def compare_baseline(results, baseline, tolerance):
+    regressions = []
+    for name, scale_dict in results.items():
+        for scale, result in scale_dict.items():
+            expected = baseline.get(name, {}).get(scale)
+            if not expected:
+                continue
+            # Small absolute allowances keep millisecond benchmarks from flapping on timer noise
+            for metric, allowance in [('median_seconds', 0.005), ('peak_bytes', 2 ** 16)]:
+                if result[metric] > expected[metric] * (1 + tolerance) + allowance:
+                    regressions.append(f'{name} {scale}x {metric}: {result[metric]} vs baseline {expected[metric]}')
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    baseline = load_baseline(path)
+    for name, scale_dict in results.items():
+        baseline.setdefault(name, {}).update(scale_dict)
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the page analytics on synthetic data')
+    parser.add_argument('--benchmarks', nargs='+', choices=list(benchmark_dict), default=list(benchmark_dict))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=0.3)
+    parser.add_argument('--baseline', default=baseline_path)
+    parser.add_argument('--max-rows', type=int, default=10000000)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    disable_network()
+    warnings.simplefilter('ignore', FutureWarning)
+    # plot_network reads the geojson relative to the repo root
+    os.chdir(repo_root)
+    results = run_benchmarks(args.benchmarks, args.scales, args.repeat, args.seed, args.max_rows)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        return 0
+    regressions = compare_baseline(results, load_baseline(args.baseline), args.tolerance)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
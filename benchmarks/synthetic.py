@@ -0,0 +1,140 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Row counts of the datasets the pages load today, the benchmarks scale from these
+base_sizes = {
+    'orders': 1000,
+    'transactions': 541909,
+    'eurovision_votes': 50000,
+    'focus_areas': 2163,
+    'price_days': 21
+}
+
+focus_area_list = ['Craft and traditional arts', 'Creative youth development', 'Cultural awareness', 'Literary arts',
+                   'Multidisciplinary arts', 'Museums', 'Performing arts', 'Public arts', 'Visual arts',
+                   'Civic and social engagement', 'Democracy', 'Access to housing and housing development',
+                   'Agricultural development', 'Economic development', 'Financial inclusion',
+                   'Livelihoods and workforce development', 'Early learning', 'Elementary, secondary education',
+                   'Postsecondary, tertiary education', 'Vocational education', 'Youth development', 'Biodiversity',
+                   'Climate change', 'Environmental justice', 'Natural resources conservation', 'Aging', 'Caste',
+                   'Disability', 'Faith and religion', 'Gender identity', 'Immigration or migration',
+                   'Incarceration and justice system involvement', 'Race and ethnicity', 'Sexual orientation', 'Fund',
+                   'Regrantor', 'Access to healthcare', 'Active living', 'Child development and welfare',
+                   'Chronic diseases', 'Infectious and parasitic diseases', 'Maternal and perinatal health',
+                   'Mental and behavioral health', 'Nutrition and food security',
+                   'Public health, public health infrastructure', 'Sexual and gender-based violence',
+                   'Sexual and reproductive health and justice', 'Water access, sanitation, and hygiene',
+                   'Nonprofit sector strengthening', 'Philanthropic sector strengthening', 'Bridging divides',
+                   'Human rights']
+
+country_code_dict = {
+    'Albania': 'al', 'Armenia': 'am', 'Austria': 'at', 'Azerbaijan': 'az', 'Belgium': 'be', 'Bulgaria': 'bg',
+    'Croatia': 'hr', 'Cyprus': 'cy', 'Czechia': 'cz', 'Denmark': 'dk', 'Estonia': 'ee', 'Finland': 'fi',
+    'France': 'fr', 'Georgia': 'ge', 'Germany': 'de', 'Greece': 'gr', 'Hungary': 'hu', 'Iceland': 'is',
+    'Ireland': 'ie', 'Israel': 'il', 'Italy': 'it', 'Latvia': 'lv', 'Lithuania': 'lt', 'Malta': 'mt',
+    'Moldova': 'md', 'Netherlands': 'nl', 'North Macedonia': 'mk', 'Norway': 'no', 'Poland': 'pl',
+    'Portugal': 'pt', 'Romania': 'ro', 'San Marino': 'sm', 'Serbia': 'rs', 'Slovenia': 'si', 'Spain': 'es',
+    'Sweden': 'se', 'Switzerland': 'ch', 'U.K.': 'gb', 'Ukraine': 'ua'
+}
+
+discount_list = ['', '5% on App', '10%', '15% New User', '50 off Promo']
+payment_list = ['Credit Card', 'Digital Wallet', 'Cash on Delivery']
+
+
+def generate_orders(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    order_dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 38 * 24 * 60, rows), unit='min')
+    delivery_dates = order_dates + pd.to_timedelta(rng.integers(15, 120, rows), unit='min')
+    return pd.DataFrame({
+        'Order ID': np.arange(1, rows + 1),
+        'Customer ID': ['C' + str(i) for i in rng.integers(1000, 9999, rows)],
+        'Restaurant ID': ['R' + str(i) for i in rng.integers(1000, 9999, rows)],
+        'Order Date and Time': order_dates.strftime('%d/%m/%Y %H:%M'),
+        'Delivery Date and Time': delivery_dates.strftime('%d/%m/%Y %H:%M'),
+        'Order Value': rng.integers(100, 2000, rows),
+        'Delivery Fee': rng.choice([0, 20, 30, 40, 50], rows),
+        'Payment Method': rng.choice(payment_list, rows),
+        'Discounts and Offers': rng.choice(discount_list, rows),
+        'Commission Fee': rng.integers(50, 200, rows),
+        'Payment Processing Fee': rng.integers(10, 50, rows),
+        'Refunds/Chargebacks': rng.choice([0, 0, 0, 50, 100], rows)
+    }).replace({'Discounts and Offers': {'': np.nan}})
+
+
+def generate_transactions(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    # Customer activity is heavily skewed, a few customers account for most invoices
+    customers = max(rows // 124, 10)
+    customer_ids = 12346 + (rng.zipf(1.3, rows) % customers)
+    invoice_dates = pd.Timestamp('2010-12-01') + pd.to_timedelta(rng.integers(0, 373 * 24 * 60, rows), unit='min')
+    customer_ids = customer_ids.astype(float)
+    customer_ids[rng.random(rows) < 0.25] = np.nan
+    return pd.DataFrame({
+        'InvoiceNo': (536365 + rng.integers(0, max(rows // 21, 1), rows)).astype(str),
+        'StockCode': rng.integers(10000, 90000, rows).astype(str),
+        'Description': 'ITEM',
+        'Quantity': rng.integers(-2, 48, rows),
+        'InvoiceDate': invoice_dates.strftime('%Y-%m-%d %H:%M:%S'),
+        'UnitPrice': np.round(rng.gamma(1.5, 2.5, rows), 2),
+        'CustomerID': customer_ids,
+        'Country': 'United Kingdom'
+    })
+
+
+def generate_eurovision_votes(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    country_names = np.array(list(country_code_dict.keys()))
+    country_codes = np.array(list(country_code_dict.values()))
+    from_index = rng.integers(0, len(country_names), rows)
+    # Countries never vote for themselves
+    to_index = (from_index + rng.integers(1, len(country_names), rows)) % len(country_names)
+    tele_points = rng.choice([0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 12], rows)
+    jury_points = rng.choice([0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 12], rows)
+    return pd.DataFrame({
+        'year': rng.integers(1975, 2024, rows).astype(str),
+        'round': rng.choice(['final', 'semi-final'], rows),
+        'from_country_name': country_names[from_index],
+        'to_country_name': country_names[to_index],
+        'from_country': country_codes[from_index],
+        'to_country': country_codes[to_index],
+        'total_points': tele_points + jury_points,
+        'tele_points': tele_points,
+        'jury_points': jury_points
+    })
+
+
+def generate_focus_areas(documents, seed=0):
+    rng = np.random.default_rng(seed)
+    area_counts = rng.choice([1, 2, 3, 4, 5, 6], documents, p=[0.08, 0.09, 0.12, 0.15, 0.555, 0.005])
+    network_list = []
+    for area_count in area_counts:
+        if area_count > 1:
+            network_list.append(sorted(rng.choice(focus_area_list, area_count, replace=False)))
+    return network_list
+
+
+def generate_prices(tickers, days, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-01-02', periods=days, name='Date')
+    market_close = 4700 * np.cumprod(1 + rng.normal(0.0004, 0.01, days))
+    market_data = pd.DataFrame({'Adj Close': market_close}, index=dates)
+    price_data = {}
+    for ticker_index in range(tickers):
+        beta = rng.uniform(0.5, 1.8)
+        daily_return = beta * np.diff(market_close, prepend=market_close[0]) / market_close + rng.normal(0, 0.01, days)
+        price_data[f'Ticker {ticker_index}'] = pd.DataFrame({'Adj Close': 100 * np.cumprod(1 + daily_return)},
+                                                            index=dates)
+    return price_data, market_data
+
+
+def write_fixtures(directory, scale=1, seed=0):
+    # Writes csv files matching the page datasets so PORTFOLIO_DATA_SOURCE can point at them offline
+    os.makedirs(directory, exist_ok=True)
+    generate_orders(base_sizes['orders'] * scale, seed).to_csv(
+        os.path.join(directory, 'food_orders_new_york.csv'), index=False)
+    generate_transactions(base_sizes['transactions'] * scale, seed).to_csv(
+        os.path.join(directory, 'online_retail.csv'), index=False)
+    generate_eurovision_votes(base_sizes['eurovision_votes'] * scale, seed).to_csv(
+        os.path.join(directory, 'eurovision_votes_processed.csv'), index=False)
+
@@ -0,0 +1,131 @@
+import os
+import json
+import shutil
+import numpy as np
+import pyarrow as pa
+import helper_funcs.datasets as dsets
+import helper_funcs.result_cache as rcache
+
+
+aggregate_path = os.environ.get('PORTFOLIO_AGGREGATE_DIR', 'data/aggregates')
+# fixed width profit bins anchored at zero, so histograms built from any set of chunks line up and can be summed
+profit_bin_width = 10.0
+sum_columns = ['revenue', 'total_costs', 'profit', 'delivery_fee', 'payment_processing_fee', 'discount_amount']
+
+
+def new_aggregate(bin_width=profit_bin_width):
+    return {'orders': 0,
+            'profitable_orders': 0,
+            'sums': {column: 0.0 for column in sum_columns},
+            'bin_width': bin_width,
+            'profit_bins': {}}
+
+
+def order_aggregate(orders_df, bin_width=profit_bin_width):
+    aggregate = new_aggregate(bin_width)
+    profit = orders_df['profit'].to_numpy(dtype=float)
+    profit = profit[~np.isnan(profit)]
+    aggregate['orders'] = int(len(orders_df))
+    aggregate['profitable_orders'] = int((profit > 0).sum())
+    aggregate['sums'] = {column: float(orders_df[column].sum()) for column in sum_columns}
+    bin_index, bin_counts = np.unique(np.floor(profit / bin_width), return_counts=True)
+    aggregate['profit_bins'] = {int(index): int(count) for index, count in zip(bin_index, bin_counts)}
+    return aggregate
+
+
+def merge_aggregates(left, right):
+    if left['bin_width'] != right['bin_width']:
+        raise ValueError('Aggregates with different profit bin widths cannot be merged')
+    merged = new_aggregate(left['bin_width'])
+    merged['orders'] = left['orders'] + right['orders']
+    merged['profitable_orders'] = left['profitable_orders'] + right['profitable_orders']
+    merged['sums'] = {column: left['sums'][column] + right['sums'][column] for column in sum_columns}
+    merged['profit_bins'] = dict(left['profit_bins'])
+    for index, count in right['profit_bins'].items():
+        merged['profit_bins'][index] = merged['profit_bins'].get(index, 0) + count
+    return merged
+
+
+def profit_mean(aggregate):
+    return aggregate['sums']['profit'] / aggregate['orders'] if aggregate['orders'] else 0.0
+
+
+def profit_bins(aggregate):
+    # left edges and counts of the occupied bins, in order
+    bin_index = np.array(sorted(aggregate['profit_bins']), dtype=float)
+    bin_counts = np.array([aggregate['profit_bins'][int(index)] for index in bin_index], dtype=int)
+    return bin_index * aggregate['bin_width'], bin_counts
+
+
+def aggregate_file(dataset_name):
+    return os.path.join(aggregate_path, f'{dataset_name}.json')
+
+
+def save_aggregate(aggregate, file_path):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(aggregate, file)
+    os.replace(tmp_path, file_path)
+
+
+def load_aggregate(file_path):
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'r') as file:
+        aggregate = json.load(file)
+    # json turns the integer bin keys into strings
+    aggregate['profit_bins'] = {int(index): count for index, count in aggregate['profit_bins'].items()}
+    return aggregate
+
+
+def columns_dir(dataset_name):
+    return os.path.join(aggregate_path, f'{dataset_name}-columns')
+
+
+def save_columns(orders_df, dataset_name, start_row):
+    # one file per folded chunk, named by its first row, so an append only writes the new chunks
+    os.makedirs(columns_dir(dataset_name), exist_ok=True)
+    file_path = os.path.join(columns_dir(dataset_name), f'{start_row:012d}.arrow')
+    table = pa.Table.from_pandas(orders_df, preserve_index=False)
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, file_path)
+
+
+def load_columns(dataset_name, aggregate):
+    # the columns kept by refresh_aggregate for the rows the aggregate covers, a chunk left by an interrupted
+    # refresh starts at or after that and is skipped
+    table_list = []
+    for file_name in sorted(os.listdir(columns_dir(dataset_name))):
+        if file_name.endswith('.arrow') and int(file_name.split('.')[0]) < aggregate['fold']['rows']:
+            with pa.memory_map(os.path.join(columns_dir(dataset_name), file_name), 'r') as source:
+                table_list.append(pa.ipc.open_file(source).read_all())
+    return pa.concat_tables(table_list).to_pandas()
+
+
+def refresh_aggregate(dataset_name, chunk_source, bin_width=profit_bin_width, columns=None):
+    # order exports are append only, rows already folded into the saved aggregate are never read again, the listed
+    # columns of every folded chunk are kept beside it for the figures that need each order
+    file_path = aggregate_file(dataset_name)
+    aggregate = load_aggregate(file_path)
+    # the chunk source cleans the rows before they are folded, so its code is part of the aggregate as well
+    code_version = (f'{rcache.code_version(__name__)}-{rcache.code_version(chunk_source.__module__)}-'
+                    f'{bin_width}-{",".join(columns or [])}')
+    rows = dsets.folded_rows(dataset_name, aggregate.get('fold') if aggregate else None, code_version)
+    if aggregate is not None and rows == dsets.load_table(dataset_name).num_rows:
+        return aggregate
+    if rows == 0:
+        aggregate = new_aggregate(bin_width)
+        shutil.rmtree(columns_dir(dataset_name), ignore_errors=True)
+    start_row = rows
+    for orders_df in chunk_source(start_row=rows):
+        aggregate = merge_aggregates(aggregate, order_aggregate(orders_df, bin_width))
+        if columns:
+            save_columns(orders_df[columns], dataset_name, start_row)
+        start_row += len(orders_df)
+    aggregate['fold'] = dsets.fold_tag(dataset_name, code_version)
+    save_aggregate(aggregate, file_path)
+    return aggregate
@@ -0,0 +1,54 @@
+import os
+import concurrent.futures
+import numpy as np
+
+
+# replicates drawn per task, fixed so the resamples for a seed do not depend on the number of workers
+task_replicates = 250
+# resampled values held in memory at once by each worker
+block_elements = 1 << 22
+_sample_columns = None
+
+
+def _init_worker(sample_columns):
+    # the sample is shipped once per worker instead of once per task
+    global _sample_columns
+    _sample_columns = sample_columns
+
+
+def resample_means(sample_columns, replicates, seed_sequence):
+    rng = np.random.default_rng(seed_sequence)
+    column_count, row_count = sample_columns.shape
+    block_rows = max(1, block_elements // row_count)
+    replicate_means = np.empty((replicates, column_count))
+    for start in range(0, replicates, block_rows):
+        stop = min(start + block_rows, replicates)
+        sample_index = rng.integers(0, row_count, size=(stop - start, row_count), dtype=np.int32)
+        # gathering one column at a time keeps the lookups inside a single contiguous array
+        for column in range(column_count):
+            replicate_means[start:stop, column] = np.take(sample_columns[column], sample_index).mean(axis=1)
+    return replicate_means
+
+
+def _worker_means(replicates, seed_sequence):
+    return resample_means(_sample_columns, replicates, seed_sequence)
+
+
+def bootstrap_means(sample_columns, replicates=2000, seed=42, workers=None):
+    # sample_columns is (columns, rows), every replicate resamples whole rows so the columns stay paired
+    sample_columns = np.ascontiguousarray(sample_columns, dtype=float)
+    task_sizes = [min(task_replicates, replicates - start) for start in range(0, replicates, task_replicates)]
+    seed_list = np.random.SeedSequence(seed).spawn(len(task_sizes))
+    workers = min(workers or os.cpu_count() or 1, len(task_sizes))
+    if workers <= 1:
+        return np.vstack([resample_means(sample_columns, size, seed_sequence)
+                          for size, seed_sequence in zip(task_sizes, seed_list)])
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(sample_columns,)) as executor:
+        return np.vstack(list(executor.map(_worker_means, task_sizes, seed_list)))
+
+
+def confidence_interval(replicate_values, confidence=0.95):
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(replicate_values, [tail, 100 - tail])
+    return float(low), float(high)
@@ -1,9 +1,14 @@
+import numpy as np
 import pandas as pd
 import networkx as nx
 import plotly.express as px
-import json
+import plotly.graph_objects as go
+import helper_funcs.geometry as geometry
+import helper_funcs.result_cache as rcache
 
 
+map_height = 1000
+
 hex_country_dict = {
     'Albania': '#ED1C24',
     'Andorra': '#D52B1E',
@@ -59,6 +64,38 @@ hex_country_dict = {
     'Yugoslavia': '#ED1C24'
 }
 
+
+def binned_histogram(bin_edges, bin_counts, mean_value=None, title=None, xaxis_title=None,
+                     yaxis_title='Count', color='skyblue', opacity=0.7, height=600):
+    # only the edges and counts reach the browser, so the payload is the same for any number of values
+    bin_edges = np.asarray(bin_edges, dtype=float)
+    fig = go.Figure(go.Bar(x=(bin_edges[:-1] + bin_edges[1:]) / 2, y=bin_counts,
+                           width=np.diff(bin_edges),
+                           customdata=np.column_stack([bin_edges[:-1], bin_edges[1:]]),
+                           hovertemplate='%{customdata[0]:.2f} to %{customdata[1]:.2f}<br>'
+                                         'Count: %{y}<extra></extra>',
+                           marker_color=color,
+                           opacity=opacity))
+    if mean_value is not None:
+        fig.add_vline(x=mean_value, line_dash="dash", line_color="red",
+                      annotation_text=f'Mean: {mean_value:.2f}',
+                      annotation_position="top right")
+    fig.update_layout(title=title,
+                      xaxis_title=xaxis_title,
+                      yaxis_title=yaxis_title,
+                      bargap=0,
+                      height=height)
+    return fig
+
+
+def histogram(values, nbins=50, show_mean=True, **layout):
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    bin_counts, bin_edges = np.histogram(values, bins=nbins)
+    mean_value = values.mean() if show_mean and len(values) else None
+    return binned_histogram(bin_edges, bin_counts, mean_value, **layout)
+
+
 def join_list(input_list):
     if len(input_list) == 1:
         return input_list[0]
@@ -66,6 +103,12 @@ def join_list(input_list):
         return ', '.join(input_list[:-1]) + ' & ' + input_list[-1]
 
 
+def year_country_codes(input_dataframe, year):
+    # every country voting or voted for in the chosen years, shared by the vote map and the community map
+    input_dataframe = input_dataframe[input_dataframe['year'].isin(year)]
+    return set(input_dataframe['from_country'].str.upper()) | set(input_dataframe['to_country'].str.upper())
+
+
 def filter_data_frame(input_dataframe,
                       from_country=None,
                       to_country=None,
@@ -102,14 +145,12 @@ def plot_votes_geo(input_dataframe,
                    year=None):
     if (from_country and to_country) or not year :
         return None
+    geojson_data = geometry.geometry(year_country_codes(input_dataframe, year), height=map_height)
     input_dataframe, title = filter_data_frame(input_dataframe=input_dataframe,
                                                from_country=from_country,
                                                to_country=to_country,
                                                year=year,
                                                full_name=False)
-    geojson_path = "data/europe.geojson"
-    with open(geojson_path, 'r') as file:
-        geojson_data = json.load(file)
     fig = px.choropleth(
         input_dataframe,
         geojson=geojson_data,
@@ -120,7 +161,7 @@ def plot_votes_geo(input_dataframe,
         title=title,
         scope='europe',
         labels={'sum_value': 'Votes'},
-        height=1000
+        height=map_height
     )
     return fig
 
@@ -153,6 +194,7 @@ def plot_votes_bar(input_dataframe,
     return fig
 
 
+@rcache.cached('plot_network')
 def plot_network(input_dataframe,
                  year=None):
     if not year:
@@ -194,9 +236,8 @@ def plot_network(input_dataframe,
             community_list.append((cluster, country))
     community_dataframe = pd.DataFrame(community_list, columns=['community', 'country'])
 
-    geojson_path = "data/europe.geojson"
-    with open(geojson_path, 'r') as file:
-        geojson_data = json.load(file)
+    geojson_data = geometry.geometry(set(input_dataframe['from_country']) | set(input_dataframe['to_country']),
+                                     height=map_height)
     fig = px.choropleth(
         community_dataframe,
         geojson=geojson_data,
@@ -211,7 +252,7 @@ def plot_network(input_dataframe,
         title=f'Communities identified in voting patterns for {join_list(year)}',
         scope='europe',
         labels={'community': 'Community'},
-        height=1000
+        height=map_height
     )
     return input_dataframe, fig, G, importance_df
 
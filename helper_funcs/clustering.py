@@ -0,0 +1,288 @@
+import os
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from sklearn.cluster import KMeans
+from sklearn.metrics import davies_bouldin_score, silhouette_score
+import helper_funcs.datasets as dsets
+import helper_funcs.figure_cache as figcache
+import helper_funcs.result_cache as rcache
+
+point_inits = 100
+# transactions read at a time by the out of core RFM path
+rfm_chunk_rows = 500000
+# customers scored for the optional silhouette and Davies-Bouldin columns, silhouette is quadratic in this
+score_sample_size = 2000
+
+
+def parse_invoice_dates(date_series):
+    if pd.api.types.is_datetime64_any_dtype(date_series):
+        return date_series
+    # invoices share timestamps, each distinct string is parsed once
+    codes, uniques = pd.factorize(date_series, use_na_sentinel=False)
+    unique_dates = pd.to_datetime(pd.Series(uniques, dtype=object)).to_numpy()
+    return pd.Series(unique_dates[codes], index=date_series.index, name=date_series.name)
+
+
+def clean_transactions(transaction_data):
+    # one combined mask, so the wide string columns are only copied once
+    transaction_data = transaction_data[transaction_data['CustomerID'].notna() &
+                                        (transaction_data['Quantity'] > 0) &
+                                        (transaction_data['UnitPrice'] > 0)].copy()
+    transaction_data['CustomerID'] = transaction_data['CustomerID'].astype(int)
+    transaction_data['InvoiceDate'] = parse_invoice_dates(transaction_data['InvoiceDate'])
+    return transaction_data
+
+
+def compute_rfm(transaction_data):
+    invoice_dates = parse_invoice_dates(transaction_data['InvoiceDate'])
+    data_date = invoice_dates.max() + pd.DateOffset(days=1)
+    # categorical keys and integer invoice codes keep every reduction on the native groupby paths
+    customers = pd.Categorical(transaction_data['CustomerID'])
+    rfm_input = pd.DataFrame({'InvoiceDate': invoice_dates.to_numpy(),
+                              'InvoiceNo': pd.factorize(transaction_data['InvoiceNo'])[0],
+                              'TotalSpend': (transaction_data['Quantity'] * transaction_data['UnitPrice']).to_numpy()})
+    grouped = rfm_input.groupby(customers, observed=True, sort=True)
+    rfm_df = pd.DataFrame({'Recency': (data_date - grouped['InvoiceDate'].max()).dt.days,
+                           'Frequency': grouped['InvoiceNo'].nunique(),
+                           'TotalSpend': grouped['TotalSpend'].sum()})
+    rfm_df.index = rfm_df.index.astype(transaction_data['CustomerID'].dtype)
+    rfm_df.index.name = 'CustomerID'
+    return rfm_df
+
+
+def invoice_keys(transaction_data):
+    # each (customer, invoice) pair becomes a 64 bit hash, invoice numbers are hashed as text so partitions
+    # that read them as numbers still match the others
+    return pd.util.hash_pandas_object(pd.DataFrame({'CustomerID': transaction_data['CustomerID'],
+                                                    'InvoiceNo': transaction_data['InvoiceNo'].astype(str)}),
+                                      index=False).to_numpy()
+
+
+def rfm_partial(transaction_data):
+    transaction_data = clean_transactions(transaction_data)
+    grouped = pd.DataFrame({'LastDate': transaction_data['InvoiceDate'],
+                            'TotalSpend': transaction_data['Quantity'] * transaction_data['UnitPrice']}
+                           ).groupby(transaction_data['CustomerID'])
+    customers = pd.DataFrame({'LastDate': grouped['LastDate'].max(),
+                              'TotalSpend': grouped['TotalSpend'].sum()})
+    pair_keys, first_index = np.unique(invoice_keys(transaction_data), return_index=True)
+    return customers, (pair_keys, transaction_data['CustomerID'].to_numpy()[first_index])
+
+
+def merge_rfm_partials(partial_list):
+    # partials hold one row per customer and one key per distinct invoice, never one per transaction
+    customer_list, invoice_list = zip(*partial_list)
+    customers = pd.concat(customer_list).groupby(level=0).agg({'LastDate': 'max', 'TotalSpend': 'sum'})
+    pair_keys, first_index = np.unique(np.concatenate([keys for keys, _ in invoice_list]), return_index=True)
+    pair_customers = np.concatenate([pair_customers for _, pair_customers in invoice_list])[first_index]
+    return customers, (pair_keys, pair_customers)
+
+
+def finish_rfm(partial):
+    customers, (_, pair_customers) = partial
+    data_date = customers['LastDate'].max() + pd.DateOffset(days=1)
+    rfm_df = pd.DataFrame({'Recency': (data_date - customers['LastDate']).dt.days,
+                           'Frequency': pd.Series(pair_customers).value_counts(),
+                           'TotalSpend': customers['TotalSpend']})
+    rfm_df.index.name = 'CustomerID'
+    return rfm_df
+
+
+def partition_partial(source, start_row, chunk_rows):
+    # runs in the worker processes, each reads only its own slice of the store or its own csv partition
+    if source in dsets.dataset_dict:
+        chunk_iter = dsets.load_chunks(source, chunk_rows, start_row=start_row, stop_row=start_row + chunk_rows)
+    else:
+        chunk_iter = pd.read_csv(source, chunksize=chunk_rows)
+    return fold_partials(rfm_partial(transaction_data) for transaction_data in chunk_iter)
+
+
+def fold_partials(partial_iter):
+    # merged as they arrive, so only the running partial and one incoming partial are held at once
+    partial = None
+    for task_partial in partial_iter:
+        partial = task_partial if partial is None else merge_rfm_partials([partial, task_partial])
+    return partial
+
+
+def partitioned_partial(sources=('online_retail',), chunk_rows=rfm_chunk_rows, workers=None, start_row=0):
+    # sources are dataset names, split into slices of the memory mapped store from start_row on, or csv
+    # partition files, None when there is nothing to read
+    task_list = []
+    for source in sources:
+        if source in dsets.dataset_dict:
+            row_count = dsets.load_table(source).num_rows
+            task_list += [(source, row) for row in range(start_row, row_count, chunk_rows)]
+        else:
+            task_list.append((source, 0))
+    source_list = [source for source, _ in task_list]
+    start_list = [row for _, row in task_list]
+    chunk_list = [chunk_rows] * len(task_list)
+    workers = min(workers or os.cpu_count() or 1, max(len(task_list), 1))
+    if workers <= 1:
+        return fold_partials(map(partition_partial, source_list, start_list, chunk_list))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return fold_partials(executor.map(partition_partial, source_list, start_list, chunk_list))
+
+
+def partitioned_rfm(sources=('online_retail',), chunk_rows=rfm_chunk_rows, workers=None):
+    return finish_rfm(partitioned_partial(sources, chunk_rows, workers))
+
+
+def score_bins(values, bins):
+    # pd.cut(values, bins, labels=range(1, 6), include_lowest=True) as a binary search over the edges
+    bins = np.asarray(bins, dtype=float)
+    if np.any(np.diff(bins) <= 0):
+        raise ValueError('bins must increase monotonically.')
+    return np.clip(np.searchsorted(bins, values.to_numpy(dtype=float), side='left'), 1, len(bins) - 1)
+
+
+def rfm_bins(rfm_df):
+    return {'Recency': [float(rfm_df['Recency'].min() - 1), 20, 50, 150, 250, float(rfm_df['Recency'].max())],
+            'Frequency': [float(rfm_df['Frequency'].min() - 1), 2, 3, 10, 100, float(rfm_df['Frequency'].max())],
+            'TotalSpend': [float(rfm_df['TotalSpend'].min() - 3), 300, 600, 2000, 5000,
+                           float(rfm_df['TotalSpend'].max())]}
+
+
+def score_rfm(rfm_df, bins=None):
+    # stored bin edges score new customers on the same scale as the ones the model was fitted on
+    rfm_df = rfm_df.copy()
+    bins = bins or rfm_bins(rfm_df)
+    # Reverse the Recency scores so that higher values indicate more recent purchases
+    rfm_df['R_Score'] = 6 - score_bins(rfm_df['Recency'], bins['Recency'])
+
+    # Calculate Frequency and Monetary scores based on custom bins
+    rfm_df['F_Score'] = score_bins(rfm_df['Frequency'], bins['Frequency'])
+    rfm_df['M_Score'] = score_bins(rfm_df['TotalSpend'], bins['TotalSpend'])
+    return rfm_df
+
+
+def unique_points(features):
+    # scores are small integers, so customers collapse onto a handful of distinct points
+    points, inverse, counts = np.unique(np.asarray(features), axis=0, return_inverse=True, return_counts=True)
+    points = pd.DataFrame(points, columns=getattr(features, 'columns', None))
+    return points, counts, inverse.ravel()
+
+
+@rcache.cached('kmeans_points')
+def fit_points(points, counts, n_clusters, n_init=point_inits):
+    # cached per distinct point set and k, so the sweep and the final model share fits across reruns
+    kmeans_model = KMeans(n_clusters=n_clusters, n_init=n_init, random_state=42)
+    kmeans_model.fit(points, sample_weight=counts)
+    return kmeans_model
+
+
+def sample_scores(features, inverse, kmeans_model, sample_index):
+    sample_labels = kmeans_model.labels_[inverse[sample_index]]
+    if not 2 <= len(np.unique(sample_labels)) < len(sample_index):
+        return np.nan, np.nan
+    sample_features = np.asarray(features)[sample_index]
+    return (silhouette_score(sample_features, sample_labels),
+            davies_bouldin_score(sample_features, sample_labels))
+
+
+def k_sweep(features, k_range=range(2, 16), with_scores=False, sample_size=score_sample_size, workers=None):
+    points, counts, inverse = unique_points(features)
+    fit_list = [k for k in k_range if k < len(points)]
+    # KMeans does its work outside the GIL, threads avoid shipping the points to other processes
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        model_dict = dict(zip(fit_list, executor.map(lambda k: fit_points(points, counts, k), fit_list)))
+    # one distinct point per cluster leaves nothing to explain
+    sweep_df = pd.DataFrame({'Number of Clusters (k)': list(k_range),
+                             'Inertia': [model_dict[k].inertia_ if k in model_dict else 0.0 for k in k_range]})
+    if with_scores:
+        rng = np.random.default_rng(42)
+        sample_index = np.sort(rng.choice(len(inverse), min(sample_size, len(inverse)), replace=False))
+        score_list = [sample_scores(features, inverse, model_dict[k], sample_index) if k in model_dict
+                      else (np.nan, np.nan) for k in k_range]
+        sweep_df['Silhouette'] = [score[0] for score in score_list]
+        sweep_df['Davies-Bouldin'] = [score[1] for score in score_list]
+    return sweep_df
+
+
+def elbow_inertia(features, k_range=range(2, 16)):
+    return k_sweep(features, k_range)
+
+
+def fit_clusters(features, n_clusters=4):
+    # fitting the weighted distinct points minimises the same inertia as fitting every customer, and is cheap
+    # enough to afford the restarts that reliably land on the best of the local optima
+    points, counts, inverse = unique_points(features)
+    kmeans_model = fit_points(points, counts, n_clusters)
+    return kmeans_model, kmeans_model.labels_[inverse]
+
+
+@figcache.cached_figure('missing_data_bar')
+def missing_data_bar(missing_data_df):
+    missing_data_df = missing_data_df.reset_index()
+    fig = px.bar(missing_data_df,
+                 x='index', y='Percentage Missing',
+                 color='Percentage Missing', color_continuous_scale='Viridis')
+    fig.update_layout(title='Percentage of Missing Data in Each Column',
+                      xaxis_title='Column Name',
+                      yaxis_title='Percentage Missing',
+                      coloraxis_colorbar_title='Perc',
+                      legend_title='Value')
+    return fig
+
+
+@figcache.cached_figure('elbow_curve')
+def elbow_curve(inertia_df):
+    fig = px.line(inertia_df, x='Number of Clusters (k)', y='Inertia', markers=True)
+
+    fig.update_layout(
+        title='Elbow Curve for K-means Clustering',
+        xaxis_title='Number of Clusters (k)',
+        yaxis_title='Inertia',
+        showlegend=False,
+        template='plotly_white'
+    )
+    return fig
+
+
+@figcache.cached_figure('cluster_scores_bar')
+def cluster_scores_bar(rfm_df, colors):
+    cluster_summary = rfm_df.groupby('Cluster').agg({
+        'R_Score': 'mean',
+        'F_Score': 'mean',
+        'M_Score': 'mean'
+    }).reset_index()
+    cluster_melted_df = cluster_summary.melt(id_vars='Cluster',
+                                             var_name='Metric',
+                                             value_name='Score')
+
+    fig = px.bar(cluster_melted_df, x="Cluster", y="Score",
+                 color='Metric', barmode='group',
+                 color_discrete_sequence=colors,
+                 height=800)
+
+    fig.update_layout(title_font_size=20, legend_title='Clusters',
+                      title='Average RFM Scores for Each Cluster',
+                      xaxis_title='Cluster Number',
+                      yaxis_title='Average Score',
+                      template='plotly_white')
+    new = {'R_Score': 'Avg Recency',
+           'F_Score': 'Avg Frequency',
+           'M_Score': 'Avg Monetary'}
+    fig.for_each_trace(lambda t: t.update(name=new[t.name]))
+    return fig
+
+
+@figcache.cached_figure('cluster_split_pie')
+def cluster_split_pie(rfm_df, labels, colors):
+    # in cluster order, so each share lines up with its label, a cluster no customer falls into keeps a zero share
+    cluster_names = [f'Cluster {index + 1}' for index in range(len(labels))]
+    per_cluster = rfm_df['Cluster'].value_counts().reindex(cluster_names, fill_value=0)
+    total = per_cluster.sum()
+    percentage_df = (per_cluster / total) * 100
+
+    # Create a pie chart
+    fig = px.pie(names=labels,
+                 values=percentage_df,
+                 title='Percentage of Customers in Each Cluster',
+                 color_discrete_sequence=colors,
+                 height=800)
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
@@ -0,0 +1,180 @@
+import os
+import json
+import shutil
+import hashlib
+import urllib.request
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+remote_data_path = 'https://raw.githubusercontent.com/this-isnt-me/credit-card-fraud-network/main/dataset'
+store_path = os.environ.get('PORTFOLIO_DATA_STORE', 'data/store')
+# csv rows parsed at a time when a dataset is materialized
+csv_chunk_rows = 250000
+# rows hashed at each end of the rows an incremental result has folded in
+fingerprint_rows = 16384
+
+# name: (source file, keyword arguments used when parsing the source csv)
+dataset_dict = {
+    'food_orders': ('food_orders_new_york.csv', {}),
+    'online_retail': ('online_retail.csv', {}),
+    'eurovision_votes': ('eurovision_votes_processed.csv', {'dtype': {'year': str}}),
+}
+
+
+def dataset_source(dataset_name):
+    file_name, _ = dataset_dict[dataset_name]
+    source_root = os.environ.get('PORTFOLIO_DATA_SOURCE', remote_data_path)
+    if '://' in source_root:
+        return f'{source_root}/{file_name}'
+    return os.path.join(source_root, file_name)
+
+
+def dataset_file(dataset_name):
+    return os.path.join(store_path, f'{dataset_name}.arrow')
+
+
+def manifest_file(dataset_name):
+    return os.path.join(store_path, f'{dataset_name}.json')
+
+
+def chunk_schema(loaded_df):
+    # a column with no values in a chunk parses as float, it takes its type from the chunks that have values
+    schema = pa.Schema.from_pandas(loaded_df, preserve_index=False)
+    for index, column in enumerate(loaded_df.columns):
+        if loaded_df[column].isna().all():
+            schema = schema.set(index, pa.field(column, pa.null()))
+    return schema
+
+
+def csv_schema(source, read_kwargs):
+    # a column can parse to a wider type further down the file, integers with a gap become floats, so every chunk is
+    # read once to settle the column types before any of them is written
+    chunks = pd.read_csv(source, chunksize=csv_chunk_rows, **read_kwargs)
+    schema_list = [chunk_schema(loaded_df) for loaded_df in chunks]
+    schema = pa.unify_schemas(schema_list, promote_options='permissive')
+    # columns empty in every chunk stay floats, as they are when the whole file is parsed at once
+    return pa.schema([field.with_type(pa.float64()) if field.type == pa.null() else field for field in schema],
+                     metadata=schema.metadata)
+
+
+def file_hash(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()[:16]
+
+
+def materialize_dataset(dataset_name, source=None, force=False):
+    arrow_path = dataset_file(dataset_name)
+    if os.path.exists(arrow_path) and not force:
+        return arrow_path
+    _, read_kwargs = dataset_dict[dataset_name]
+    source = source or dataset_source(dataset_name)
+    os.makedirs(store_path, exist_ok=True)
+    # write to a temporary file first so concurrent replicas never map a half written file
+    tmp_path = f'{arrow_path}.{os.getpid()}.tmp'
+    csv_path = source
+    if '://' in source:
+        # the csv is read twice, so a remote source is downloaded once
+        csv_path = f'{tmp_path}.csv'
+        with urllib.request.urlopen(source) as response, open(csv_path, 'wb') as file:
+            shutil.copyfileobj(response, file)
+    schema = csv_schema(csv_path, read_kwargs)
+    rows = 0
+    # only one chunk of the csv is held in memory at a time
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for loaded_df in pd.read_csv(csv_path, chunksize=csv_chunk_rows, **read_kwargs):
+                writer.write_table(pa.Table.from_pandas(loaded_df, schema=schema, preserve_index=False))
+                rows += len(loaded_df)
+    if csv_path != source:
+        os.remove(csv_path)
+    manifest = {'name': dataset_name,
+                'source': source,
+                'rows': rows,
+                'columns': schema.names,
+                'version': file_hash(tmp_path)}
+    with open(f'{manifest_file(dataset_name)}.{os.getpid()}.tmp', 'w') as file:
+        json.dump(manifest, file, indent=2)
+    # the manifest is published last, so a version read from it never describes an older arrow file
+    os.replace(tmp_path, arrow_path)
+    os.replace(f'{manifest_file(dataset_name)}.{os.getpid()}.tmp', manifest_file(dataset_name))
+    return arrow_path
+
+
+def load_table(dataset_name):
+    arrow_path = materialize_dataset(dataset_name)
+    # uncompressed ipc files are read straight out of the mapping, so replicas share the OS page cache
+    source = pa.memory_map(arrow_path, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def load_dataset(dataset_name, columns=None):
+    table = load_table(dataset_name)
+    if columns:
+        table = table.select(columns)
+    return table.to_pandas(split_blocks=True)
+
+
+def load_chunks(dataset_name, chunk_rows, columns=None, start_row=0, stop_row=None):
+    table = load_table(dataset_name)
+    if columns:
+        table = table.select(columns)
+    stop_row = table.num_rows if stop_row is None else min(stop_row, table.num_rows)
+    # slices of the mapped table are zero copy, only one chunk is converted to pandas at a time
+    for offset in range(start_row, stop_row, chunk_rows):
+        yield table.slice(offset, min(chunk_rows, stop_row - offset)).to_pandas(split_blocks=True)
+
+
+def dataset_version(dataset_name):
+    materialize_dataset(dataset_name)
+    with open(manifest_file(dataset_name), 'r') as file:
+        return json.load(file)['version']
+
+
+def rows_version(table, start, stop):
+    # take copies the rows into buffers of their own, a bare slice still writes the parent's full string buffers and
+    # would hash differently once rows are appended after it
+    table = table.slice(start, stop - start)
+    table = table.take(pa.array(np.arange(table.num_rows)))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return hashlib.sha256(sink.getvalue()).hexdigest()[:16]
+
+
+def fold_fingerprint(dataset_name, rows):
+    # a fixed number of rows from each end of the folded rows, so checking a fold costs the same however long the
+    # history behind it has grown, an append leaves both ends where they were
+    table = load_table(dataset_name)
+    head_version = rows_version(table, 0, min(rows, fingerprint_rows))
+    return f'{head_version}-{rows_version(table, max(rows - fingerprint_rows, 0), rows)}'
+
+
+def fold_tag(dataset_name, code_version):
+    # saved next to an incremental result built from every row of the dataset as it is now
+    rows = load_table(dataset_name).num_rows
+    return {'rows': rows,
+            'dataset_version': dataset_version(dataset_name),
+            'fingerprint': fold_fingerprint(dataset_name, rows),
+            'code_version': code_version}
+
+
+def folded_rows(dataset_name, tag, code_version):
+    # rows an incremental result saved with fold_tag still covers, 0 when it has to be rebuilt from the first row:
+    # other code built it, or the rows it folded in are no longer the first rows of the dataset
+    if tag is None or tag.get('code_version') != code_version:
+        return 0
+    if tag['dataset_version'] == dataset_version(dataset_name):
+        return tag['rows']
+    if tag['rows'] > load_table(dataset_name).num_rows:
+        return 0
+    return tag['rows'] if fold_fingerprint(dataset_name, tag['rows']) == tag['fingerprint'] else 0
+
+
+if __name__ == '__main__':
+    for name in dataset_dict:
+        print(name, materialize_dataset(name, force=True), dataset_version(name))
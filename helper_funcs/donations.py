@@ -0,0 +1,191 @@
+import json
+import pandas as pd
+import plotly.express as px
+import helper_funcs.helper_funcs as helpf
+
+
+geo_split_path = 'data/mackenzie_scott_gifts_geosplit.json'
+gifts_path = 'data/mackenzie_scott_gifts.json'
+
+
+def load_json(data_path):
+    with open(data_path, 'r') as file:
+        json_data = json.load(file)
+    return json_data
+
+
+def load_geo_split(data_path=geo_split_path):
+    geo_split_df = pd.DataFrame(load_json(data_path))
+    geo_split_df['country'] = geo_split_df['country'].replace('United States of America', 'United States')
+    return geo_split_df
+
+
+def country_map(input_dataframe, color, color_continuous_scale):
+    fig = px.choropleth(input_dataframe,
+                        locations='alpha3',
+                        locationmode='ISO-3',
+                        projection='natural earth',
+                        color=color,
+                        hover_name='country',
+                        height=800,
+                        color_continuous_scale=color_continuous_scale)
+    return fig
+
+
+def state_map(input_dataframe, color, color_continuous_scale):
+    fig = px.choropleth(input_dataframe,
+                        locations='state_code',
+                        locationmode='USA-states',
+                        color=color,
+                        hover_name='state',
+                        projection='albers usa',
+                        height=800,
+                        color_continuous_scale=color_continuous_scale)
+    return fig
+
+
+def country_bar(input_dataframe, y, yaxis_title):
+    fig = px.bar(input_dataframe, x='country', y=y,
+                 height=800,
+                 color_continuous_scale=px.colors.sequential.Viridis)
+    fig.update_layout(
+        xaxis_title='Country Name',
+        yaxis_title=yaxis_title
+    )
+    return fig
+
+
+def spend_per_year(input_dataframe, color=None, yaxis_title=None):
+    fig = px.line(input_dataframe, x='gift_year', y='gift_amount', color=color, height=800, markers=True)
+    fig.update_layout(
+        xaxis=dict(
+            tickmode='array',
+            tickvals=sorted(list(input_dataframe['gift_year'].unique()))
+        ),
+        xaxis_title='Year',
+        yaxis_title=yaxis_title
+    )
+    return fig
+
+
+def organisation_artifacts(geo_split_df):
+    org_data = geo_split_df.drop(columns=['gift_year', 'gift_amount', 'state', 'state_code']).drop_duplicates()
+    country_counts = org_data.groupby(['alpha3',
+                                       'country']).size().reset_index(name='count').sort_values(by='count',
+                                                                                                ascending=False)
+    country_counts_no_usa = country_counts[country_counts['alpha3'] != 'USA']
+    return {'org_count_map': country_map(country_counts, 'count', px.colors.sequential.Viridis),
+            'org_count_bar': country_bar(country_counts, 'count', 'Organisation Count'),
+            'org_count_map_ex_usa': country_map(country_counts_no_usa, 'count', px.colors.sequential.Viridis),
+            'org_count_bar_ex_usa': country_bar(country_counts_no_usa, 'count', 'Organisation Count')}
+
+
+def amount_artifacts(geo_split_df):
+    geo_split_spending_df = geo_split_df[geo_split_df['gift_amount'].notnull()].copy()
+    geo_split_spending_df['gift_amount'] = geo_split_spending_df['gift_amount'].astype(int)
+    country_amount_sum = geo_split_spending_df.groupby(['alpha3',
+                                                        'country'])['gift_amount'].sum().reset_index()
+    country_amount_sum = country_amount_sum.sort_values(by='gift_amount', ascending=False)
+    country_amount_sum['gift_amount'] = country_amount_sum['gift_amount'] / 1000000
+
+    geo_split_no_usa_df = geo_split_spending_df[geo_split_spending_df['alpha3'] != 'USA']
+    country_amount_sum_no_usa = geo_split_no_usa_df.groupby(['alpha3',
+                                                             'country'])['gift_amount'].sum().reset_index()
+    country_amount_sum_no_usa = country_amount_sum_no_usa.sort_values(by='gift_amount', ascending=False)
+    country_amount_sum_no_usa['gift_amount'] = country_amount_sum_no_usa['gift_amount'] / 1000000
+
+    grouped = geo_split_spending_df.groupby(['alpha3',
+                                             'country',
+                                             'organization'])['gift_amount'].sum().reset_index()
+    average_gift_per_org = grouped.groupby(['alpha3',
+                                            'country'])['gift_amount'].mean().reset_index()
+    average_gift_per_org = average_gift_per_org.sort_values(by='gift_amount', ascending=False)
+    average_gift_per_org['gift_amount'] = average_gift_per_org['gift_amount'] / 1000000
+
+    total_spend = geo_split_spending_df.groupby('gift_year')['gift_amount'].sum().reset_index()
+    total_spend['gift_amount'] = round(total_spend['gift_amount'] / 1000000, 2)
+    country_spend = geo_split_spending_df.groupby(['country', 'gift_year'])['gift_amount'].sum().reset_index()
+    country_spend['gift_amount'] = round(country_spend['gift_amount'] / 1000000, 2)
+    return {'amount_map': country_map(country_amount_sum, 'gift_amount', px.colors.sequential.Magma),
+            'amount_bar': country_bar(country_amount_sum, 'gift_amount', 'Amount Gifted (Million USD)'),
+            'amount_map_ex_usa': country_map(country_amount_sum_no_usa, 'gift_amount', px.colors.sequential.Magma),
+            'amount_bar_ex_usa': country_bar(country_amount_sum_no_usa, 'gift_amount', 'Amount Gifted (Million USD)'),
+            'avg_amount_map': country_map(average_gift_per_org, 'gift_amount', px.colors.sequential.Magma),
+            'avg_amount_bar': country_bar(average_gift_per_org, 'gift_amount', 'Amount Gifted (Million USD)'),
+            'spend_per_year': spend_per_year(total_spend, yaxis_title='Total Reported Spend (Million USD)'),
+            'spend_per_year_by_country': spend_per_year(country_spend, color='country',
+                                                        yaxis_title='Reported Spend By Country (Million USD)')}
+
+
+def unreported_artifacts(geo_split_df):
+    geo_split_null_df = geo_split_df.query('gift_amount != gift_amount')
+    country_counts_null_df = geo_split_null_df.groupby(['alpha3',
+                                                        'country']
+                                                       ).size().reset_index(name='count'
+                                                                            ).sort_values(by='count', ascending=False)
+    null_gift_count = geo_split_df[geo_split_df['gift_amount'].isnull()].groupby('alpha3').size()
+    total_count = geo_split_df.groupby('alpha3').size()
+    percentage_null = (null_gift_count / total_count) * 100
+    result_df = pd.DataFrame({
+        'alpha3': percentage_null.index,
+        'country': [geo_split_df[geo_split_df['alpha3'] == alpha3]['country'].iloc[0]
+                    for alpha3 in percentage_null.index],
+        'percentage_null': percentage_null.values
+    })
+    result_df = result_df.sort_values(by='percentage_null', ascending=False)
+    return {'unreported_count_map': country_map(country_counts_null_df, 'count', px.colors.sequential.Magma),
+            'unreported_percentage_map': country_map(result_df, 'percentage_null', px.colors.sequential.Magma),
+            'unreported_count_bar': country_bar(country_counts_null_df, 'count', 'Organisation Count'),
+            'unreported_percentage_bar': country_bar(result_df, 'percentage_null', 'Organisation Percentage')}
+
+
+def state_artifacts(geo_split_df):
+    usa_split_df = geo_split_df[geo_split_df['state_code'].notnull()]
+    state_counts = usa_split_df.groupby(['state',
+                                         'state_code']).size().reset_index(name='count').sort_values(by='count',
+                                                                                                     ascending=False)
+    usa_split_spending_df = usa_split_df[usa_split_df['gift_amount'].notnull()]
+    state_amount_sum = usa_split_spending_df.groupby(['state_code', 'state'])['gift_amount'].sum().reset_index()
+    state_amount_sum['gift_amount'] = state_amount_sum['gift_amount'] / 1000000
+    grouped = usa_split_spending_df.groupby(['state', 'state_code', 'organization'])['gift_amount'].sum().reset_index()
+    average_gift_per_org = grouped.groupby(['state', 'state_code'])['gift_amount'].mean().reset_index()
+    average_gift_per_org['gift_amount'] = average_gift_per_org['gift_amount'] / 1000000
+    return {'state_count_map': state_map(state_counts, 'count', px.colors.sequential.Viridis),
+            'state_amount_map': state_map(state_amount_sum, 'gift_amount', px.colors.sequential.Magma),
+            'state_avg_amount_map': state_map(average_gift_per_org, 'gift_amount', px.colors.sequential.Magma)}
+
+
+def focus_area_list(network_data):
+    network_list = []
+    for document in network_data:
+        focus_areas = document.get('org_reported_focus_areas', None)
+        if len(focus_areas) > 1:
+            network_list.append(sorted(focus_areas))
+    return network_list
+
+
+def network_artifacts(network_list):
+    node_weight_list, edge_weight_list = helpf.generate_network_data(network_list)
+    network_graph = helpf.generate_network(node_weight_list, edge_weight_list)
+    return {'centrality': helpf.centrality_detection(network_graph),
+            'communities': helpf.community_detection(network_graph),
+            'cliques': helpf.clique_detection(network_graph)}
+
+
+def build_global_artifacts():
+    return organisation_artifacts(load_geo_split())
+
+
+def build_money_artifacts():
+    geo_split_df = load_geo_split()
+    artifacts = amount_artifacts(geo_split_df)
+    artifacts.update(unreported_artifacts(geo_split_df))
+    return artifacts
+
+
+def build_usa_artifacts():
+    return state_artifacts(load_geo_split())
+
+
+def build_network_artifacts():
+    return network_artifacts(focus_area_list(load_json(gifts_path)))
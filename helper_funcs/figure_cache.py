@@ -0,0 +1,59 @@
+import json
+import functools
+# importing streamlit also makes its plotly template the default, so headless renders match the pages
+import streamlit as st
+from packaging.version import Version
+from plotly.utils import PlotlyJSONEncoder
+import helper_funcs.result_cache as rcache
+
+try:
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+except ImportError:
+    PlotlyChartProto = None
+
+
+# the proto below is filled the way st.plotly_chart fills it up to 1.34, 1.35 moved the spec out of figure and added
+# selection events, other releases are sent through st.plotly_chart
+direct_proto = (PlotlyChartProto is not None and
+                Version('1.31') <= Version(st.__version__) < Version('1.35'))
+chart_config = json.dumps({'showLink': False, 'linkText': False})
+
+
+class FigureSpec(str):
+    # a finished figure json string, plotly_chart below sends it to the browser as is
+    pass
+
+
+def figure_json(fig):
+    return FigureSpec(json.dumps(fig.to_plotly_json(), cls=PlotlyJSONEncoder, separators=(',', ':')))
+
+
+def cached_figure(name, ttl=rcache.cache_ttl):
+    def decorator(func):
+        # same keying as result_cache.cached, but only the serialized spec is stored
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = rcache.get_backend()
+            key = f'figure-{name}-{rcache.code_version(func.__module__)}-{rcache.hash_inputs(*args, **kwargs)[:40]}'
+            payload = backend.get(key)
+            if payload is not None:
+                return FigureSpec(payload.decode('utf-8'))
+            spec = figure_json(func(*args, **kwargs))
+            backend.set(key, spec.encode('utf-8'), ttl=ttl)
+            return spec
+        return wrapper
+    return decorator
+
+
+def plotly_chart(container, figure, use_container_width=False, theme='streamlit'):
+    if not isinstance(figure, FigureSpec):
+        return container.plotly_chart(figure, use_container_width=use_container_width, theme=theme)
+    if not direct_proto:
+        return container.plotly_chart(json.loads(figure), use_container_width=use_container_width, theme=theme)
+    # the same proto st.plotly_chart builds, minus validating, copying and re-serializing the figure
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.figure.spec = figure
+    proto.figure.config = chart_config
+    proto.theme = theme or ''
+    return container._enqueue('plotly_chart', proto)
@@ -0,0 +1,149 @@
+import os
+import json
+import gzip
+import hashlib
+import functools
+import streamlit.config as st_config
+import helper_funcs.topology as topo
+
+
+geojson_path = 'data/europe.geojson'
+feature_key = 'ISO2'
+lod_path = os.environ.get('PORTFOLIO_GEOMETRY_DIR', 'data/geometry')
+# per chart country subsets, referenced by url only when this directory sits inside the app's static folder, which
+# streamlit serves at app/static/ when server.enableStaticServing is on, a directory outside it sends the geometry
+# inline with every figure
+static_path = os.environ.get('PORTFOLIO_STATIC_GEO_DIR', os.path.join('static', 'geo'))
+app_static_path = 'static'
+
+
+def served_url(directory):
+    # streamlit refuses files outside the static folder, even through a symlink
+    relative = os.path.relpath(os.path.abspath(directory), os.path.abspath(app_static_path))
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return None
+    return '/'.join(['app/static'] + [part for part in relative.split(os.sep) if part != os.curdir])
+
+
+static_url = served_url(static_path)
+
+# level: (douglas peucker tolerance in degrees, decimals kept in the coordinates)
+lod_dict = {
+    'full': (0, 6),
+    'high': (0.005, 4),
+    'medium': (0.02, 3),
+    'low': (0.08, 2),
+}
+# latitude range plotly draws for scope='europe'
+europe_span = 55
+
+
+def level_for_height(height):
+    # the coarsest level whose error stays under half a pixel at this render height
+    half_pixel = europe_span / height / 2
+    level_list = sorted(lod_dict.items(), key=lambda item: item[1][0], reverse=True)
+    for level, (tolerance, _) in level_list:
+        if tolerance <= half_pixel:
+            return level
+    return 'full'
+
+
+@functools.lru_cache(maxsize=4)
+def load_geojson(path=geojson_path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+@functools.lru_cache(maxsize=4)
+def source_version(path=geojson_path):
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=4)
+def load_topology(path=geojson_path):
+    return topo.build_topology(load_geojson(path)['features'])
+
+
+def lod_file(level, path=geojson_path):
+    file_stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(lod_path, f'{file_stem}-{source_version(path)}-{level}.geojson')
+
+
+def build_lod(level, path=geojson_path):
+    tolerance, decimals = lod_dict[level]
+    arc_list, topology = load_topology(path)
+    feature_list = topo.simplify_features(load_geojson(path)['features'], arc_list, topology, tolerance, decimals)
+    lod_geojson = {'type': 'FeatureCollection', 'features': feature_list}
+    os.makedirs(lod_path, exist_ok=True)
+    tmp_path = f'{lod_file(level, path)}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(lod_geojson, file, separators=(',', ':'))
+    os.replace(tmp_path, lod_file(level, path))
+    return lod_geojson
+
+
+@functools.lru_cache(maxsize=16)
+def load_lod(level, path=geojson_path):
+    if os.path.exists(lod_file(level, path)):
+        with open(lod_file(level, path), 'r') as file:
+            return json.load(file)
+    return build_lod(level, path)
+
+
+@functools.lru_cache(maxsize=16)
+def feature_index(level='full', path=geojson_path):
+    return {feature['properties'][feature_key]: feature for feature in load_lod(level, path)['features']}
+
+
+@functools.lru_cache(maxsize=256)
+def subset_geojson(codes, level='full', path=geojson_path):
+    index = feature_index(level, path)
+    return {'type': 'FeatureCollection',
+            'features': [index[code] for code in codes if code in index]}
+
+
+@functools.lru_cache(maxsize=256)
+def subset_url(codes, level='full', path=geojson_path):
+    # one file per country set, the browser fetches it once and every map using that set shares it
+    digest = hashlib.sha256(f'{source_version(path)}-{level}-{",".join(codes)}'.encode()).hexdigest()[:16]
+    file_path = os.path.join(static_path, f'{digest}.geojson')
+    if not os.path.exists(file_path):
+        os.makedirs(static_path, exist_ok=True)
+        tmp_path = f'{file_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(subset_geojson(codes, level, path), file, separators=(',', ':'))
+        os.replace(tmp_path, file_path)
+    return f'{static_url}/{digest}.geojson'
+
+
+def geometry(codes, height=None, path=geojson_path):
+    # only the features the chart will colour, at the detail its height can show,
+    # referenced by url when streamlit can serve it
+    codes = tuple(sorted(set(codes)))
+    level = level_for_height(height) if height else 'full'
+    if static_url and st_config.get_option('server.enableStaticServing'):
+        return subset_url(codes, level, path)
+    return subset_geojson(codes, level, path)
+
+
+def lod_report(path=geojson_path):
+    report = []
+    for level, (tolerance, decimals) in lod_dict.items():
+        payload = json.dumps(load_lod(level, path), separators=(',', ':')).encode()
+        points = sum(len(ring) for feature in load_lod(level, path)['features']
+                     for polygon in topo.geometry_polygons(feature['geometry']) for ring in polygon)
+        report.append({'level': level, 'tolerance': tolerance, 'decimals': decimals, 'points': points,
+                       'bytes': len(payload), 'gzip_bytes': len(gzip.compress(payload))})
+    return report
+
+
+if __name__ == '__main__':
+    for level in lod_dict:
+        build_lod(level)
+    print(f'{"level":<8}{"tolerance":>10}{"points":>10}{"bytes":>12}{"gzip":>10}')
+    for entry in lod_report():
+        print(f'{entry["level"]:<8}{entry["tolerance"]:>10}{entry["points"]:>10}{entry["bytes"]:>12}'
+              f'{entry["gzip_bytes"]:>10}')
+    for height in [400, 600, 1000, 2000]:
+        print(f'{height}px -> {level_for_height(height)}')
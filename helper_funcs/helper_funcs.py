@@ -4,6 +4,7 @@ import plotly.express as px
 import pandas as pd
 import random
 import unicodedata
+import helper_funcs.result_cache as rcache
 
 
 def filter_countries(input_dataframe,
@@ -45,12 +46,12 @@ def generate_network(node_list, edge_list):
     # Create an empty graph
     G = nx.Graph()
     # Add nodes to the graph with node size as a node attribute
-    color_scale = list(set(px.colors.sequential.Plasma
-                           + px.colors.sequential.Viridis
-                           + px.colors.sequential.Magma
-                           + px.colors.sequential.Turbo
-                           + px.colors.sequential.Jet
-                           + px.colors.sequential.Plotly3))
+    color_scale = sorted(set(px.colors.sequential.Plasma
+                             + px.colors.sequential.Viridis
+                             + px.colors.sequential.Magma
+                             + px.colors.sequential.Turbo
+                             + px.colors.sequential.Jet
+                             + px.colors.sequential.Plotly3))
     random.seed(47)
     random.shuffle(color_scale)
     print(len(color_scale))
@@ -62,6 +63,7 @@ def generate_network(node_list, edge_list):
     return G
 
 
+@rcache.cached('centrality_detection')
 def centrality_detection(network_graph, rows=10, algorithms=None):
     column_list = ['Rank']
     ranking_list = [str(i) for i in range(1, rows+1)]
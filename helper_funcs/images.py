@@ -0,0 +1,52 @@
+import os
+import glob
+import functools
+from PIL import Image
+import helper_funcs.result_cache as rcache
+
+
+asset_path = os.environ.get('PORTFOLIO_ASSET_DIR', 'data/assets')
+image_format = 'webp'
+
+# role: (widest the image is displayed at in the layout, x2 for high density screens; webp quality)
+variant_dict = {
+    'logo': (400, 90),
+    'content': (1200, 80),
+}
+
+
+@functools.lru_cache(maxsize=128)
+def build_variant(image_path, modified, size, role):
+    max_width, quality = variant_dict[role]
+    file_stem = os.path.splitext(os.path.basename(image_path))[0]
+    variant_path = os.path.join(asset_path, f'{file_stem}-{rcache.file_version(image_path)}-{role}.{image_format}')
+    if os.path.exists(variant_path):
+        return variant_path
+    with Image.open(image_path) as image:
+        # never upscale, only shrink images wider than they are ever displayed
+        if image.width > max_width:
+            image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+        os.makedirs(asset_path, exist_ok=True)
+        tmp_path = f'{variant_path}.{os.getpid()}.tmp'
+        # png sources are flat graphics which compress better losslessly
+        image.save(tmp_path, format=image_format, quality=quality, method=6,
+                   lossless=image_path.lower().endswith('.png'))
+    os.replace(tmp_path, variant_path)
+    return variant_path
+
+
+def image_variant(image_path, role='content'):
+    # keyed on mtime and size so a rerun only costs a stat once the variant exists
+    try:
+        stat = os.stat(image_path)
+        return build_variant(image_path, stat.st_mtime_ns, stat.st_size, role)
+    except Exception as e:
+        print("An error occurred:", e)
+        return image_path
+
+
+if __name__ == '__main__':
+    for path in sorted(glob.glob('img/*')):
+        for role in variant_dict:
+            variant = image_variant(path, role)
+            print(f'{path:<24}{role:<10}{os.path.getsize(path):>10} -> {os.path.getsize(variant):>8}  {variant}')
@@ -0,0 +1,129 @@
+import os
+import time
+import zlib
+import threading
+import concurrent.futures
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+
+# retries per symbol, the wait doubles after every failed attempt
+max_attempts = 3
+backoff_seconds = 0.5
+
+
+class RateLimiter:
+    # spaces requests at least 1 / rate seconds apart across every thread sharing the provider
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class YahooProvider:
+    max_workers = 4
+    requests_per_second = 2.0
+
+    def __init__(self):
+        self.limiter = RateLimiter(self.requests_per_second)
+
+    def fetch(self, symbol, start, end):
+        self.limiter.wait()
+        # Ticker.history keeps no shared state between calls, unlike yf.download, so it is safe across threads
+        price_df = yf.Ticker(symbol).history(start=start, end=end, auto_adjust=False, actions=False,
+                                             raise_errors=True, timeout=10)
+        if price_df.empty:
+            raise ValueError(f'No price data returned for {symbol}')
+        price_df.index = price_df.index.tz_localize(None)
+        price_df.index.name = 'Date'
+        return price_df
+
+
+class FixtureProvider:
+    # deterministic offline prices, each symbol is a seeded random walk over business days from a fixed origin so
+    # any date range returns the same values for the days it shares with another
+    max_workers = 4
+    requests_per_second = None
+    origin = '2000-01-03'
+
+    def __init__(self):
+        self.limiter = RateLimiter(self.requests_per_second)
+
+    def fetch(self, symbol, start, end):
+        self.limiter.wait()
+        # weekdays filtered from a daily range, bdate_range steps through every business day offset in python
+        dates = pd.date_range(self.origin, pd.Timestamp(end) - pd.Timedelta(days=1), name='Date')
+        dates = dates[dates.dayofweek < 5]
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        close = 100 * np.cumprod(1 + rng.normal(0.0004, 0.015, len(dates)))
+        price_df = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Adj Close': close,
+                                 'Volume': np.zeros(len(dates), dtype=int)}, index=dates)
+        price_df = price_df[price_df.index >= pd.Timestamp(start)]
+        if price_df.empty:
+            raise ValueError(f'No price data returned for {symbol}')
+        return price_df
+
+
+provider_dict = {
+    'yahoo': YahooProvider,
+    'fixture': FixtureProvider,
+}
+_provider = None
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        _provider = provider_dict[os.environ.get('PORTFOLIO_MARKET_PROVIDER', 'yahoo')]()
+    return _provider
+
+
+def set_provider(provider):
+    global _provider
+    _provider = provider
+
+
+def fetch_with_retry(provider, symbol, start, end):
+    for attempt in range(max_attempts):
+        try:
+            return provider.fetch(symbol, start, end)
+        except Exception as e:
+            if attempt == max_attempts - 1:
+                raise
+            print("An error occurred:", e)
+            time.sleep(backoff_seconds * 2 ** attempt)
+
+
+def fetch_requests(request_list, provider=None):
+    # requests are (symbol, start, end) and all go out at once with bounded parallelism, one slow or failing
+    # request no longer holds up the others, failures come back separately so the caller can carry on without them
+    provider = provider or get_provider()
+    request_list = list(dict.fromkeys(request_list))
+    result_dict = {}
+    error_dict = {}
+    workers = max(1, min(provider.max_workers, len(request_list)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        future_dict = {executor.submit(fetch_with_retry, provider, *request): request for request in request_list}
+        for future in concurrent.futures.as_completed(future_dict):
+            request = future_dict[future]
+            try:
+                result_dict[request] = future.result()
+            except Exception as e:
+                error_dict[request] = str(e)
+    return result_dict, error_dict
+
+
+def fetch_prices(symbols, start, end, provider=None):
+    request_list = [(symbol, start, end) for symbol in dict.fromkeys(symbols)]
+    result_dict, error_dict = fetch_requests(request_list, provider)
+    price_data = {request[0]: result_dict[request] for request in request_list if request in result_dict}
+    return price_data, {request[0]: error for request, error in error_dict.items()}
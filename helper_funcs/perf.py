@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import functools
+import resource
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+import streamlit as st
+
+
+metrics_port = os.environ.get('PORTFOLIO_METRICS_PORT')
+debug_panel = os.environ.get('PORTFOLIO_PERF_PANEL', '0') == '1'
+
+_lock = threading.Lock()
+# each streamlit session runs its script on its own thread, so the active rerun is thread local
+_local = threading.local()
+span_stats = {}
+rerun_stats = {}
+_server = None
+
+
+def current_rss():
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # ru_maxrss is the peak rather than the current size, but is the best available off linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def update_stats(stats, key, value):
+    entry = stats.setdefault(key, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+    entry['count'] += 1
+    entry['total'] += value
+    entry['max'] = max(entry['max'], value)
+    entry['last'] = value
+
+
+def begin_rerun(page):
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+    _local.page = page
+    _local.spans = []
+    _local.start = time.perf_counter()
+    _local.start_rss = current_rss()
+
+
+def end_rerun():
+    page = getattr(_local, 'page', None)
+    if page is None:
+        return None
+    wall_time = time.perf_counter() - _local.start
+    rss_delta = current_rss() - _local.start_rss
+    with _lock:
+        update_stats(rerun_stats, (page, 'wall_seconds'), wall_time)
+        update_stats(rerun_stats, (page, 'rss_delta_bytes'), rss_delta)
+    summary = {'page': page,
+               'wall_seconds': wall_time,
+               'rss_delta_bytes': rss_delta,
+               'spans': list(_local.spans)}
+    _local.page = None
+    return summary
+
+
+@contextmanager
+def span(stage, name=None):
+    page = getattr(_local, 'page', None) or 'unknown'
+    name = name or stage
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        with _lock:
+            update_stats(span_stats, (page, stage, name), duration)
+        if getattr(_local, 'page', None):
+            _local.spans.append((stage, name, duration))
+
+
+def timed(stage, name=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    # copies of every entry taken under the lock, readers never see a count from one update and a total from another
+    with _lock:
+        return ({key: dict(stats) for key, stats in span_stats.items()},
+                {key: dict(stats) for key, stats in rerun_stats.items()})
+
+
+def export_json():
+    span_copy, rerun_copy = snapshot()
+    spans = [{'page': page, 'stage': stage, 'span': name, **stats}
+             for (page, stage, name), stats in sorted(span_copy.items())]
+    reruns = [{'page': page, 'metric': metric, **stats}
+              for (page, metric), stats in sorted(rerun_copy.items())]
+    return json.dumps({'pid': os.getpid(), 'rss_bytes': current_rss(), 'spans': spans, 'reruns': reruns})
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def export_prometheus():
+    span_copy, rerun_copy = snapshot()
+    span_rows = [(f'page="{escape_label(page)}",stage="{escape_label(stage)}",span="{escape_label(name)}"', stats)
+                 for (page, stage, name), stats in sorted(span_copy.items())]
+    rerun_rows = {metric: [(f'page="{escape_label(page)}"', stats)
+                           for (page, rerun_metric), stats in sorted(rerun_copy.items())
+                           if rerun_metric == metric]
+                  for metric in ('wall_seconds', 'rss_delta_bytes')}
+    families = [('portfolio_span_seconds', 'Time spent in instrumented page sections.', span_rows),
+                ('portfolio_rerun_wall_seconds', 'Wall time of a full page rerun.', rerun_rows['wall_seconds']),
+                ('portfolio_rerun_rss_delta_bytes', 'Change in resident memory over a page rerun.',
+                 rerun_rows['rss_delta_bytes'])]
+    lines = []
+    for family, help_text, rows in families:
+        lines += [f'# HELP {family} {help_text}',
+                  f'# TYPE {family} summary']
+        for labels, stats in rows:
+            lines.append(f'{family}_count{{{labels}}} {stats["count"]}')
+            lines.append(f'{family}_sum{{{labels}}} {stats["total"]:.6f}')
+        lines += [f'# HELP {family}_max Largest single observation of {family}.',
+                  f'# TYPE {family}_max gauge']
+        for labels, stats in rows:
+            lines.append(f'{family}_max{{{labels}}} {stats["max"]:.6f}')
+    lines += ['# HELP portfolio_process_rss_bytes Resident memory of the serving process.',
+              '# TYPE portfolio_process_rss_bytes gauge',
+              f'portfolio_process_rss_bytes {current_rss()}']
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'):
+            body, content_type = export_json(), 'application/json'
+        elif self.path.startswith('/metrics'):
+            body, content_type = export_prometheus(), 'text/plain; version=0.0.4'
+        else:
+            self.send_error(404)
+            return
+        body = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port):
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        try:
+            _server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+        except OSError as e:
+            # another worker on the host already serves this port
+            print("An error occurred:", e)
+            _server = False
+            return _server
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def render_debug_panel(summary):
+    if summary is None or not (debug_panel or 'perf' in st.query_params):
+        return
+    with st.sidebar.expander('Performance', expanded=False):
+        st.markdown(f'**Rerun:** {summary["wall_seconds"]:.3f}s, '
+                    f'RSS {summary["rss_delta_bytes"] / 1024 / 1024:+.1f} MB')
+        span_df = pd.DataFrame(summary['spans'], columns=['Stage', 'Span', 'Seconds'])
+        st.dataframe(span_df.sort_values(by='Seconds', ascending=False),
+                     hide_index=True,
+                     use_container_width=True)
+        aggregate_df = pd.DataFrame([{'Stage': stage, 'Span': name, 'Count': stats['count'],
+                                      'Mean': stats['total'] / stats['count'], 'Max': stats['max']}
+                                     for (page, stage, name), stats in snapshot()[0].items()
+                                     if page == summary['page']])
+        if not aggregate_df.empty:
+            st.markdown('**Process aggregates**')
+            st.dataframe(aggregate_df, hide_index=True, use_container_width=True)
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import concurrent.futures
+import pandas as pd
+import pyarrow as pa
+import plotly.graph_objects as go
+import helper_funcs.datasets as dsets
+import helper_funcs.figure_cache as figcache
+import helper_funcs.result_cache as rcache
+import helper_funcs.profitability as prof
+import helper_funcs.donations as donations
+
+
+artifact_path = os.environ.get('PORTFOLIO_PRERENDER_DIR', 'data/prerender')
+
+# page: (datasets read by the builder, data files read by the builder, builder returning {name: artifact})
+# pages with tabs that are opened separately register one entry per tab, the code the builder runs is found from
+# its module's imports
+page_dict = {
+    'profitability': (['food_orders'], [], prof.build_artifacts),
+    'donations_global': ([], [donations.geo_split_path], donations.build_global_artifacts),
+    'donations_money': ([], [donations.geo_split_path], donations.build_money_artifacts),
+    'donations_usa': ([], [donations.geo_split_path], donations.build_usa_artifacts),
+    'donations_network': ([], [donations.gifts_path], donations.build_network_artifacts),
+}
+
+
+def artifact_key(page_name):
+    dataset_list, file_list, builder = page_dict[page_name]
+    # the builder module, every helper_funcs module it reaches and this module, which serializes the artifacts,
+    # are part of the key so code changes re-render as well
+    version_list = [dsets.dataset_version(name) for name in dataset_list]
+    version_list += [rcache.file_version(path) for path in file_list]
+    version_list.append(rcache.code_version(builder.__module__))
+    version_list.append(rcache.file_version(__file__))
+    return hashlib.sha256('-'.join(version_list).encode()).hexdigest()[:16]
+
+
+def artifact_dir(page_name, key):
+    return os.path.join(artifact_path, page_name, key)
+
+
+def write_table(table_df, file_path):
+    table = pa.Table.from_pandas(table_df)
+    with pa.OSFile(file_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_table(file_path):
+    with pa.memory_map(file_path, 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def write_artifacts(page_name, key, artifacts):
+    output_dir = artifact_dir(page_name, key)
+    # build into a temporary directory and rename it so readers never see a partial render
+    tmp_dir = f'{output_dir}.{os.getpid()}.tmp'
+    os.makedirs(tmp_dir, exist_ok=True)
+    manifest = {'page': page_name, 'key': key, 'artifacts': {}}
+    values = {}
+    for name, artifact in artifacts.items():
+        if isinstance(artifact, go.Figure):
+            artifact = figcache.figure_json(artifact)
+        if isinstance(artifact, figcache.FigureSpec):
+            with open(os.path.join(tmp_dir, f'{name}.json'), 'w') as file:
+                file.write(artifact)
+            manifest['artifacts'][name] = 'figure'
+        elif isinstance(artifact, pd.DataFrame):
+            write_table(artifact, os.path.join(tmp_dir, f'{name}.arrow'))
+            manifest['artifacts'][name] = 'table'
+        else:
+            values[name] = artifact
+            manifest['artifacts'][name] = 'value'
+    with open(os.path.join(tmp_dir, 'values.json'), 'w') as file:
+        json.dump(values, file)
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as file:
+        json.dump(manifest, file, indent=2)
+    # a forced render replaces the finished one, which is moved aside first as a rename cannot replace a directory
+    # that has files in it
+    old_dir = f'{tmp_dir}.old'
+    try:
+        os.replace(output_dir, old_dir)
+    except FileNotFoundError:
+        pass
+    try:
+        os.replace(tmp_dir, output_dir)
+    except OSError:
+        # another worker finished the same render first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return output_dir
+
+
+def read_artifacts(page_name, key):
+    input_dir = artifact_dir(page_name, key)
+    manifest_path = os.path.join(input_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r') as file:
+        manifest = json.load(file)
+    with open(os.path.join(input_dir, 'values.json'), 'r') as file:
+        values = json.load(file)
+    artifacts = {}
+    for name, kind in manifest['artifacts'].items():
+        if kind == 'figure':
+            with open(os.path.join(input_dir, f'{name}.json'), 'r') as file:
+                artifacts[name] = figcache.FigureSpec(file.read())
+        elif kind == 'table':
+            artifacts[name] = read_table(os.path.join(input_dir, f'{name}.arrow'))
+        else:
+            artifacts[name] = values[name]
+    return artifacts
+
+
+def render_page(page_name, force=False):
+    start_time = time.perf_counter()
+    key = artifact_key(page_name)
+    if not force and os.path.exists(os.path.join(artifact_dir(page_name, key), 'manifest.json')):
+        return page_name, key, 'current', time.perf_counter() - start_time
+    _, _, builder = page_dict[page_name]
+    write_artifacts(page_name, key, builder())
+    return page_name, key, 'rendered', time.perf_counter() - start_time
+
+
+def page_artifacts(page_name):
+    # serve the pre-rendered artifacts, rendering in process only when the inputs have changed
+    key = artifact_key(page_name)
+    artifacts = read_artifacts(page_name, key)
+    if artifacts is None:
+        render_page(page_name)
+        artifacts = read_artifacts(page_name, key)
+    return artifacts
+
+
+def render_all(page_list=None, workers=None, force=False):
+    page_list = page_list or list(page_dict)
+    # materialize shared datasets up front so workers do not race to download them
+    for page_name in page_list:
+        for dataset_name in page_dict[page_name][0]:
+            dsets.materialize_dataset(dataset_name)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_page, page_list, [force] * len(page_list)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pre-render page figures and tables outside Streamlit')
+    parser.add_argument('--pages', nargs='+', choices=list(page_dict), default=list(page_dict))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+    for page_name, key, status, seconds in render_all(args.pages, args.workers, args.force):
+        print(f'{page_name:<20}{key}  {status:<10}{seconds:.2f}s')
@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import helper_funcs.market_data as mktdata
+
+
+price_path = os.environ.get('PORTFOLIO_PRICE_DIR', 'data/prices')
+
+
+def price_file(symbol):
+    return os.path.join(price_path, re.sub(r'[^A-Za-z0-9._-]', '_', symbol) + '.arrow')
+
+
+def merge_ranges(range_list):
+    # half open [start, end) date ranges, overlapping or touching ranges collapse into one
+    merged = []
+    for start, end in sorted(range_list):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(range_list, start, end):
+    gap_list = []
+    for covered_start, covered_end in merge_ranges(range_list):
+        if covered_end <= start:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > start:
+            gap_list.append([start, covered_start])
+        start = max(start, covered_end)
+    if start < end:
+        gap_list.append([start, end])
+    return gap_list
+
+
+def load_symbol(symbol):
+    file_path = price_file(symbol)
+    if not os.path.exists(file_path):
+        return None, []
+    # uncompressed ipc files are read straight out of the mapping
+    table = pa.ipc.open_file(pa.memory_map(file_path, 'r')).read_all()
+    return table, json.loads(table.schema.metadata[b'ranges'])
+
+
+def save_symbol(symbol, price_df, range_list):
+    table = pa.Table.from_pandas(price_df.reset_index(), preserve_index=False)
+    # the date ranges already fetched travel with the prices, including days the market was closed, the pandas
+    # metadata is dropped as rebuilding its column index cost more than the read itself
+    table = table.replace_schema_metadata({b'ranges': json.dumps(range_list).encode()})
+    os.makedirs(price_path, exist_ok=True)
+    file_path = price_file(symbol)
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, file_path)
+
+
+def store_gaps(symbol, fetched_dict, today):
+    table, range_list = load_symbol(symbol)
+    frame_list = [table.to_pandas().set_index('Date')] if table is not None else []
+    price_df = pd.concat(frame_list + list(fetched_dict.values()))
+    price_df = price_df[~price_df.index.duplicated(keep='last')].sort_index()
+    # today's prices are still moving, so today is never recorded as fetched
+    range_list += [[gap_start, min(gap_end, today)] for _, gap_start, gap_end in fetched_dict if gap_start < today]
+    save_symbol(symbol, price_df, merge_ranges(range_list))
+
+
+def read_range(table, start, end):
+    dates = table['Date']
+    mask = pc.and_(pc.greater_equal(dates, pa.scalar(pd.Timestamp(start), dates.type)),
+                   pc.less(dates, pa.scalar(pd.Timestamp(end), dates.type)))
+    return table.filter(mask).to_pandas().set_index('Date')
+
+
+def fill_gaps(symbols, start, end, provider=None):
+    request_list = []
+    for symbol in symbols:
+        _, range_list = load_symbol(symbol)
+        for gap_start, gap_end in missing_ranges(range_list, start, end):
+            # a gap that only spans a weekend holds no prices to fetch
+            if len(pd.bdate_range(gap_start, pd.Timestamp(gap_end) - pd.Timedelta(days=1))):
+                request_list.append((symbol, gap_start, gap_end))
+    result_dict, error_dict = mktdata.fetch_requests(request_list, provider)
+    today = datetime.date.today().isoformat()
+    for symbol in symbols:
+        fetched_dict = {request: price_df for request, price_df in result_dict.items() if request[0] == symbol}
+        if fetched_dict:
+            store_gaps(symbol, fetched_dict, today)
+    return error_dict
+
+
+def read_prices(symbols, start, end, provider=None):
+    # only the date ranges a symbol has never been fetched for go to the provider, the rest is read from disk
+    start = pd.Timestamp(start).strftime('%Y-%m-%d')
+    end = pd.Timestamp(end).strftime('%Y-%m-%d')
+    symbols = list(dict.fromkeys(symbols))
+    error_dict = fill_gaps(symbols, start, end, provider)
+    price_data = {}
+    symbol_errors = {}
+    for symbol in symbols:
+        table, _ = load_symbol(symbol)
+        price_df = read_range(table, start, end) if table is not None else None
+        if price_df is not None and not price_df.empty:
+            price_data[symbol] = price_df
+            continue
+        error_list = [error for request, error in error_dict.items() if request[0] == symbol]
+        symbol_errors[symbol] = '; '.join(error_list) or f'No price data stored for {symbol}'
+    return price_data, symbol_errors
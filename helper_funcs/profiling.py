@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import helper_funcs.datasets as dsets
+import helper_funcs.result_cache as rcache
+
+
+# above this many values a column's quartiles come from a t-digest instead of a full sort
+approximate_rows = 1000000
+quantile_list = [0.25, 0.5, 0.75]
+describe_index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def size_text(num, size_qualifier):
+    # same units as DataFrame.info
+    for unit in ['bytes', 'KB', 'MB', 'GB', 'TB']:
+        if num < 1024.0:
+            return f'{num:3.1f}{size_qualifier} {unit}'
+        num /= 1024.0
+    return f'{num:3.1f}{size_qualifier} PB'
+
+
+def column_summary(values, non_null_count):
+    values = values.to_numpy(dtype=float, na_value=np.nan)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return [0.0] + [np.nan] * 7
+    if len(values) > approximate_rows:
+        quartiles = pc.tdigest(pa.array(values), q=quantile_list).to_pylist()
+    else:
+        quartiles = list(np.quantile(values, quantile_list))
+    std = values.std(ddof=1) if len(values) > 1 else np.nan
+    return [float(non_null_count), values.mean(), std, values.min()] + quartiles + [values.max()]
+
+
+def index_summary(index):
+    # the index line of DataFrame.info
+    if not len(index):
+        return f'{type(index).__name__}: 0 entries'
+    # astype formats the two ends the way the index prints, dates without a time of day print as dates
+    first, last = index[[0, -1]].astype(str)
+    return f'{type(index).__name__}: {len(index)} entries, {first} to {last}'
+
+
+def info_text(input_df, non_null_counts):
+    # the DataFrame.info layout, built from the counts already taken for the rest of the profile
+    headers = [' # ', 'Column', 'Non-Null Count', 'Dtype']
+    rows = [[f' {index}', str(column), f'{count} non-null', str(dtype)]
+            for index, (column, count, dtype) in enumerate(zip(input_df.columns, non_null_counts, input_df.dtypes))]
+    widths = [max([len(header)] + [len(row[index]) for row in rows]) for index, header in enumerate(headers)]
+    dtype_counts = input_df.dtypes.astype(str).value_counts()
+    memory_bytes = input_df.memory_usage(index=True, deep=False).sum()
+    size_qualifier = '+' if (input_df.dtypes == object).any() else ''
+    lines = [str(type(input_df)),
+             index_summary(input_df.index),
+             f'Data columns (total {len(input_df.columns)} columns):',
+             '  '.join(header.ljust(width) for header, width in zip(headers, widths)),
+             '  '.join(('-' * len(header)).ljust(width) for header, width in zip(headers, widths))]
+    lines += ['  '.join(value.ljust(width) for value, width in zip(row, widths)) for row in rows]
+    lines.append('dtypes: ' + ', '.join(f'{dtype}({count:d})' for dtype, count in sorted(dtype_counts.items())))
+    lines.append(f'memory usage: {size_text(memory_bytes, size_qualifier)}')
+    return '\n'.join(lines) + '\n'
+
+
+def profile_frame(input_df):
+    # one pass over the columns feeds the info text, the missing data table and the numeric description
+    row_count = len(input_df)
+    non_null_counts = []
+    describe_dict = {}
+    for column in input_df.columns:
+        values = input_df[column]
+        non_null_count = int(values.count())
+        non_null_counts.append(non_null_count)
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            describe_dict[column] = column_summary(values, non_null_count)
+    null_counts = row_count - np.array(non_null_counts)
+    missing_percent = pd.Series(null_counts / row_count if row_count else np.zeros(len(null_counts)),
+                                index=input_df.columns) * 100
+    missing_data_df = pd.DataFrame({'Percentage Missing': missing_percent}).sort_values(by='Percentage Missing',
+                                                                                        ascending=False)
+    return {'head': input_df.head(),
+            'info': info_text(input_df, non_null_counts),
+            'missing_data': missing_data_df,
+            'describe': pd.DataFrame(describe_dict, index=describe_index)}
+
+
+@rcache.cached('dataset_profile')
+def versioned_profile(dataset_name, version, normalise=None):
+    input_df = dsets.load_dataset(dataset_name)
+    if normalise:
+        input_df = normalise(input_df)
+    return profile_frame(input_df)
+
+
+def dataset_profile(dataset_name, normalise=None):
+    # keyed on the dataset version, so the profile is only rebuilt when the data changes
+    return versioned_profile(dataset_name, dsets.dataset_version(dataset_name), normalise)
@@ -0,0 +1,278 @@
+import re
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import helper_funcs.aggregates as aggs
+import helper_funcs.bootstrap as boot
+import helper_funcs.charts as pltchart
+import helper_funcs.datasets as dsets
+import helper_funcs.figure_cache as figcache
+import helper_funcs.profiling as profiling
+
+discount_pattern = r'(\d+(\.\d+)?)'
+# rows cleaned at a time, bounds the memory held by the raw string columns of large exports
+chunk_rows = 250000
+# per order columns kept beside the aggregate, everything the strategy, scenario and bootstrap figures read
+order_columns = ['order_value', 'commission_fee', 'delivery_fee', 'payment_processing_fee', 'discount_amount',
+                 'profit']
+# commission and discount percentages the scenario grid covers, the same range the simulation inputs accept
+scenario_range = np.arange(0, 101)
+
+
+def normalise_columns(orders_df):
+    orders_df.columns = orders_df.columns.str.lower()
+    orders_df.columns = [re.sub(r'[^\w\s]', '_', col) for col in orders_df.columns]
+    orders_df.columns = [re.sub(r'\s+', '_', col) for col in orders_df.columns]
+    return orders_df
+
+
+def extract_discounts(discount_series):
+    # Offers come from a short list of promotions, so the regex only runs once per distinct value
+    codes, uniques = pd.factorize(discount_series.astype(str))
+    unique_discounts = (pd.Series(uniques).str.extract(discount_pattern, expand=False)[0]
+                        .astype(float).fillna(0.0).to_numpy())
+    return pd.Series(unique_discounts[codes], index=discount_series.index)
+
+
+def parse_order_dates(date_series):
+    # Timestamps are to the minute so they repeat a lot, each distinct string is parsed once
+    codes, uniques = pd.factorize(date_series, use_na_sentinel=False)
+    unique_dates = pd.to_datetime(pd.Series(uniques, dtype=object), format='%d/%m/%Y %H:%M').to_numpy()
+    return pd.Series(unique_dates[codes], index=date_series.index)
+
+
+def clean_orders(orders_df):
+    orders_df['order_date_and_time'] = parse_order_dates(orders_df['order_date_and_time'])
+    orders_df['delivery_date_and_time'] = parse_order_dates(orders_df['delivery_date_and_time'])
+    orders_df['discount_percentage'] = extract_discounts(orders_df['discounts_and_offers'])
+    # Values above 1 are percentages of the order value, anything else is a flat amount
+    orders_df['discount_amount'] = np.where(orders_df['discount_percentage'] > 1,
+                                            orders_df['order_value'] * orders_df['discount_percentage'] / 100,
+                                            orders_df['discount_percentage'])
+    return orders_df
+
+
+def add_profit_columns(orders_df):
+    orders_df['total_costs'] = orders_df['delivery_fee'] + orders_df['payment_processing_fee'] + orders_df['discount_amount']
+    orders_df['revenue'] = orders_df['commission_fee']
+    orders_df['profit'] = orders_df['revenue'] - orders_df['total_costs']
+    return orders_df
+
+
+def clean_order_chunks(chunk_rows=chunk_rows, start_row=0):
+    for orders_df in dsets.load_chunks('food_orders', chunk_rows, start_row=start_row):
+        yield add_profit_columns(clean_orders(normalise_columns(orders_df)))
+
+
+def overall_metrics(aggregate):
+    return pd.DataFrame({
+        'metric': ['Total Orders', 'Total Revenue', 'Total Costs', 'Total Profit'],
+        'count': [aggregate['orders'], aggregate['sums']['revenue'],
+                  aggregate['sums']['total_costs'], aggregate['sums']['profit']]
+    })
+
+
+def strategy_benchmarks(orders_df):
+    orders_df['commission_percentage'] = (orders_df['commission_fee'] / orders_df['order_value']) * 100
+    orders_df['discount_percentage'] = (orders_df['discount_amount'] / orders_df['order_value']) * 100
+    profitable_orders = orders_df[orders_df['profit'] > 0]
+    return {'current_avg_commission_percentage': orders_df['commission_percentage'].mean(),
+            'current_avg_discount_percentage': orders_df['discount_percentage'].mean(),
+            'new_avg_commission_percentage': profitable_orders['commission_percentage'].mean(),
+            'new_avg_discount_percentage': profitable_orders['discount_percentage'].mean()}
+
+
+def simulate_strategy(orders_df, commission_percentage, discount_percentage):
+    orders_df['simulated_commission_fee'] = orders_df['order_value'] * (commission_percentage / 100)
+    orders_df['simulated_discount_amount'] = orders_df['order_value'] * (discount_percentage / 100)
+    # recalculate total costs and profit with simulated values
+    orders_df['simulated_total_costs'] = (orders_df['delivery_fee'] +
+                                          orders_df['payment_processing_fee'] +
+                                          orders_df['simulated_discount_amount'])
+
+    orders_df['simulated_profit'] = (orders_df['simulated_commission_fee'] -
+                                     orders_df['simulated_total_costs'])
+    return orders_df
+
+
+def scenario_inputs(orders_df):
+    order_value = orders_df['order_value'].to_numpy(dtype=float)
+    fixed_costs = (orders_df['delivery_fee'] + orders_df['payment_processing_fee']).to_numpy(dtype=float)
+    # commission minus discount percentage above which each order turns a profit, orders without value never do
+    break_even_spreads = np.full(order_value.shape, np.inf)
+    np.divide(fixed_costs * 100, order_value, out=break_even_spreads, where=order_value > 0)
+    return order_value.sum(), fixed_costs.sum(), np.sort(break_even_spreads)
+
+
+def evaluate_scenarios(inputs, commission_range, discount_range):
+    total_value, total_fixed_costs, break_even_spreads = inputs
+    # simulated profit is order_value * (commission - discount) / 100 minus the fees, so the whole grid
+    # reduces to the column totals and a binary search over the sorted break-even spreads
+    commission_grid, discount_grid = np.meshgrid(commission_range, discount_range)
+    spread_grid = commission_grid - discount_grid
+    profit_grid = total_value * spread_grid / 100 - total_fixed_costs
+    profitable_grid = np.searchsorted(break_even_spreads, spread_grid, side='left') / len(break_even_spreads) * 100
+    best_row, best_column = np.unravel_index(np.argmax(profit_grid), profit_grid.shape)
+    return {'commission': np.asarray(commission_range),
+            'discount': np.asarray(discount_range),
+            'profit': profit_grid,
+            'profitable_percentage': profitable_grid,
+            'break_even_spread': total_fixed_costs * 100 / total_value,
+            'best': {'commission': float(commission_grid[best_row, best_column]),
+                     'discount': float(discount_grid[best_row, best_column]),
+                     'profit': float(profit_grid[best_row, best_column]),
+                     'profitable_percentage': float(profitable_grid[best_row, best_column])}}
+
+
+def scenario_table(scenarios):
+    commission_grid, discount_grid = np.meshgrid(scenarios['commission'], scenarios['discount'])
+    return pd.DataFrame({'commission_percentage': commission_grid.ravel(),
+                         'discount_percentage': discount_grid.ravel(),
+                         'total_profit': scenarios['profit'].ravel(),
+                         'profitable_percentage': scenarios['profitable_percentage'].ravel()})
+
+
+def scenario_heatmap(scenarios):
+    commission_range = scenarios['commission']
+    discount_range = scenarios['discount']
+    fig = go.Figure(go.Heatmap(x=commission_range, y=discount_range,
+                               z=np.round(scenarios['profit'], 2),
+                               customdata=np.round(scenarios['profitable_percentage'], 1),
+                               colorscale='RdBu', zmid=0,
+                               colorbar={'title': 'Profit ($)'},
+                               hovertemplate='Commission: %{x}%<br>Discount: %{y}%<br>Total Profit: $%{z:,.2f}'
+                                             '<br>Profitable Orders: %{customdata}%<extra></extra>'))
+    # the surface only depends on commission - discount, so the break-even contour is a straight line
+    break_even_spread = scenarios['break_even_spread']
+    lowest_discount = max(discount_range.min(), commission_range.min() - break_even_spread)
+    highest_discount = min(discount_range.max(), commission_range.max() - break_even_spread)
+    if lowest_discount <= highest_discount:
+        fig.add_trace(go.Scatter(x=[lowest_discount + break_even_spread, highest_discount + break_even_spread],
+                                 y=[lowest_discount, highest_discount],
+                                 mode='lines', line={'color': 'white', 'dash': 'dash'},
+                                 name='Break-even', hoverinfo='skip'))
+    best = scenarios['best']
+    fig.add_trace(go.Scatter(x=[best['commission']], y=[best['discount']],
+                             mode='markers', marker={'color': 'gold', 'size': 12, 'symbol': 'star'},
+                             name='Most Profitable',
+                             hovertemplate='Commission: %{x}%<br>Discount: %{y}%<extra></extra>'))
+    fig.update_layout(title='Total Profit by Commission and Discount Percentage',
+                      xaxis_title='Commission Percentage',
+                      yaxis_title='Discount Percentage',
+                      legend={'orientation': 'h', 'y': -0.15},
+                      height=600)
+    return fig
+
+
+def profit_bootstrap(orders_df, replicates=2000, seed=42, workers=None):
+    # simulated profit is linear in the order value and the fixed fees, so the resampled means of those two
+    # columns give the bootstrap distribution of every commission and discount pair
+    sample_columns = np.vstack([orders_df['order_value'].to_numpy(dtype=float),
+                                (orders_df['delivery_fee'] + orders_df['payment_processing_fee']).to_numpy(dtype=float)])
+    replicate_means = boot.bootstrap_means(sample_columns, replicates, seed, workers)
+    return pd.DataFrame(replicate_means, columns=['order_value', 'fixed_costs'])
+
+
+def simulated_profit_interval(bootstrap_df, order_count, commission_percentage, discount_percentage,
+                              confidence=0.95):
+    mean_profits = (bootstrap_df['order_value'] * (commission_percentage - discount_percentage) / 100 -
+                    bootstrap_df['fixed_costs'])
+    mean_low, mean_high = boot.confidence_interval(mean_profits, confidence)
+    return {'confidence': confidence,
+            'mean_low': mean_low, 'mean_high': mean_high,
+            'total_low': mean_low * order_count, 'total_high': mean_high * order_count}
+
+
+@figcache.cached_figure('profit_histogram')
+def profit_histogram(orders_df, column, title, xaxis_title, mean_interval=None):
+    fig = pltchart.histogram(orders_df[column], nbins=50,
+                             title=title,
+                             xaxis_title=xaxis_title,
+                             yaxis_title='Number of Orders')
+    if mean_interval:
+        fig.add_vrect(x0=mean_interval['mean_low'], x1=mean_interval['mean_high'],
+                      fillcolor='red', opacity=0.15, line_width=0)
+    return fig
+
+
+def profit_distribution(aggregate, title, xaxis_title):
+    bin_edges, bin_counts = aggs.profit_bins(aggregate)
+    # the aggregate only keeps occupied bins, fill the gaps so the bars sit on a continuous axis
+    first_bin, last_bin = int(min(aggregate['profit_bins'])), int(max(aggregate['profit_bins']))
+    all_counts = np.zeros(last_bin - first_bin + 1, dtype=int)
+    all_counts[(bin_edges / aggregate['bin_width']).astype(int) - first_bin] = bin_counts
+    all_edges = np.arange(first_bin, last_bin + 2) * aggregate['bin_width']
+    return pltchart.binned_histogram(all_edges, all_counts, aggs.profit_mean(aggregate),
+                                     title=title,
+                                     xaxis_title=xaxis_title,
+                                     yaxis_title='Number of Orders')
+
+
+def cost_breakdown_pie(aggregate):
+    cost_columns = ['delivery_fee', 'payment_processing_fee', 'discount_amount']
+    headers = ['name', 'count']
+    costs_breakdown = pd.DataFrame({headers[0]: cost_columns,
+                                    headers[1]: [aggregate['sums'][column] for column in cost_columns]})
+    new_labels = {'delivery_fee': 'Delivery Fee',
+                  'payment_processing_fee': 'Payment Processing Fee',
+                  'discount_amount': 'Discount Amount'}
+    costs_breakdown['name'] = costs_breakdown['name'].map(new_labels)
+    fig = px.pie(costs_breakdown, values=costs_breakdown['count'], names=costs_breakdown['name'],
+                 title='Proportion of Total Costs',
+                 color_discrete_sequence=['#440154', '#2A788E', '#7AD151'],
+                 height=600)
+    return fig
+
+
+def overall_metrics_bar(overall_metrics_df):
+    overall_metrics_df = overall_metrics_df[overall_metrics_df['metric'] != 'Total Orders']
+
+    colors = ['#440154', '#2A788E', '#7AD151']
+    fig = px.bar(overall_metrics_df, x="metric", y="count",
+                 color='metric',
+                 color_discrete_sequence=colors,
+                 height=600)
+
+    fig.update_layout(title_font_size=20, legend_title='Metrics',
+                      title='Total Revenue, Costs and Profit',
+                      xaxis_title='Metric',
+                      yaxis_title='Amount ($)',
+                      template='plotly_white')
+    return fig
+
+
+def build_artifacts():
+    # Everything on the page that does not depend on the simulation inputs
+    orders_profile = profiling.dataset_profile('food_orders', normalise_columns)
+    artifacts = {'raw_head': orders_profile['head'],
+                 'orders_info': orders_profile['info'],
+                 'missing_data': orders_profile['missing_data'].transpose(),
+                 'orders_describe': orders_profile['describe']}
+    # totals and the profit distribution come from the running aggregate, only new orders are cleaned and folded
+    # in, the per order figures read the columns it keeps for every order folded so far
+    aggregate = aggs.refresh_aggregate('food_orders', clean_order_chunks, columns=order_columns)
+    orders_df = aggs.load_columns('food_orders', aggregate)
+    overall_metrics_df = overall_metrics(aggregate)
+    artifacts['clean_head'] = next(clean_order_chunks(chunk_rows=5))
+    artifacts['overall_metrics'] = overall_metrics_df
+    artifacts['profit_histogram'] = profit_distribution(aggregate, 'Profit Distribution per Order', 'Profit ($)')
+    artifacts['cost_breakdown_pie'] = cost_breakdown_pie(aggregate)
+    artifacts['overall_metrics_bar'] = overall_metrics_bar(overall_metrics_df)
+    artifacts['strategy_benchmarks'] = strategy_benchmarks(orders_df)
+    scenarios = evaluate_scenarios(scenario_inputs(orders_df), scenario_range, scenario_range)
+    artifacts['scenario_grid'] = scenario_table(scenarios)
+    artifacts['scenario_heatmap'] = scenario_heatmap(scenarios)
+    artifacts['best_scenario'] = scenarios['best']
+    artifacts['profit_bootstrap'] = profit_bootstrap(orders_df)
+    recommended_interval = simulated_profit_interval(artifacts['profit_bootstrap'], len(orders_df), 30.0, 6.0)
+    orders_df = simulate_strategy(orders_df, 30.0, 6.0)
+    recommended_interval['mean'] = orders_df['simulated_profit'].mean()
+    recommended_interval['total'] = orders_df['simulated_profit'].sum()
+    artifacts['recommended_strategy_interval'] = recommended_interval
+    artifacts['recommended_strategy_histogram'] = profit_histogram(
+        orders_df, 'simulated_profit',
+        'Simulated Profit Distribution per Order Using 30% Commission and 6% discount rates',
+        'Simulated Profit ($)', mean_interval=recommended_interval)
+    artifacts['orders'] = orders_df
+    return artifacts
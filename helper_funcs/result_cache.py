@@ -0,0 +1,256 @@
+import os
+import sys
+import time
+import types
+import pickle
+import sqlite3
+import hashlib
+import functools
+import contextlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+
+cache_path = os.environ.get('PORTFOLIO_CACHE_DIR', 'data/cache')
+cache_max_bytes = int(os.environ.get('PORTFOLIO_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+cache_ttl = float(os.environ.get('PORTFOLIO_CACHE_TTL', 24 * 60 * 60))
+
+
+def update_hash(hasher, value):
+    # content hash of the inputs, so equal data gives equal keys in every process
+    hasher.update(type(value).__name__.encode())
+    if isinstance(value, pd.DataFrame):
+        hasher.update(repr((list(value.columns), [str(dtype) for dtype in value.dtypes])).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, (pd.Series, pd.Index)):
+        hasher.update(repr((value.name, str(value.dtype))).encode())
+        hasher.update(pd.util.hash_pandas_object(value).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        hasher.update(repr((value.shape, str(value.dtype))).encode())
+        hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, nx.Graph):
+        hasher.update(repr(value.is_directed()).encode())
+        hasher.update(repr(sorted((repr(node), repr(sorted(data.items())))
+                                  for node, data in value.nodes(data=True))).encode())
+        hasher.update(repr(sorted((repr(start), repr(end), repr(sorted(data.items())))
+                                  for start, end, data in value.edges(data=True))).encode())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=repr):
+            update_hash(hasher, key)
+            update_hash(hasher, value[key])
+    elif isinstance(value, (list, tuple)):
+        hasher.update(str(len(value)).encode())
+        for entry in value:
+            update_hash(hasher, entry)
+    elif isinstance(value, (set, frozenset)):
+        for entry in sorted(value, key=repr):
+            update_hash(hasher, entry)
+    elif value is None or isinstance(value, (str, bytes, int, float, bool)):
+        hasher.update(repr(value).encode())
+    else:
+        hasher.update(pickle.dumps(value))
+
+
+@functools.lru_cache(maxsize=256)
+def hash_file(file_path, modified, size):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def file_version(file_path):
+    # keyed on mtime and size so an unchanged file is only hashed once per process
+    stat = os.stat(file_path)
+    return hash_file(file_path, stat.st_mtime_ns, stat.st_size)
+
+
+def source_files(module_name):
+    # the module's own file plus every module of this package it reaches through its imports, directly or through
+    # another module, so an edit to a called helper or a module level setting changes the version as well
+    package_name = __name__.split('.')[0]
+    file_dict = {}
+    pending = [module_name]
+    while pending:
+        module = sys.modules.get(pending.pop())
+        if module is None or module.__name__ in file_dict or not getattr(module, '__file__', None):
+            continue
+        file_dict[module.__name__] = module.__file__
+        for value in list(vars(module).values()):
+            dependency = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, '__module__', None)
+            if isinstance(dependency, str) and dependency.split('.')[0] == package_name:
+                pending.append(dependency)
+    return sorted(file_dict.values())
+
+
+def code_version(module_name):
+    # file names rather than paths, so checkouts in different directories share entries
+    version_list = [f'{os.path.basename(file_path)}:{file_version(file_path)}'
+                    for file_path in source_files(module_name)]
+    return hashlib.sha256('-'.join(version_list).encode()).hexdigest()[:12]
+
+
+def hash_inputs(*args, **kwargs):
+    hasher = hashlib.sha256()
+    update_hash(hasher, args)
+    update_hash(hasher, kwargs)
+    return hasher.hexdigest()
+
+
+class MemoryBackend:
+    def __init__(self, max_bytes=cache_max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            payload, expires = entry
+            if expires and expires < time.time():
+                self.remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return payload
+
+    def set(self, key, payload, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            self.entries[key] = (payload, expires)
+            self.total_bytes += len(payload)
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        payload, _ = self.entries.pop(key)
+        self.total_bytes -= len(payload)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+
+class DiskBackend:
+    # one pickle file per entry, with an sqlite index holding size, expiry and last access for LRU eviction,
+    # so every worker process on the host reads and evicts from the same pool
+    def __init__(self, directory=cache_path, max_bytes=cache_max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS entries '
+                         '(key TEXT PRIMARY KEY, size INTEGER, expires REAL, accessed REAL)')
+
+    @contextlib.contextmanager
+    def connect(self):
+        conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def get(self, key):
+        now = time.time()
+        with self.connect() as conn:
+            row = conn.execute('SELECT expires FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] and row[0] < now:
+                self.remove(conn, key)
+                return None
+            conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+        try:
+            with open(self.entry_path(key), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, payload, ttl=None):
+        now = time.time()
+        tmp_path = f'{self.entry_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, self.entry_path(key))
+        with self.connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                         (key, len(payload), now + ttl if ttl else None, now))
+            self.evict(conn, now)
+
+    def evict(self, conn, now):
+        for (key,) in conn.execute('SELECT key FROM entries WHERE expires < ?', (now,)).fetchall():
+            self.remove(conn, key)
+        total_bytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall():
+            if total_bytes <= self.max_bytes:
+                break
+            self.remove(conn, key)
+            total_bytes -= size
+
+    def remove(self, conn, key):
+        conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+        try:
+            os.remove(self.entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        with self.connect() as conn:
+            for (key,) in conn.execute('SELECT key FROM entries').fetchall():
+                self.remove(conn, key)
+
+
+backend_dict = {
+    'disk': DiskBackend,
+    'memory': MemoryBackend,
+}
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = backend_dict[os.environ.get('PORTFOLIO_CACHE_BACKEND', 'disk')]()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def cached(name, ttl=cache_ttl):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            # the source of the defining module and the package modules it uses is part of the key, so a change
+            # to the function, its constants, a helper it calls or a module setting never serves stale results
+            key = f'{name}-{code_version(func.__module__)}-{hash_inputs(*args, **kwargs)[:40]}'
+            payload = backend.get(key)
+            if payload is not None:
+                try:
+                    return pickle.loads(payload)
+                except Exception as e:
+                    print("An error occurred:", e)
+            result = func(*args, **kwargs)
+            backend.set(key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), ttl=ttl)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,108 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import helper_funcs.clustering as clust
+import helper_funcs.datasets as dsets
+import helper_funcs.result_cache as rcache
+
+
+state_path = os.environ.get('PORTFOLIO_STATE_DIR', 'data/state')
+
+
+def new_state():
+    customers = pd.DataFrame({'LastDate': pd.Series(dtype='datetime64[ns]'),
+                              'InvoiceCount': pd.Series(dtype='int64'),
+                              'TotalSpend': pd.Series(dtype=float)},
+                             index=pd.Index([], dtype='int64', name='CustomerID'))
+    return customers, np.array([], dtype=np.uint64)
+
+
+def merge_state(state, partial):
+    # partial is a clustering.rfm_partial, or several of them merged, over the rows added since the last refresh
+    customers, invoice_keys = state
+    batch, (pair_keys, pair_customers) = partial
+    batch = batch.copy()
+    # only invoices not seen in earlier batches add to a customer's count, a binary search against the
+    # sorted keys costs O(new rows log invoices) and never touches the transaction history
+    position = np.minimum(np.searchsorted(invoice_keys, pair_keys), max(len(invoice_keys) - 1, 0))
+    seen = invoice_keys[position] == pair_keys if len(invoice_keys) else np.zeros(len(pair_keys), dtype=bool)
+    batch['InvoiceCount'] = pd.Series(pair_customers[~seen]).value_counts().reindex(batch.index, fill_value=0)
+    known = batch.index.isin(customers.index)
+    updates = batch[known]
+    customers = customers.copy()
+    customers.loc[updates.index, 'LastDate'] = np.maximum(customers.loc[updates.index, 'LastDate'],
+                                                          updates['LastDate'])
+    customers.loc[updates.index, 'InvoiceCount'] += updates['InvoiceCount']
+    customers.loc[updates.index, 'TotalSpend'] += updates['TotalSpend']
+    if not known.all():
+        customers = pd.concat([customers, batch.loc[~known, customers.columns]]).sort_index()
+    return customers, np.union1d(invoice_keys, pair_keys[~seen])
+
+
+def state_file(dataset_name, part):
+    return os.path.join(state_path, f'{dataset_name}-{part}.arrow')
+
+
+def write_table(table, tag, file_path):
+    # the datasets.fold_tag of the rows folded in travels with each file
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'state': json.dumps(tag).encode()})
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, file_path)
+
+
+def read_table(file_path):
+    if not os.path.exists(file_path):
+        return None, None
+    with pa.memory_map(file_path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    metadata = table.schema.metadata or {}
+    return table, json.loads(metadata[b'state']) if b'state' in metadata else None
+
+
+def save_state(state, tag, dataset_name):
+    customers, invoice_keys = state
+    os.makedirs(state_path, exist_ok=True)
+    write_table(pa.table({'InvoiceKey': invoice_keys}), tag, state_file(dataset_name, 'invoices'))
+    write_table(pa.Table.from_pandas(customers, preserve_index=True), tag, state_file(dataset_name, 'customers'))
+
+
+def load_state(dataset_name):
+    customer_table, customer_tag = read_table(state_file(dataset_name, 'customers'))
+    invoice_table, invoice_tag = read_table(state_file(dataset_name, 'invoices'))
+    # a save interrupted between the two files leaves them with different tags
+    if customer_tag is None or customer_tag != invoice_tag:
+        return None, None
+    return (customer_table.to_pandas(), invoice_table['InvoiceKey'].to_numpy()), customer_tag
+
+
+def refresh_state(dataset_name, chunk_rows=clust.rfm_chunk_rows, workers=None):
+    # transaction exports are append only, each refresh reads just the rows added since the last one, split across
+    # worker processes by the partitioned RFM path and merged into the state once
+    state, tag = load_state(dataset_name)
+    code_version = rcache.code_version(__name__)
+    rows = dsets.folded_rows(dataset_name, tag, code_version)
+    if state is not None and rows == dsets.load_table(dataset_name).num_rows:
+        return state[0]
+    if rows == 0:
+        state = new_state()
+    partial = clust.partitioned_partial((dataset_name,), chunk_rows, workers, start_row=rows)
+    if partial is not None:
+        state = merge_state(state, partial)
+    save_state(state, dsets.fold_tag(dataset_name, code_version), dataset_name)
+    return state[0]
+
+
+def state_rfm(customers, reference_date=None):
+    # recency is measured on read, by default from the day after the latest purchase as compute_rfm does
+    if reference_date is None:
+        reference_date = customers['LastDate'].max() + pd.DateOffset(days=1)
+    rfm_df = pd.DataFrame({'Recency': (pd.Timestamp(reference_date) - customers['LastDate']).dt.days,
+                           'Frequency': customers['InvoiceCount'],
+                           'TotalSpend': customers['TotalSpend']})
+    rfm_df.index.name = 'CustomerID'
+    return rfm_df
@@ -0,0 +1,105 @@
+import os
+import re
+import json
+import datetime
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+import helper_funcs.clustering as clust
+
+
+model_path = os.environ.get('PORTFOLIO_MODEL_DIR', 'data/models')
+# a stored model scores customers until it is this old, then the next load refits it
+refit_days = 30
+score_columns = ['R_Score', 'F_Score', 'M_Score']
+# the first fit names its clusters by matching them to these score profiles, later fits inherit the names
+segment_profiles = {'At-risk Customers': [1, 1, 1],
+                    'Regular Customers': [3, 3, 3],
+                    'Loyal Customers': [5, 5, 5],
+                    'Newly Acquired Customers': [5, 1, 1]}
+
+
+def match_centroids(reference, centroids):
+    # order of the new centroids that pairs each with a reference centroid at the least total distance
+    reference = np.asarray(reference, dtype=float)
+    centroids = np.asarray(centroids, dtype=float)
+    cost = ((reference[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+    reference_index, centroid_index = linear_sum_assignment(cost)
+    return centroid_index[np.argsort(reference_index)]
+
+
+def fit_model(rfm_df, n_clusters=4, previous=None):
+    bins = clust.rfm_bins(rfm_df)
+    kmeans_model, _ = clust.fit_clusters(clust.score_rfm(rfm_df, bins)[score_columns], n_clusters)
+    centroids = kmeans_model.cluster_centers_
+    if previous is not None and len(previous['centroids']) == n_clusters:
+        segments = previous['segments']
+        reference = previous['centroids']
+    else:
+        segments = list(segment_profiles)[:n_clusters]
+        segments += [f'Segment {index + 1}' for index in range(len(segments), n_clusters)]
+        reference = [segment_profiles.get(segment, centroids.mean(axis=0)) for segment in segments]
+    centroids = centroids[match_centroids(reference, centroids)]
+    return {'version': previous['version'] + 1 if previous is not None else 1,
+            'fitted_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'features': score_columns,
+            'bins': bins,
+            'centroids': centroids.tolist(),
+            'segments': segments,
+            'customers': int(len(rfm_df))}
+
+
+def model_file(model_name, version):
+    return os.path.join(model_path, f'{model_name}-v{version}.json')
+
+
+def save_model(model, model_name):
+    file_path = model_file(model_name, model['version'])
+    os.makedirs(model_path, exist_ok=True)
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(model, file)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+def model_versions(model_name):
+    if not os.path.isdir(model_path):
+        return []
+    pattern = re.compile(re.escape(model_name) + r'-v(\d+)\.json$')
+    return sorted(int(match.group(1)) for match in map(pattern.match, os.listdir(model_path)) if match)
+
+
+def load_model(model_name, version=None):
+    version_list = model_versions(model_name)
+    if version is None and version_list:
+        version = version_list[-1]
+    if version not in version_list:
+        return None
+    with open(model_file(model_name, version), 'r') as file:
+        return json.load(file)
+
+
+def model_age(model, now=None):
+    now = now or datetime.datetime.now()
+    return now - datetime.datetime.fromisoformat(model['fitted_at'])
+
+
+def current_model(model_name, rfm_df, n_clusters=4, now=None):
+    # refits only when the schedule is due, in between every rerun scores against the stored centroids
+    model = load_model(model_name)
+    if (model is not None and len(model['centroids']) == n_clusters and
+            model_age(model, now) < datetime.timedelta(days=refit_days)):
+        return model
+    model = fit_model(rfm_df, n_clusters, previous=model)
+    save_model(model, model_name)
+    return model
+
+
+def score_customers(model, rfm_df):
+    # batch scoring of new or updated customers, the model is never refitted here
+    scored_df = clust.score_rfm(rfm_df, model['bins'])
+    features = scored_df[model['features']].to_numpy(dtype=float)
+    centroids = np.asarray(model['centroids'], dtype=float)
+    distances = ((features[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+    scored_df['Segment'] = distances.argmin(axis=1)
+    return scored_df
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import helper_funcs.figure_cache as figcache
+
+
+def price_matrix(price_data):
+    # one dates x tickers frame of adjusted closes, aligned on the union of the trading days
+    return pd.DataFrame({stock_name: ticker_data['Adj Close'] for stock_name, ticker_data in price_data.items()})
+
+
+def column_returns(close_matrix):
+    # each ticker's change from its own previous close, so a date missing for one ticker does not blank the next day
+    return (close_matrix / close_matrix.ffill().shift(1) - 1).where(close_matrix.notna())
+
+
+def rolling_closes(close_matrix, moving_average):
+    if not close_matrix.isna().to_numpy().any():
+        return close_matrix.rolling(moving_average).mean()
+    # a ticker missing some days averages over its own last closes rather than leaving a gap the window long, a
+    # window is the running total at a close less the running total moving_average of that ticker's closes earlier
+    values = close_matrix.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    totals = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    # running total after the first k closes of each ticker, indexed [k, ticker]
+    count_totals = np.zeros((len(values) + 1, values.shape[1]))
+    rows, columns = np.nonzero(valid)
+    count_totals[counts[rows, columns], columns] = totals[rows, columns]
+    full = valid & (counts >= moving_average)
+    rows, columns = np.nonzero(full)
+    averages = np.full(values.shape, np.nan)
+    averages[rows, columns] = (totals[rows, columns] -
+                               count_totals[counts[rows, columns] - moving_average, columns]) / moving_average
+    return pd.DataFrame(averages, index=close_matrix.index, columns=close_matrix.columns)
+
+
+def ticker_metrics(close_matrix, market_close, moving_average):
+    daily_return = column_returns(close_matrix)
+    market_return = market_close.pct_change()
+    # covariance with the market over the days each ticker and the market both have a return
+    market_matrix = pd.DataFrame(np.broadcast_to(market_return.reindex(daily_return.index).to_numpy()[:, None],
+                                                 daily_return.shape),
+                                 index=daily_return.index, columns=daily_return.columns)
+    valid = daily_return.notna() & market_matrix.notna()
+    ticker_values = daily_return.where(valid)
+    market_values = market_matrix.where(valid)
+    covariance = (((ticker_values - ticker_values.mean()) * (market_values - market_values.mean())).sum() /
+                  (valid.sum() - 1))
+    return {'close': close_matrix,
+            'daily_return': daily_return,
+            'moving_average': rolling_closes(close_matrix, moving_average),
+            'cumulative_return': (1 + daily_return).cumprod() - 1,
+            # Volatility and Beta against the market
+            'volatility': daily_return.std(),
+            'beta': covariance / market_return.var(),
+            'correlation': close_matrix.corr()}
+
+
+def compare_tickers(price_data, market_data, moving_average):
+    return ticker_metrics(price_matrix(price_data), market_data['Adj Close'], moving_average)
+
+
+@figcache.cached_figure('ticker_lines')
+def ticker_lines(metric_df, line_styles, yaxis_title, legend=True):
+    fig = px.line(height=800)
+    for stock_name in metric_df.columns:
+        colour, line_style = line_styles[stock_name]
+        values = metric_df[stock_name].dropna()
+        fig.add_scatter(x=values.index, y=values, mode='lines',
+                        name=stock_name, line=dict(color=colour, dash=line_style))
+    fig.update_layout(xaxis_title='Date', yaxis_title=yaxis_title)
+    if legend:
+        fig.update_layout(legend=dict(x=0.02, y=0.95))
+    return fig
+
+
+@figcache.cached_figure('volatility_bar')
+def volatility_bar(volatility, colour_map):
+    volatility = volatility.sort_values(ascending=False)
+    stock_names = list(volatility.index)
+    fig = px.bar(x=stock_names, y=volatility.to_numpy(),
+                 text=[f'{entry:.4f}' for entry in volatility],
+                 labels={'x': 'Stock', 'y': 'Volatility (Standard Deviation)'},
+                 color=stock_names,
+                 color_discrete_map=colour_map, height=800)
+    fig.update_traces(textposition='auto')
+    fig.update_layout(bargap=0.5)
+    return fig
+
+
+@figcache.cached_figure('correlation_heatmap')
+def correlation_heatmap(correlation_matrix):
+    fig = px.imshow(
+        correlation_matrix,
+        x=correlation_matrix.columns,
+        y=correlation_matrix.columns,
+        color_continuous_scale='viridis',
+        height=800
+    )
+    annotations = []
+    for i, row in enumerate(correlation_matrix.values):
+        for j, value in enumerate(row):
+            annotations.append(dict(x=correlation_matrix.columns[j], y=correlation_matrix.index[i],
+                                    text=f'{value:.2f}', showarrow=False, font=dict(color='white')))
+
+    # Update layout
+    fig.update_layout(
+        xaxis_title='Ticker',
+        yaxis_title='Ticker',
+        coloraxis_colorbar=dict(title='Correlation'),
+        annotations=annotations
+    )
+    return fig
@@ -0,0 +1,141 @@
+import numpy as np
+
+
+# grid used to detect shared border vertices, about 10cm at European latitudes
+quantize_scale = 1e6
+
+
+def geometry_polygons(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    return geometry['coordinates']
+
+
+def quantize_ring(ring):
+    return [(round(x * quantize_scale), round(y * quantize_scale)) for x, y in ring]
+
+
+def douglas_peucker(points, tolerance):
+    # iterative so long coastlines do not hit the recursion limit, endpoints are always kept
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+
+def ring_arcs(ring, owner_list):
+    # cut a closed ring wherever the set of rings sharing a vertex changes, so shared borders become whole arcs
+    vertices = ring[:-1]
+    count = len(vertices)
+    cuts = [i for i in range(count) if len(owner_list[i]) > 1 and
+            (owner_list[i] != owner_list[i - 1] or owner_list[i] != owner_list[(i + 1) % count])]
+    if not cuts:
+        # a ring touching nothing, split it at its farthest vertex so both halves keep their shape
+        points = np.array(vertices, dtype=float)
+        far = int(np.argmax(np.hypot(points[:, 0] - points[0, 0], points[:, 1] - points[0, 1])))
+        cuts = [0, far] if far else [0]
+    arcs = []
+    for index, start in enumerate(cuts):
+        end = cuts[(index + 1) % len(cuts)]
+        if end > start:
+            arcs.append(vertices[start:end + 1])
+        else:
+            arcs.append(vertices[start:] + vertices[:end + 1])
+    return arcs
+
+
+def build_topology(feature_list):
+    # topojson style: every ring becomes a list of references into one table of shared arcs
+    owner_dict = {}
+    quantized = []
+    ring_id = 0
+    for feature in feature_list:
+        feature_polygons = []
+        for polygon in geometry_polygons(feature['geometry']):
+            polygon_rings = []
+            for ring in polygon:
+                quantized_ring = quantize_ring(ring)
+                for point in quantized_ring[:-1]:
+                    owner_dict.setdefault(point, set()).add(ring_id)
+                polygon_rings.append(quantized_ring)
+                ring_id += 1
+            feature_polygons.append(polygon_rings)
+        quantized.append(feature_polygons)
+
+    arc_list = []
+    arc_index = {}
+    topology = []
+    for feature_polygons in quantized:
+        polygon_refs = []
+        for polygon_rings in feature_polygons:
+            ring_refs = []
+            for ring in polygon_rings:
+                owner_list = [frozenset(owner_dict[point]) for point in ring[:-1]]
+                refs = []
+                for arc in ring_arcs(ring, owner_list):
+                    key = tuple(arc)
+                    if key in arc_index:
+                        refs.append(arc_index[key])
+                    elif key[::-1] in arc_index:
+                        # the neighbour walks the same border the other way round
+                        refs.append(~arc_index[key[::-1]])
+                    else:
+                        arc_index[key] = len(arc_list)
+                        refs.append(len(arc_list))
+                        arc_list.append(np.array(arc, dtype=float) / quantize_scale)
+                ring_refs.append(refs)
+            polygon_refs.append(ring_refs)
+        topology.append(polygon_refs)
+    return arc_list, topology
+
+
+def ring_area(points):
+    return 0.5 * abs(np.dot(points[:-1, 0], points[1:, 1]) - np.dot(points[1:, 0], points[:-1, 1]))
+
+
+def simplify_features(feature_list, arc_list, topology, tolerance, decimals):
+    # each shared arc is simplified once, so neighbouring countries keep identical borders
+    simple_arcs = [douglas_peucker(arc, tolerance) if tolerance else arc for arc in arc_list]
+    simple_feature_list = []
+    for feature, polygon_refs in zip(feature_list, topology):
+        polygons = []
+        for ring_refs in polygon_refs:
+            rings = []
+            for refs in ring_refs:
+                parts = [simple_arcs[ref] if ref >= 0 else simple_arcs[~ref][::-1] for ref in refs]
+                points = np.concatenate([part[:-1] for part in parts] + [parts[0][:1]])
+                points = np.round(points, decimals)
+                # rings smaller than the tolerance are invisible at this level
+                if len(points) < 4 or (tolerance and ring_area(points) < tolerance ** 2):
+                    if not rings:
+                        break
+                    continue
+                rings.append(points.tolist())
+            if rings:
+                polygons.append(rings)
+        if not polygons:
+            # never drop a country entirely, keep its largest polygon at full detail
+            largest = max(geometry_polygons(feature['geometry']),
+                          key=lambda polygon: ring_area(np.array(polygon[0])))
+            polygons = [[np.round(np.array(ring), decimals).tolist() for ring in largest]]
+        geometry = ({'type': 'Polygon', 'coordinates': polygons[0]} if len(polygons) == 1
+                    else {'type': 'MultiPolygon', 'coordinates': polygons})
+        simple_feature_list.append({'type': 'Feature', 'properties': feature['properties'], 'geometry': geometry})
+    return simple_feature_list
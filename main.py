@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
+import helper_funcs.images as images
+import helper_funcs.perf as perf
 
 
 st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded")
+perf.begin_rerun('Portfolio Home')
 
 
 @st.cache_data
@@ -16,14 +19,14 @@ def load_csv_data(data_path):
 header_cont = st.container()
 hdr11, hdr12 = st.columns([1, 6])
 hdr21, hdr22, hdr23 = st.columns([1, 6, 1])
-logo_path = 'img/art_deco.png'
+logo_path = images.image_variant('img/art_deco.png', 'logo')
 st.sidebar.image(logo_path)
 hdr11.image(logo_path)
 hdr22.markdown("<h1 style='text-align: center; color: white;'>Tim D. Clarke Data Science Portfolio</h1>",
                unsafe_allow_html=True)
 hdr22.markdown("---")
 hdr221, hdr222 = hdr22.columns([1, 1])
-hdr221.image('img/cash.jpg')
+hdr221.image(images.image_variant('img/cash.jpg'))
 hdr222.markdown("<h3 style='text-align: center; color: white;'>Profitability Analysis</h3>",
                unsafe_allow_html=True)
 hdr222.markdown("Profitability analysis is the cornerstone of informed decision-making for businesses across industries. "
@@ -53,11 +56,11 @@ hdr223.markdown("Customer segmentation analysis is indispensable for businesses
                "competitive environment.")
 hdr223.markdown("###")
 hdr223.page_link("pages/2 Customer Clustering.py", label="Link to Customer Segmentation Project")
-hdr224.image('img/customers.jpg')
+hdr224.image(images.image_variant('img/customers.jpg'))
 hdr22.markdown("###")
 
 hdr225, hdr226 = hdr22.columns([1, 1])
-hdr225.image('img/stock_market.jpg')
+hdr225.image(images.image_variant('img/stock_market.jpg'))
 hdr226.markdown("<h3 style='text-align: center; color: white;'>Stockmarket Comparison Analysis</h3>",
                unsafe_allow_html=True)
 hdr226.markdown("Stock market comparison analysis plays a pivotal role in providing investors, businesses, and analysts "
@@ -87,11 +90,11 @@ nuanced perspectives on the complex interplay of cultural, political, and social
 international event.''')
 hdr227.markdown("###")
 hdr227.page_link("pages/4 Eurovision Voting Analysis.py", label="Link to Eurovision Voting Analysis Project")
-hdr228.image('img/concert.jpg')
+hdr228.image(images.image_variant('img/concert.jpg'))
 hdr22.markdown("###")
 
 hdr229, hdr230 = hdr22.columns([1, 1])
-hdr229.image('img/oil_eng.jpg')
+hdr229.image(images.image_variant('img/oil_eng.jpg'))
 hdr230.markdown("<h3 style='text-align: center; color: white;'>LLM And RAG Project</h3>",
                unsafe_allow_html=True)
 hdr230.markdown('''Large Language Models (LLMs) and Retrieval-Augmented Generation Systems (RAGs) are revolutionising 
@@ -117,7 +120,6 @@ pace of her philanthropic endeavors by examining available donation information'
 hdr231.markdown("###")
 hdr231.page_link("pages/6 Scott Mackenzie Donations.py", label="Link to Mackenzie Scott Philanthropic Analysis Project")
 hdr231.markdown("###")
-hdr232.image('img/charity.jpg')
-
-
+hdr232.image(images.image_variant('img/charity.jpg'))
 
+perf.render_debug_panel(perf.end_rerun())
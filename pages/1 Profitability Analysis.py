@@ -1,29 +1,28 @@
 import streamlit as st
-import re
-import io
-import pandas as pd
-import plotly.express as px
+import helper_funcs.figure_cache as figcache
+import helper_funcs.images as images
+import helper_funcs.perf as perf
+import helper_funcs.prerender as prerender
+import helper_funcs.profitability as prof
 
 
 st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded")
+perf.begin_rerun('Profitability Analysis')
 
 
 @st.cache_data
-def load_csv_data(data_path):
-    loaded_df = pd.read_csv(data_path)
-    return loaded_df
+def load_artifacts(page_name, artifact_key):
+    return prerender.page_artifacts(page_name)
 
 
-src_data_path = 'https://raw.githubusercontent.com/this-isnt-me/credit-card-fraud-network/main/dataset/food_orders_new_york.csv'
-
 header_cont = st.container()
 main_cont = st.container()
 
 hdr1a, hdr1b = header_cont.columns([1, 6])
 hdr2a, hdr2b, hdr2c = header_cont.columns([1, 4, 1])
-logo_path = 'img/art_deco.png'
+logo_path = images.image_variant('img/art_deco.png', 'logo')
 st.sidebar.image(logo_path)
 hdr1a.image(logo_path)
 hdr2b.markdown("<h1 style='text-align: center; color: white;'>Profitability Analysis Project</h1>",
@@ -37,10 +36,8 @@ expenses like customer discounts and restaurant commission fees.
 By comparing these costs against the revenue generated, primarily derived from order values and commission fees, 
 this analysis seeks to unveil the profitability of the food delivery service on a per-order basis.''')
 
-orders_df = load_csv_data(src_data_path)
-orders_df.columns = orders_df.columns.str.lower()
-orders_df.columns = [re.sub(r'[^\w\s]', '_', col) for col in orders_df.columns]
-orders_df.columns = [re.sub(r'\s+', '_', col) for col in orders_df.columns]
+with perf.span('load', 'prerendered artifacts'):
+    artifacts = load_artifacts('profitability', prerender.artifact_key('profitability'))
 
 main_cont.markdown('---')
 main_cont.markdown("<h2 style='text-align: center; color: white;'>Exploratory Data Analysis</h2>",
@@ -55,7 +52,7 @@ tab1a.markdown("<h3 style='text-align: center; color: white;'>View All Data</h3>
 tab1a.markdown('''
 In the table below we can see the top 5 rows of data contained within the dataset.
 ''')
-tab1a.table(orders_df.head())
+tab1a.table(artifacts['raw_head'])
 
 tab1b.markdown("<h3 style='text-align: center; color: white;'>View Overview of Data</h3>",
                unsafe_allow_html=True)
@@ -70,15 +67,9 @@ a datetime format and all monetary values are in a numeric format for performing
 
 ###
 ''')
-buffer = io.StringIO()
-orders_df.info(buf=buffer)
-orders_df_buffer = buffer.getvalue()
-tab1b.text(orders_df_buffer)
-missing_percent = orders_df.isnull().mean() * 100
-missing_data_df = pd.DataFrame({'Percentage Missing': missing_percent}).sort_values(by='Percentage Missing',
-                                                                                    ascending=False)
+tab1b.text(artifacts['orders_info'])
 tab1b.markdown('###')
-tab1b.table(missing_data_df.transpose())
+tab1b.table(artifacts['missing_data'])
 
 
 tab1c.markdown("<h3 style='text-align: center; color: white;'>View Description of Numerical Data</h3>",
@@ -90,32 +81,11 @@ features in the data making it easier to identify trends, anomalies, or areas of
 
 ###
 ''')
-tab1c.table(orders_df.describe())
+tab1c.table(artifacts['orders_describe'])
 
 
 # DATA CLEANING
-def extract_discount(discount_str):
-    # Using regular expressions to extract discount
-    try:
-        match = re.search(r'(\d+(\.\d+)?)', str(discount_str))
-        if match:
-            return float(match.group(1))
-        else:
-            return 0.0
-    except Exception as e:
-        print("An error occurred:", e)
-        print(discount_str)
-
-
-orders_df['order_date_and_time'] = pd.to_datetime(orders_df['order_date_and_time'], format='%d/%m/%Y %H:%M')
-orders_df['delivery_date_and_time'] = pd.to_datetime(orders_df['delivery_date_and_time'], format='%d/%m/%Y %H:%M')
-orders_df['discount_percentage'] = orders_df['discounts_and_offers'].apply(lambda x: extract_discount(x))
-orders_df['discount_amount'] = orders_df.apply(lambda x: (x['order_value'] * x['discount_percentage'] / 100)
-                                               if x['discount_percentage'] > 1
-                                               else x['discount_percentage'], axis=1)
-
-orders_df['discount_amount'] = orders_df.apply(lambda x: x['discount_amount'] if x['discount_percentage'] <= 1
-                                               else x['order_value'] * x['discount_percentage'] / 100, axis=1)
+orders_df = artifacts['orders']
 
 main_cont.markdown('---')
 main_cont.markdown("<h2 style='text-align: center; color: white;'>Data Cleaning</h2>",
@@ -132,7 +102,7 @@ The data has been through a cleaning process:
 
 ###
 ''')
-mn2b.table(orders_df.head())
+mn2b.table(artifacts['clean_head'])
 
 main_cont.markdown('---')
 # Data Visualisation
@@ -164,22 +134,7 @@ commission fees, leading to a net loss. This observation implies that the existi
 and discount tactics may not be conducive to sustaining profitability.
 ''')
 
-orders_df['total_costs'] = orders_df['delivery_fee'] + orders_df['payment_processing_fee'] + orders_df['discount_amount']
-orders_df['revenue'] = orders_df['commission_fee']
-orders_df['profit'] = orders_df['revenue'] - orders_df['total_costs']
-
-total_orders = int(orders_df.shape[0])
-total_revenue = orders_df['revenue'].sum()
-total_costs = orders_df['total_costs'].sum()
-total_profit = orders_df['profit'].sum()
-
-overall_metrics_df = pd.DataFrame({
-    'metric': ['Total Orders', 'Total Revenue', 'Total Costs', 'Total Profit'],
-    'count': [total_orders, total_revenue, total_costs, total_profit]
-})
-
-
-tab3a.table(overall_metrics_df)
+tab3a.table(artifacts['overall_metrics'])
 
 tab3b.markdown("<h3 style='text-align: center; color: white;'>Plot Current Financial Data</h3>",
                unsafe_allow_html=True)
@@ -198,19 +153,8 @@ prevailing scenario of losses.
 
 ###
 ''')
-fig1 = px.histogram(orders_df, x='profit', nbins=50,
-                    color_discrete_sequence=['skyblue'],
-                    opacity=0.7,
-                    height=600)
-
-fig1.add_vline(x=orders_df['profit'].mean(), line_dash="dash", line_color="red",
-               annotation_text=f'Mean: {orders_df["profit"].mean():.2f}',
-               annotation_position="top right")
-
-fig1.update_layout(title='Profit Distribution per Order',
-                   xaxis_title='Profit ($)',
-                   yaxis_title='Number of Orders')
-tab3b.plotly_chart(fig1, use_container_width=True)
+fig1 = artifacts['profit_histogram']
+figcache.plotly_chart(tab3b, fig1, use_container_width=True)
 tab3b.markdown('###')
 
 tab3b.markdown('''
@@ -221,18 +165,7 @@ indicating that promotional strategies could significantly influence the overall
 ###
 ''')
 
-costs_breakdown = orders_df[['delivery_fee', 'payment_processing_fee', 'discount_amount']].sum()
-headers = ['name', 'count']
-costs_breakdown = pd.DataFrame({headers[0]: costs_breakdown.index, headers[1]: costs_breakdown.values})
-new_labels = {'delivery_fee': 'Delivery Fee',
-              'payment_processing_fee': 'Payment Processing Fee',
-              'discount_amount': 'Discount Amount'}
-costs_breakdown['name'] = costs_breakdown['name'].map(new_labels)
-fig2 = px.pie(costs_breakdown, values=costs_breakdown['count'], names=costs_breakdown['name'],
-              title='Proportion of Total Costs',
-              color_discrete_sequence=['#440154', '#2A788E', '#7AD151'],
-              height=600)
-tab3b.plotly_chart(fig2, use_container_width=True)
+figcache.plotly_chart(tab3b, artifacts['cost_breakdown_pie'], use_container_width=True)
 tab3b.markdown('###')
 
 tab3b.markdown('''
@@ -241,20 +174,7 @@ disparity between revenue and costs, highlighting that costs exceed revenue, res
 
 ###
 ''')
-overall_metrics_df = overall_metrics_df[overall_metrics_df['metric'] != 'Total Orders']
-
-colors = ['#440154', '#2A788E', '#7AD151']
-fig3 = px.bar(overall_metrics_df, x="metric", y="count",
-              color='metric',
-              color_discrete_sequence=colors,
-              height=600)
-
-fig3.update_layout(title_font_size=20, legend_title='Metrics',
-                   title='Total Revenue, Costs and Profit',
-                   xaxis_title='Metric',
-                   yaxis_title='Amount ($)',
-                   template='plotly_white')
-tab3b.plotly_chart(fig3, use_container_width=True)
+figcache.plotly_chart(tab3b, artifacts['overall_metrics_bar'], use_container_width=True)
 
 tab3c.markdown("<h3 style='text-align: center; color: white;'>Extract Current Financial Strategy & Suggest Alternative</h3>",
                unsafe_allow_html=True)
@@ -275,19 +195,12 @@ orders but also have a broad impact across all orders, thereby enhancing overall
 
 ###
 ''')
-orders_df['commission_percentage'] = (orders_df['commission_fee'] / orders_df['order_value']) * 100
-orders_df['discount_percentage'] = (orders_df['discount_amount'] / orders_df['order_value']) * 100
-current_avg_commission_percentage = orders_df['commission_percentage'].mean()
-current_avg_discount_percentage = orders_df['discount_percentage'].mean()
-profitable_orders = orders_df[orders_df['profit'] > 0]
-
-new_avg_commission_percentage = profitable_orders['commission_percentage'].mean()
-new_avg_discount_percentage = profitable_orders['discount_percentage'].mean()
+strategy_benchmarks = artifacts['strategy_benchmarks']
 tab3c.markdown(f'''
-*   Current Average Commission : {current_avg_commission_percentage:.2f}%   
-*   Current Average Discount : {current_avg_discount_percentage:.2f}%   
-*   Profitable Average Commission : {new_avg_commission_percentage:.2f}%   
-*   Profitable Average Discount : {new_avg_discount_percentage:.2f}%
+*   Current Average Commission : {strategy_benchmarks['current_avg_commission_percentage']:.2f}%   
+*   Current Average Discount : {strategy_benchmarks['current_avg_discount_percentage']:.2f}%   
+*   Profitable Average Commission : {strategy_benchmarks['new_avg_commission_percentage']:.2f}%   
+*   Profitable Average Discount : {strategy_benchmarks['new_avg_discount_percentage']:.2f}%
 
 After analyzing profitable orders, we've identified a new set of average values that could signify an optimal balance 
 in commission and discount percentages.
@@ -303,78 +216,70 @@ around 6% may offer prospects for improving profitability.
 ###
 ''')
 
-recommended_commission_percentage = 30.0
-recommended_discount_percentage = 6.0
-
-orders_df['simulated_commission_fee'] = orders_df['order_value'] * (recommended_commission_percentage / 100)
-orders_df['simulated_discount_amount'] = orders_df['order_value'] * (recommended_discount_percentage / 100)
-
-# recalculate total costs and profit with simulated values
-orders_df['simulated_total_costs'] = (orders_df['delivery_fee'] +
-                                      orders_df['payment_processing_fee'] +
-                                      orders_df['simulated_discount_amount'])
-
-orders_df['simulated_profit'] = (orders_df['simulated_commission_fee'] -
-                                 orders_df['simulated_total_costs'])
-
-
-fig4 = px.histogram(orders_df, x='simulated_profit', nbins=50,
-                    color_discrete_sequence=['skyblue'],
-                    opacity=0.7,
-                    height=600)
-
-fig4.add_vline(x=orders_df['simulated_profit'].mean(), line_dash="dash", line_color="red",
-               annotation_text=f'Mean: {orders_df["simulated_profit"].mean():.2f}',
-               annotation_position="top right")
+figcache.plotly_chart(tab3c, artifacts['recommended_strategy_histogram'], use_container_width=True)
+recommended_interval = artifacts['recommended_strategy_interval']
+tab3c.markdown(f'''
+The shaded band around the mean is a {recommended_interval['confidence']:.0%} bootstrap confidence interval, 
+from resampling the orders {len(artifacts['profit_bootstrap']):,} times.
 
-fig4.update_layout(title='Simulated Profit Distribution per Order Using 30% Commission and 6% discount rates',
-                   xaxis_title='Simulated Profit ($)',
-                   yaxis_title='Number of Orders')
-tab3c.plotly_chart(fig4, use_container_width=True)
+*   Mean Simulated Profit : ${recommended_interval['mean']:,.2f} (${recommended_interval['mean_low']:,.2f} to ${recommended_interval['mean_high']:,.2f})   
+*   Total Simulated Profit : ${recommended_interval['total']:,.2f} (${recommended_interval['total_low']:,.2f} to ${recommended_interval['total_high']:,.2f})
+''')
 
 tab3d.markdown("<h3 style='text-align: center; color: white;'>Model Different Financial Strategies</h3>",
                unsafe_allow_html=True)
 tab3d.markdown('''
 Here it is possible to model different scenarios by selecting different commission rates and discount rates.
 
+The heatmap below evaluates every combination of commission and discount percentage at once. Because each order's 
+simulated profit is its value multiplied by the difference between the commission and discount rates, less the fixed 
+fees, the total profit only depends on that difference. The dashed line marks where the platform breaks even and 
+hovering over a scenario shows the share of orders that would turn a profit.
+
+###
+''')
+best_scenario = artifacts['best_scenario']
+figcache.plotly_chart(tab3d, artifacts['scenario_heatmap'], use_container_width=True)
+tab3d.markdown(f'''
+*   Most Profitable Scenario : {best_scenario['commission']:.0f}% Commission and {best_scenario['discount']:.0f}% Discount   
+*   Total Profit : ${best_scenario['profit']:,.2f}   
+*   Profitable Orders : {best_scenario['profitable_percentage']:.1f}%
+
 ###
 ''')
 tab3d1, tab3d2, tab3d3, tab3d5 = tab3d.columns([1, 2, 2, 1])
 tab3d12, tab3d22, tab3d32 = tab3d.columns([1, 4, 1])
 com_number = tab3d2.number_input('Choose a Commission Percentage', min_value=0, max_value=100)
 disc_number = tab3d3.number_input('Choose a Discount Percentage', min_value=0, max_value=100)
+scenario_grid = artifacts['scenario_grid']
+chosen_scenario = scenario_grid[(scenario_grid['commission_percentage'] == com_number) &
+                                (scenario_grid['discount_percentage'] == disc_number)].iloc[0]
+tab3d22.markdown(f"<p style='text-align: center;'>Total Profit: ${chosen_scenario['total_profit']:,.2f} - "
+                 f"Profitable Orders: {chosen_scenario['profitable_percentage']:.1f}%</p>",
+                 unsafe_allow_html=True)
 if tab3d22.button("Run Simulation", use_container_width=True):
     tab3d.markdown('###')
     tab3d.markdown(f"<h5 style='text-align: center; color: white;'>Simulated Profit Distribution - {com_number}% Commission and {disc_number}% discount</h5>",
                    unsafe_allow_html=True)
     tab3d.markdown('###')
-    orders_df['simulated_commission_fee'] = orders_df['order_value'] * (com_number / 100)
-    orders_df['simulated_discount_amount'] = orders_df['order_value'] * (disc_number / 100)
-    # recalculate total costs and profit with simulated values
-    orders_df['simulated_total_costs'] = (orders_df['delivery_fee'] +
-                                          orders_df['payment_processing_fee'] +
-                                          orders_df['simulated_discount_amount'])
-
-    orders_df['simulated_profit'] = (orders_df['simulated_commission_fee'] -
-                                     orders_df['simulated_total_costs'])
-
-    fig5 = px.histogram(orders_df, x='simulated_profit', nbins=50,
-                        color_discrete_sequence=['skyblue'],
-                        opacity=0.7,
-                        height=600)
-
-    fig5.add_vline(x=orders_df['simulated_profit'].mean(), line_dash="dash", line_color="red",
-                   annotation_text=f'Mean: {orders_df["simulated_profit"].mean():.2f}',
-                   annotation_position="top right")
-
-    fig5.update_layout(title=f'Simulated Profit Distribution per Order Using {com_number}% Commission and {disc_number}% discount rates',
-                       xaxis_title='Simulated Profit ($)',
-                       yaxis_title='Number of Orders')
-    tab3d.plotly_chart(fig5, use_container_width=True)
+    with perf.span('figure', 'simulated strategy histogram'):
+        orders_df = prof.simulate_strategy(orders_df, com_number, disc_number)
+        simulated_interval = prof.simulated_profit_interval(artifacts['profit_bootstrap'], len(orders_df),
+                                                            com_number, disc_number)
+        fig5 = prof.profit_histogram(orders_df, 'simulated_profit',
+                                     f'Simulated Profit Distribution per Order Using {com_number}% Commission and {disc_number}% discount rates',
+                                     'Simulated Profit ($)', mean_interval=simulated_interval)
+    figcache.plotly_chart(tab3d, fig5, use_container_width=True)
+    tab3d.markdown(f'''
+*   Mean Simulated Profit : ${orders_df['simulated_profit'].mean():,.2f} (${simulated_interval['mean_low']:,.2f} to ${simulated_interval['mean_high']:,.2f})   
+*   Total Simulated Profit : ${orders_df['simulated_profit'].sum():,.2f} (${simulated_interval['total_low']:,.2f} to ${simulated_interval['total_high']:,.2f})
+
+Ranges are {simulated_interval['confidence']:.0%} bootstrap confidence intervals.
+''')
     tab3d.markdown('###')
     tab3d.markdown(f"<h5 style='text-align: center; color: white;'>Current Profit Distribution</h5>",
                    unsafe_allow_html=True)
     tab3d.markdown('###')
-    tab3d.plotly_chart(fig1, use_container_width=True)
-
+    figcache.plotly_chart(tab3d, fig1, use_container_width=True)
 
+perf.render_debug_panel(perf.end_rerun())
@@ -1,28 +1,30 @@
-import pandas as pd
 import streamlit as st
-from sklearn.cluster import KMeans
-import plotly.express as px
-import io
+import helper_funcs.datasets as dsets
+import helper_funcs.clustering as clust
+import helper_funcs.figure_cache as figcache
+import helper_funcs.images as images
+import helper_funcs.perf as perf
+import helper_funcs.profiling as profiling
+import helper_funcs.rfm_state as rfmstate
+import helper_funcs.segments as segs
 
 st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded")
+perf.begin_rerun('Customer Clustering')
 
 
 @st.cache_data
-def load_csv_data(data_path):
-    loaded_df = pd.read_csv(data_path)
-    return loaded_df
+def load_profile(dataset_name, version):
+    return profiling.dataset_profile(dataset_name)
 
 
-src_data_path = 'https://raw.githubusercontent.com/this-isnt-me/credit-card-fraud-network/main/dataset/online_retail.csv'
-
 header_cont = st.container()
 main_cont = st.container()
 
 hdr1a, hdr1b = header_cont.columns([1, 6])
 hdr2a, hdr2b, hdr2c = header_cont.columns([1, 4, 1])
-logo_path = 'img/art_deco.png'
+logo_path = images.image_variant('img/art_deco.png', 'logo')
 hdr1a.image(logo_path)
 st.sidebar.image(logo_path)
 hdr2b.markdown(
@@ -45,7 +47,8 @@ with K-Means clustering, a data-driven method for grouping customers, this noteb
 target different customer segments effectively. RFM analysis helps in distinguishing the best customers and improving 
 the spending habits of low-scoring customers, ultimately aiding in customer retention and revenue growth.''')
 
-transaction_data = load_csv_data(src_data_path)
+with perf.span('transform', 'data profile'):
+    transaction_profile = load_profile('online_retail', dsets.dataset_version('online_retail'))
 
 
 # EXPLORATORY DATA ANALYSIS
@@ -64,7 +67,7 @@ In the table below we can see the top 5 rows of data contained within the datase
 
 ###
 ''')
-tab1a.table(transaction_data.head())
+tab1a.table(transaction_profile['head'])
 
 tab1b.markdown("<h3 style='text-align: center; color: white;'>View Overview of Data</h3>",
                unsafe_allow_html=True)
@@ -75,11 +78,7 @@ and "CustomerID" columns.
 
 ###
 ''')
-buffer = io.StringIO()
-transaction_data.info(buf=buffer)
-transaction_data_buffer = buffer.getvalue()
-
-tab1b.text(transaction_data_buffer)
+tab1b.text(transaction_profile['info'])
 
 
 tab1c.markdown("<h3 style='text-align: center; color: white;'>View Description of Numerical Data</h3>",
@@ -95,7 +94,7 @@ rows where the Quantity and UnitPrice columns have negative values.
 
 ###
 ''')
-tab1c.table(transaction_data.describe())
+tab1c.table(transaction_profile['describe'])
 
 tab1d.markdown("<h3 style='text-align: center; color: white;'>Identify Missing Data</h3>",
                unsafe_allow_html=True)
@@ -106,27 +105,12 @@ tab1d.markdown('''
 
 ###
 ''')
-missing_percent = transaction_data.isnull().mean() * 100
-missing_data_df = pd.DataFrame({'Percentage Missing': missing_percent}).sort_values(by='Percentage Missing',
-                                                                                    ascending=False)
+missing_data_df = transaction_profile['missing_data']
 tab1d.table(missing_data_df.transpose())
 tab1d.markdown('###')
-missing_data_df = missing_data_df.reset_index()
-fig1 = px.bar(missing_data_df,
-              x='index', y='Percentage Missing',
-              color='Percentage Missing', color_continuous_scale='Viridis')
-fig1.update_layout(title='Percentage of Missing Data in Each Column',
-                   xaxis_title='Column Name',
-                   yaxis_title='Percentage Missing',
-                   coloraxis_colorbar_title='Perc',
-                   legend_title='Value')
-tab1d.plotly_chart(fig1, use_container_width=True)
-
-
-transaction_data = transaction_data.dropna(subset=['CustomerID'])
-transaction_data = transaction_data[(transaction_data['Quantity'] > 0) &
-                                    (transaction_data['UnitPrice'] > 0)]
-transaction_data['CustomerID'] = transaction_data['CustomerID'].astype(int)
+with perf.span('figure', 'missing data bar'):
+    fig1 = clust.missing_data_bar(missing_data_df)
+figcache.plotly_chart(tab1d, fig1, use_container_width=True)
 
 
 # DATA CLEANING
@@ -158,16 +142,9 @@ many days since spend, how many orders placed and total spend.
 ###
 ''')
 
-data_date = pd.Timestamp(max(transaction_data['InvoiceDate'])) + pd.DateOffset(days=1)
-
-transaction_data['TotalSpend'] = transaction_data['Quantity'] * transaction_data['UnitPrice']
-rfm_df = transaction_data.groupby('CustomerID').agg({
-    'InvoiceDate': lambda x: (data_date - pd.Timestamp(x.max())).days,
-    'InvoiceNo': 'nunique',
-    'TotalSpend': 'sum'
-})
-rfm_df = rfm_df.rename(columns={'InvoiceDate': 'Recency',
-                                'InvoiceNo': 'Frequency'})
+with perf.span('transform', 'rfm table'):
+    # the stored per customer state only reads transactions appended since the last refresh
+    rfm_df = rfmstate.state_rfm(rfmstate.refresh_state('online_retail'))
 tab2a.markdown('''In the Table Below we can see the number of days since most recent order (Recency), number of orders 
 (Frequency) and amount of money spent by customer(TotalSpend).   
 
@@ -187,24 +164,8 @@ get a score of 1.
 
 ###
 ''')
-recency_bins = [rfm_df['Recency'].min()-1, 20, 50, 150, 250,
-                rfm_df['Recency'].max()]
-frequency_bins = [rfm_df['Frequency'].min() - 1, 2, 3, 10, 100,
-                  rfm_df['Frequency'].max()]
-spend_bins = [rfm_df['TotalSpend'].min() - 3, 300, 600, 2000, 5000,
-              rfm_df['TotalSpend'].max()]
-# Calculate Recency score based on custom bins
-rfm_df['R_Score'] = pd.cut(rfm_df['Recency'], bins=recency_bins,
-                           labels=range(1, 6), include_lowest=True)
-
-# Reverse the Recency scores so that higher values indicate more recent purchases
-rfm_df['R_Score'] = 5 - rfm_df['R_Score'].astype(int) + 1
-
-# Calculate Frequency and Monetary scores based on custom bins
-rfm_df['F_Score'] = pd.cut(rfm_df['Frequency'], bins=frequency_bins,
-                           labels=range(1, 6), include_lowest=True).astype(int)
-rfm_df['M_Score'] = pd.cut(rfm_df['TotalSpend'], bins=spend_bins,
-                           labels=range(1, 6), include_lowest=True).astype(int)
+with perf.span('transform', 'rfm scores'):
+    rfm_df = clust.score_rfm(rfm_df)
 tab2b.table(rfm_df.head())
 
 
@@ -221,30 +182,29 @@ We can see in the chart below that the elbow sits about 3 or 4, we will plump fo
 ''')
 
 X = rfm_df[['R_Score', 'F_Score', 'M_Score']]
-inertia = []
-for k in range(2, 16):
-    kmeans = KMeans(n_clusters=k, n_init=10, random_state=42)
-    kmeans.fit(X)
-    inertia.append(kmeans.inertia_)
-inertia_data = {'Number of Clusters (k)': range(2, 16), 'Inertia': inertia}
-inertia_df = pd.DataFrame(inertia_data)
-fig2 = px.line(inertia_df, x='Number of Clusters (k)', y='Inertia', markers=True)
-
-fig2.update_layout(
-    title='Elbow Curve for K-means Clustering',
-    xaxis_title='Number of Clusters (k)',
-    yaxis_title='Inertia',
-    showlegend=False,
-    template='plotly_white'
-)
-tab2c.plotly_chart(fig2, use_container_width=True)
+show_scores = tab2c.checkbox('Show silhouette and Davies-Bouldin scores')
+with perf.span('model', 'elbow sweep'):
+    inertia_df = clust.k_sweep(X, with_scores=show_scores)
+with perf.span('figure', 'elbow curve'):
+    fig2 = clust.elbow_curve(inertia_df[['Number of Clusters (k)', 'Inertia']])
+figcache.plotly_chart(tab2c, fig2, use_container_width=True)
+if show_scores:
+    tab2c.markdown(f'''
+Scores are calculated on a random sample of up to {clust.score_sample_size:,} customers. A higher silhouette score 
+and a lower Davies-Bouldin score both indicate better separated clusters.
+''')
+    tab2c.dataframe(inertia_df, hide_index=True, use_container_width=True)
 
 
 # KNN Clustering
-kmeans_model = KMeans(n_clusters=4, n_init=10, random_state=42)
-rfm_df['Cluster'] = kmeans_model.fit_predict(X)
-rfm_df['Cluster'] += 1
-rfm_df['Cluster'] = 'Cluster ' + rfm_df['Cluster'].astype(str)
+with perf.span('model', 'kmeans fit'):
+    # the stored model keeps cluster numbers and segment names stable, it is only refitted on its schedule
+    segment_model = segs.current_model('online_retail', rfm_df, n_clusters=4)
+    rfm_df['Cluster'] = segs.score_customers(segment_model, rfm_df)['Segment']
+    rfm_df['Cluster'] += 1
+    rfm_df['Cluster'] = 'Cluster ' + rfm_df['Cluster'].astype(str)
+tab2c.caption(f'Cluster model version {segment_model["version"]}, fitted {segment_model["fitted_at"]} on '
+              f'{segment_model["customers"]:,} customers.')
 
 
 # DATA VISUALISATION
@@ -284,31 +244,10 @@ subsequent purchases to enhance brand familiarity and foster repeat business.
 ###
 ''')
 
-cluster_summary = rfm_df.groupby('Cluster').agg({
-    'R_Score': 'mean',
-    'F_Score': 'mean',
-    'M_Score': 'mean'
-}).reset_index()
-cluster_melted_df = cluster_summary.melt(id_vars='Cluster',
-                                         var_name='Metric',
-                                         value_name='Score')
-
-colors = ['#440154', '#2A788E', '#7AD151', '#FDE725']
-fig3 = px.bar(cluster_melted_df, x="Cluster", y="Score",
-              color='Metric', barmode='group',
-              color_discrete_sequence=colors,
-              height=800)
-
-fig3.update_layout(title_font_size=20, legend_title='Clusters',
-                   title='Average RFM Scores for Each Cluster',
-                   xaxis_title='Cluster Number',
-                   yaxis_title='Average Score',
-                   template='plotly_white')
-new = {'R_Score': 'Avg Recency',
-       'F_Score': 'Avg Frequency',
-       'M_Score': 'Avg Monetary'}
-fig3.for_each_trace(lambda t: t.update(name=new[t.name]))
-tab3a.plotly_chart(fig3, use_container_width=True)
+with perf.span('figure', 'cluster scores bar'):
+    colors = ['#440154', '#2A788E', '#7AD151', '#FDE725']
+    fig3 = clust.cluster_scores_bar(rfm_df, colors)
+figcache.plotly_chart(tab3a, fig3, use_container_width=True)
 
 
 tab3b.markdown("<h3 style='text-align: center; color: white;'>Customer Split by Cluster</h3>",
@@ -319,18 +258,9 @@ We can see, looking at the chart below, that there is a relatively even split be
 ###
 ''')
 
-per_cluster = rfm_df['Cluster'].value_counts()
-total = per_cluster.sum()
-percentage_df = (per_cluster / total) * 100
-labels = ['Loyal Customers', 'Regular Customers', 'At-risk Customers', 'Newly Acquired Customers']
-
-# Create a pie chart
-fig4 = px.pie(names=labels,
-              values=percentage_df,
-              title='Percentage of Customers in Each Cluster',
-              color_discrete_sequence=colors,
-              height=800)
-fig4.update_traces(textposition='inside', textinfo='percent+label')
-
+with perf.span('figure', 'cluster split pie'):
+    labels = segment_model['segments']
+    fig4 = clust.cluster_split_pie(rfm_df, labels, colors)
+figcache.plotly_chart(tab3b, fig4, use_container_width=True)
 
-tab3b.plotly_chart(fig4, use_container_width=True)
+perf.render_debug_panel(perf.end_rerun())
@@ -1,8 +1,10 @@
-import pandas as pd
 import streamlit as st
-import plotly.express as px
-import yfinance as yf
 import datetime
+import helper_funcs.figure_cache as figcache
+import helper_funcs.images as images
+import helper_funcs.perf as perf
+import helper_funcs.price_store as pricestore
+import helper_funcs.stocks as stocks
 
 
 def convert_date_format(date_str):
@@ -36,22 +38,15 @@ stock_dict = {
 st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded")
+perf.begin_rerun('Stockmarket Comparison Analysis')
 
 
-@st.cache_data
-def load_csv_data(data_path):
-    loaded_df = pd.read_csv(data_path)
-    return loaded_df
-
-
-src_data_path = 'https://raw.githubusercontent.com/this-isnt-me/credit-card-fraud-network/main/dataset/online_retail.csv'
-
 header_cont = st.container()
 main_cont = st.container()
 
 hdr1a, hdr1b = header_cont.columns([1, 6])
 hdr2a, hdr2b, hdr2c = header_cont.columns([1, 4, 1])
-logo_path = 'img/art_deco.png'
+logo_path = images.image_variant('img/art_deco.png', 'logo')
 hdr1a.image(logo_path)
 st.sidebar.image(logo_path)
 hdr2b.markdown(
@@ -90,7 +85,6 @@ main_cont.markdown('---')
 mn3a, mn3b, mn3c = main_cont.columns([1, 10, 1])
 if mn2b.button("Run Analysis", use_container_width=True) and len(stock_lists) > 1 and start_date and end_date:
     stock_string = ', '.join(stock_lists[:-1]) + ' & ' + stock_lists[-1]
-    stock_lists_code = [stock_dict[entry] for entry in stock_lists]
     con_start_date = convert_date_format(start_date)
     con_end_date = convert_date_format(end_date)
     chart1_title = f'''Daily Returns for {stock_string} between {con_start_date} and {con_end_date}'''
@@ -99,73 +93,34 @@ if mn2b.button("Run Analysis", use_container_width=True) and len(stock_lists) >
     chart3_title = f'''Closing Prices for {stock_string} between {con_start_date} and {con_end_date}'''
     chart4_title = f'''Volatility Comparison for {stock_string} between {con_start_date} and {con_end_date}'''
     chart5_title = f'''Correlation Matrix of Closing Prices for {stock_string} between {con_start_date} and {con_end_date}'''
-    fig1 = px.line(height=800)
-    fig15 = px.line(height=800)
-    fig2 = px.line(height=800)
-    fig3 = px.line(height=800)
-    volatility_list = []
-    colour_map = {}
-    beta_list = []
-    market_data = yf.download('^GSPC', start=start_date, end=end_date)
-    market_data['Daily_Return'] = market_data['Adj Close'].pct_change()
-    var_market = market_data['Daily_Return'].var()
-    ticker_df = pd.DataFrame(columns=['Date', 'Ticker', 'Close'])
-    for index, entry in enumerate(stock_lists_code):
-        (ticker_code, colour, line_style) = entry
-        stock_name = stock_lists[index]
-        colour_map[stock_name] = colour
-        ticker_data = yf.download(ticker_code, start=start_date, end=end_date)
-        # Calculate Daily Return
-        sub_df = pd.DataFrame({'Date': list(ticker_data.index),
-                               'Close': list(ticker_data['Adj Close'])})
-        sub_df['Ticker'] = stock_lists[index]
-        pd.set_option('expand_frame_repr', False)
-        ticker_df = pd.concat([ticker_df, sub_df], ignore_index=True, axis=0)
-        ticker_data['Daily_Return'] = ticker_data['Adj Close'].pct_change()
-        fig1.add_scatter(x=ticker_data.index, y=ticker_data['Daily_Return'], mode='lines', name=stock_lists[index],
-                         line=dict(color=colour, dash=line_style))
-        # Calculate Moving Average
-        ticker_data['moving_average'] = ticker_data['Adj Close'].rolling(moving_average).mean()
-        fig15.add_scatter(x=ticker_data.index, y=ticker_data['moving_average'], mode='lines', name=stock_lists[index],
-                          line=dict(color=colour, dash=line_style))
-        # Calculate Daily Return
-        cumulative_return = (1 + ticker_data['Daily_Return']).cumprod() - 1
-        fig2.add_scatter(x=ticker_data.index, y=cumulative_return, mode='lines', name=stock_lists[index],
-                         line=dict(color=colour, dash=line_style))
-        # Closing Price
-        fig3.add_scatter(x=ticker_data.index, y=ticker_data['Adj Close'], mode='lines', name=stock_lists[index],
-                         line=dict(color=colour, dash=line_style))
-
-        # Calculate Volatility
-        volatility_list.append(ticker_data['Daily_Return'].std())
-        # Calculate Beta
-        cov_ticker = ticker_data['Daily_Return'].cov(market_data['Daily_Return'])
-        beta_ticker = cov_ticker / var_market
-        beta_list.append((stock_name, beta_ticker))
-    fig1.update_layout(xaxis_title='Date', yaxis_title='Daily Return',
-                       legend=dict(x=0.02, y=0.95))
-    fig15.update_layout(xaxis_title='Date', yaxis_title=f'Closing Price {moving_average} Day Moving Average')
-    fig2.update_layout(xaxis_title='Date', yaxis_title='Cumulative Daily Return',
-                       legend=dict(x=0.02, y=0.95))
-    fig3.update_layout(xaxis_title='Date', yaxis_title='Closing Price',
-                       legend=dict(x=0.02, y=0.95))
-    text_list = []
-    zipped_list = sorted(zip(stock_lists, volatility_list),
-                         key=lambda x: x[1],
-                         reverse=True)
-    stock_lists, volatility_list = zip(*zipped_list)
-    for index, entry in enumerate(volatility_list):
-        text_list.append(f'{entry:.4f}')
-    fig4 = px.bar(x=stock_lists, y=volatility_list,
-                  text=text_list,
-                  labels={'x': 'Stock', 'y': 'Volatility (Standard Deviation)'},
-                  color=stock_lists,
-                  color_discrete_map=colour_map, height=800)
-    fig4.update_traces(textposition='auto')
-    fig4.update_layout(bargap=0.5)
+    with perf.span('load', 'market data'):
+        symbol_data, error_dict = pricestore.read_prices(['^GSPC'] + [stock_dict[entry][0] for entry in stock_lists],
+                                                           start_date, end_date)
+    for ticker_code, error in error_dict.items():
+        mn3b.warning(f'Prices for {ticker_code} could not be loaded: {error}')
+    # stocks whose prices failed to load are left out of the comparison
+    stock_lists = [stock_name for stock_name in stock_lists if stock_dict[stock_name][0] in symbol_data]
+    if '^GSPC' not in symbol_data or len(stock_lists) < 2:
+        mn3b.error('Not enough price data was loaded to run the analysis.')
+        perf.render_debug_panel(perf.end_rerun())
+        st.stop()
+    market_data = symbol_data['^GSPC']
+    price_data = {stock_name: symbol_data[stock_dict[stock_name][0]] for stock_name in stock_lists}
+    line_styles = {stock_name: stock_dict[stock_name][1:] for stock_name in stock_lists}
+    colour_map = {stock_name: stock_dict[stock_name][1] for stock_name in stock_lists}
+    with perf.span('transform', 'ticker metrics'):
+        metrics = stocks.compare_tickers(price_data, market_data, moving_average)
+    with perf.span('figure', 'price charts'):
+        fig1 = stocks.ticker_lines(metrics['daily_return'], line_styles, 'Daily Return')
+        fig15 = stocks.ticker_lines(metrics['moving_average'], line_styles,
+                                    f'Closing Price {moving_average} Day Moving Average', legend=False)
+        fig2 = stocks.ticker_lines(metrics['cumulative_return'], line_styles, 'Cumulative Daily Return')
+        fig3 = stocks.ticker_lines(metrics['close'], line_styles, 'Closing Price')
+        fig4 = stocks.volatility_bar(metrics['volatility'], colour_map)
+        beta_list = list(metrics['beta'].items())
 
     mn3b.markdown(f'#### {chart1_title}')
-    mn3b.plotly_chart(fig1, use_container_width=True)
+    figcache.plotly_chart(mn3b, fig1, use_container_width=True)
     mn3b.markdown(f'''The above charts displays the daily returns for {stock_string} between {con_start_date}' 
     and {con_end_date}. This information will provide the foundation for a range of financial 
     assessments and comparisons, including the calculation of returns, volatility, and additional metrics aimed at 
@@ -175,7 +130,7 @@ if mn2b.button("Run Analysis", use_container_width=True) and len(stock_lists) >
     mn3b.markdown('###')
 
     mn3b.markdown(f'#### {chart2_title}')
-    mn3b.plotly_chart(fig2, use_container_width=True)
+    figcache.plotly_chart(mn3b, fig2, use_container_width=True)
     mn3b.markdown(f'''In this analysis, we initially calculated the cumulative returns 
     for {stock_string} between {con_start_date}' and {con_end_date}. 
     Cumulative returns indicate the overall percentage change in the stock's value across the defined timeframe, 
@@ -187,11 +142,11 @@ if mn2b.button("Run Analysis", use_container_width=True) and len(stock_lists) >
     mn3b.markdown('###')
 
     mn3b.markdown(f'#### {chart3_title}')
-    mn3b.plotly_chart(fig3, use_container_width=True)
+    figcache.plotly_chart(mn3b, fig3, use_container_width=True)
     mn3b.markdown('###')
 
     mn3b.markdown(f'#### {chart15_title}')
-    mn3b.plotly_chart(fig15, use_container_width=True)
+    figcache.plotly_chart(mn3b, fig15, use_container_width=True)
     mn3b.markdown(f'''The above charts display the closing price for {stock_string} between {con_start_date}
     and {con_end_date}. The closing stock price holds paramount importance in stock market analysis as it encapsulates 
     the culmination of daily market activity and investor sentiment. As the last traded price of a stock for the 
@@ -204,7 +159,7 @@ if mn2b.button("Run Analysis", use_container_width=True) and len(stock_lists) >
     mn3b.markdown('###')
 
     mn3b.markdown(f'#### {chart4_title}')
-    mn3b.plotly_chart(fig4, use_container_width=True)
+    figcache.plotly_chart(mn3b, fig4, use_container_width=True)
     mn3b.markdown(f'''Initially, we determined the historical volatility for the {stock_string}. Volatility signifies 
     the extent of price fluctuation over time. Specifically, we utilized the standard deviation of daily returns to 
     quantify volatility. Subsequently, we visually represented the computed volatility to evaluate and compare the 
@@ -230,36 +185,13 @@ if mn2b.button("Run Analysis", use_container_width=True) and len(stock_lists) >
     when formulating investment strategies, recognizing that higher-beta stocks may offer increased return potential 
     alongside elevated risk levels.
     ''')
-    ticker_df = ticker_df.pivot(index='Date',
-                                columns='Ticker',
-                                values='Close')
-    correlation_matrix = ticker_df.corr()
-
-    fig5 = px.imshow(
-        correlation_matrix,
-        x=correlation_matrix.columns,
-        y=correlation_matrix.columns,
-        color_continuous_scale='viridis',
-        height=800
-    )
-    annotations = []
-    for i, row in enumerate(correlation_matrix.values):
-        for j, value in enumerate(row):
-            annotations.append(dict(x=correlation_matrix.columns[j], y=correlation_matrix.index[i],
-                                    text=f'{value:.2f}', showarrow=False, font=dict(color='white')))
-
-    # Update layout
-    fig5.update_layout(
-        xaxis_title='Ticker',
-        yaxis_title='Ticker',
-        coloraxis_colorbar=dict(title='Correlation'),
-        annotations=annotations
-    )
+    with perf.span('figure', 'correlation matrix'):
+        fig5 = stocks.correlation_heatmap(metrics['correlation'])
     mn3b.markdown('###')
     mn3b.markdown('---')
     mn3b.markdown('###')
     mn3b.markdown(f'#### {chart5_title}')
-    mn3b.plotly_chart(fig5, use_container_width=True)
+    figcache.plotly_chart(mn3b, fig5, use_container_width=True)
     mn3b.markdown(f'''Correlation analysis of closing stock prices plays a pivotal role in stock market analysis by 
     providing insights into the relationships between different stocks or assets within a portfolio. By quantifying 
     the degree to which the prices of various securities move in tandem, correlation analysis aids investors in 
@@ -270,3 +202,4 @@ if mn2b.button("Run Analysis", use_container_width=True) and len(stock_lists) >
     can make informed decisions about portfolio allocation, minimize exposure to risk, and optimize returns in dynamic 
     market conditions.''')
 
+perf.render_debug_panel(perf.end_rerun())
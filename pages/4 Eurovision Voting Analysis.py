@@ -1,13 +1,16 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import pandas as pd
 from pyvis.network import Network
 import helper_funcs.charts as pltchart
 import helper_funcs.helper_funcs as helpf
+import helper_funcs.datasets as dsets
+import helper_funcs.images as images
+import helper_funcs.perf as perf
 
 st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded")
+perf.begin_rerun('Eurovision Voting Analysis')
 
 replace_map = {
     'Moldova (the Republic of)': 'Moldova',
@@ -20,23 +23,20 @@ replace_map = {
 
 
 @st.cache_data
-def load_data(data_path):
-    loaded_df = pd.read_csv(data_path, dtype={'year': str})
+def load_data(dataset_name):
+    loaded_df = dsets.load_dataset(dataset_name)
     loaded_df = loaded_df.drop(columns=['tele_points', 'jury_points'])
     loaded_df['from_country_name'] = loaded_df['from_country_name'].replace(replace_map)
     loaded_df['to_country_name'] = loaded_df['to_country_name'].replace(replace_map)
     return loaded_df
 
 
-src_data_path = 'https://raw.githubusercontent.com/this-isnt-me/credit-card-fraud-network/main/dataset' \
-                '/eurovision_votes_processed.csv'
-
 header_cont = st.container()
 main_cont = st.container()
 
 hdr1a, hdr1b = header_cont.columns([1, 6])
 hdr2a, hdr2b, hdr2c = header_cont.columns([1, 4, 1])
-logo_path = 'img/art_deco.png'
+logo_path = images.image_variant('img/art_deco.png', 'logo')
 hdr1a.image(logo_path)
 st.sidebar.image(logo_path)
 hdr2b.markdown(
@@ -61,7 +61,8 @@ For future analysis it would be interesting to take account of additional data,
 have an effect on voting patterns.''')
 header_cont.markdown('---')
 
-eurovision_df = load_data(src_data_path)
+with perf.span('load', 'eurovision votes'):
+    eurovision_df = load_data('eurovision_votes')
 mn1a, mn1b, mn1c = main_cont.columns([1, 10, 1])
 mn1b.markdown(f'#### Filter Options')
 mn1b.markdown('###### Select Options to Filter Chart Data Using Dropdowns Below')
@@ -101,18 +102,21 @@ if mn3b.button("Run Analysis", use_container_width=True):
     if len(chosen_year) == 0:
         chosen_year = year_list
     main_cont.markdown('###')
-    geo_plt = pltchart.plot_votes_geo(input_dataframe=eurovision_df,
-                                      from_country=chosen_country_from,
-                                      to_country=chosen_country_to,
-                                      year=chosen_year)
-
-    bar_plt = pltchart.plot_votes_bar(input_dataframe=eurovision_df,
-                                      from_country=chosen_country_from,
-                                      to_country=chosen_country_to,
-                                      year=chosen_year)
-
-    network_df, network_plt, G, importance_df = pltchart.plot_network(input_dataframe=eurovision_df,
-                                                                      year=chosen_year)
+    with perf.span('figure', 'votes map'):
+        geo_plt = pltchart.plot_votes_geo(input_dataframe=eurovision_df,
+                                          from_country=chosen_country_from,
+                                          to_country=chosen_country_to,
+                                          year=chosen_year)
+
+    with perf.span('figure', 'votes bar'):
+        bar_plt = pltchart.plot_votes_bar(input_dataframe=eurovision_df,
+                                          from_country=chosen_country_from,
+                                          to_country=chosen_country_to,
+                                          year=chosen_year)
+
+    with perf.span('model', 'voting network'):
+        network_df, network_plt, G, importance_df = pltchart.plot_network(input_dataframe=eurovision_df,
+                                                                          year=chosen_year)
     if geo_plt or network_plt:
         geo_plt_expander = main_cont.expander("Expand To View Voting Maps", expanded=False)
         geo_plt_expander.markdown('###')
@@ -162,15 +166,16 @@ if mn3b.button("Run Analysis", use_container_width=True):
                                            hide_index=True,
                                            use_container_width=True)
         if G is not None:
-            graph_net = Network(height='800px',
-                                bgcolor='#222222',
-                                font_color='white')
-            graph_net.from_nx(G)
-            graph_net.repulsion(node_distance=420, central_gravity=0.33,
-                                spring_length=110, spring_strength=0.10,
-                                damping=0.95)
-            path = 'html_files'
-            graph_net.save_graph(f'{path}/pyvis_graph.html')
+            with perf.span('figure', 'pyvis graph'):
+                graph_net = Network(height='800px',
+                                    bgcolor='#222222',
+                                    font_color='white')
+                graph_net.from_nx(G)
+                graph_net.repulsion(node_distance=420, central_gravity=0.33,
+                                    spring_length=110, spring_strength=0.10,
+                                    damping=0.95)
+                path = 'html_files'
+                graph_net.save_graph(f'{path}/pyvis_graph.html')
             HtmlFile = open(f'{path}/pyvis_graph.html', 'r', encoding='utf-8')
             with main_cont.expander("Expand To View Network Graph"):
                 st.markdown(f'### Network Graph of Eurovision Voting in {pltchart.join_list(chosen_year)}')
@@ -180,4 +185,6 @@ if mn3b.button("Run Analysis", use_container_width=True):
 main_cont.expander("Expand to View Complete Dataframe").dataframe(eurovision_df,
                                                                   hide_index=True,
                                                                   use_container_width=True)
-st.markdown("""---""")
\ No newline at end of file
+st.markdown("""---""")
+
+perf.render_debug_panel(perf.end_rerun())
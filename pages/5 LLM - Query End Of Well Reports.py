@@ -1,8 +1,11 @@
 import streamlit as st
+import helper_funcs.images as images
+import helper_funcs.perf as perf
 
 st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded")
+perf.begin_rerun('LLM - Query End Of Well Reports')
 
 
 header_cont = st.container()
@@ -10,7 +13,7 @@ main_cont = st.container()
 
 hdr1a, hdr1b = header_cont.columns([1, 6])
 hdr2a, hdr2b, hdr2c = header_cont.columns([1, 4, 1])
-logo_path = 'img/art_deco.png'
+logo_path = images.image_variant('img/art_deco.png', 'logo')
 hdr1a.image(logo_path)
 st.sidebar.image(logo_path)
 hdr2b.markdown(
@@ -30,5 +33,4 @@ hdr3b.markdown('---')
 
 hdr3b.video('https://youtu.be/UO1tQ4SfgKQ')
 
-
-
+perf.render_debug_panel(perf.end_rerun())
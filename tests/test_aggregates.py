@@ -0,0 +1,73 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import pandas as pd
+import helper_funcs.aggregates as aggs
+import helper_funcs.datasets as dsets
+
+
+def write_orders(directory, profit):
+    orders_df = pd.DataFrame({column: [1.0] * len(profit) for column in aggs.sum_columns})
+    orders_df['profit'] = profit
+    source = directory / 'orders.csv'
+    orders_df.to_csv(source, index=False)
+    dsets.materialize_dataset('food_orders', source=str(source), force=True)
+
+
+def refresh(start_rows):
+    def chunk_source(start_row=0):
+        start_rows.append(start_row)
+        return dsets.load_chunks('food_orders', 2, start_row=start_row)
+    return aggs.refresh_aggregate('food_orders', chunk_source)
+
+
+def use_tmp_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(dsets, 'store_path', str(tmp_path / 'store'))
+    monkeypatch.setattr(aggs, 'aggregate_path', str(tmp_path / 'aggregates'))
+
+
+def test_append_folds_only_new_rows(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch)
+    start_rows = []
+    write_orders(tmp_path, [5.0, -5.0, 15.0])
+    refresh(start_rows)
+    write_orders(tmp_path, [5.0, -5.0, 15.0, 25.0])
+    aggregate = refresh(start_rows)
+    assert start_rows == [0, 3]
+    assert aggregate['orders'] == 4
+    assert aggregate['sums']['profit'] == 40.0
+    # an unchanged dataset is not read at all
+    refresh(start_rows)
+    assert start_rows == [0, 3]
+
+
+def test_rewritten_prefix_rebuilds(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch)
+    start_rows = []
+    write_orders(tmp_path, [5.0, -5.0, 15.0])
+    refresh(start_rows)
+    # the export grew, but an earlier row changed as well
+    write_orders(tmp_path, [50.0, -5.0, 15.0, 25.0])
+    aggregate = refresh(start_rows)
+    assert start_rows == [0, 0]
+    assert aggregate['orders'] == 4
+    assert aggregate['sums']['profit'] == 85.0
+
+
+def test_kept_columns_follow_appends(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch)
+
+    def chunk_source(start_row=0):
+        return dsets.load_chunks('food_orders', 2, start_row=start_row)
+    write_orders(tmp_path, [5.0, -5.0, 15.0])
+    aggs.refresh_aggregate('food_orders', chunk_source, columns=['profit'])
+    write_orders(tmp_path, [5.0, -5.0, 15.0, 25.0])
+    aggregate = aggs.refresh_aggregate('food_orders', chunk_source, columns=['profit'])
+    assert aggs.load_columns('food_orders', aggregate)['profit'].tolist() == [5.0, -5.0, 15.0, 25.0]
+    # a rewritten export drops the columns kept for the old rows
+    write_orders(tmp_path, [50.0, -5.0])
+    aggregate = aggs.refresh_aggregate('food_orders', chunk_source, columns=['profit'])
+    assert aggs.load_columns('food_orders', aggregate)['profit'].tolist() == [50.0, -5.0]
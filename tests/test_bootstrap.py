@@ -0,0 +1,29 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import helper_funcs.bootstrap as boot
+
+
+def sample_columns():
+    rng = np.random.default_rng(0)
+    order_value = rng.uniform(100, 2000, 400)
+    return np.vstack([order_value, order_value * 0.05 + rng.uniform(10, 50, 400)])
+
+
+def test_fixed_seed_gives_the_same_interval_for_any_worker_count(monkeypatch):
+    monkeypatch.setattr(boot, 'block_elements', 1000)
+    serial_means = boot.bootstrap_means(sample_columns(), replicates=600, seed=7, workers=1)
+    assert serial_means.shape == (600, 2)
+    np.testing.assert_array_equal(boot.bootstrap_means(sample_columns(), replicates=600, seed=7, workers=1),
+                                  serial_means)
+    np.testing.assert_array_equal(boot.bootstrap_means(sample_columns(), replicates=600, seed=7, workers=2),
+                                  serial_means)
+    assert not np.array_equal(boot.bootstrap_means(sample_columns(), replicates=600, seed=8, workers=1),
+                              serial_means)
+    low, high = boot.confidence_interval(serial_means[:, 0])
+    assert (low, high) == boot.confidence_interval(serial_means[:, 0])
+    assert low < sample_columns()[0].mean() < high
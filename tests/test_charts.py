@@ -0,0 +1,35 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+import helper_funcs.aggregates as aggs
+import helper_funcs.charts as pltchart
+import helper_funcs.profitability as prof
+
+
+def test_histogram_sends_the_numpy_bins():
+    rng = np.random.default_rng(0)
+    values = np.append(rng.normal(50, 20, 10000), [np.nan, np.inf])
+    fig = pltchart.histogram(values, nbins=25, title='Profit')
+    bin_counts, bin_edges = np.histogram(values[np.isfinite(values)], bins=25)
+    bars = fig.data[0]
+    np.testing.assert_array_equal(bars.y, bin_counts)
+    np.testing.assert_allclose(bars.x, (bin_edges[:-1] + bin_edges[1:]) / 2)
+    np.testing.assert_allclose(bars.width, np.diff(bin_edges))
+    assert fig.layout.shapes[0].x0 == values[np.isfinite(values)].mean()
+
+
+def test_profit_distribution_fills_empty_bins():
+    profit = [-7.0, 3.0, 3.5, 48.0]
+    orders_df = pd.DataFrame({column: 0.0 for column in aggs.sum_columns}, index=range(len(profit)))
+    orders_df['profit'] = profit
+    aggregate = aggs.order_aggregate(orders_df)
+    fig = prof.profit_distribution(aggregate, 'Profit', 'Profit ($)')
+    # bins of width 10 from -10 up to 50, the three between 10 and 40 hold no orders
+    bin_edges = np.arange(-10, 51, 10)
+    np.testing.assert_array_equal(fig.data[0].y, np.histogram(profit, bins=bin_edges)[0])
+    np.testing.assert_allclose(fig.data[0].x, bin_edges[:-1] + 5)
@@ -0,0 +1,84 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+import helper_funcs.clustering as clust
+import helper_funcs.result_cache as rcache
+
+
+def transactions():
+    rng = np.random.default_rng(0)
+    rows = 400
+    return pd.DataFrame({'InvoiceNo': [f'{536000 + row // 3}' for row in range(rows)],
+                         'CustomerID': rng.choice([12346.0, 12347.0, 12350.0, 13001.0, np.nan], rows),
+                         'InvoiceDate': [f'{rng.integers(1, 13)}/{rng.integers(1, 29)}/2011 {rng.integers(8, 18)}:'
+                                         f'{rng.integers(0, 60):02d}' for _ in range(rows)],
+                         'Quantity': rng.integers(-2, 20, rows),
+                         'UnitPrice': rng.choice([0.0, 0.85, 1.25, 2.55, 4.95], rows)})
+
+
+def baseline_rfm(transaction_data):
+    # the per customer lambda the native reductions replaced
+    data_date = pd.to_datetime(transaction_data['InvoiceDate']).max() + pd.DateOffset(days=1)
+    transaction_data = transaction_data.assign(TotalSpend=transaction_data['Quantity'] * transaction_data['UnitPrice'])
+    rfm_df = transaction_data.groupby('CustomerID').agg({
+        'InvoiceDate': lambda x: (data_date - pd.to_datetime(x).max()).days,
+        'InvoiceNo': 'nunique',
+        'TotalSpend': 'sum'
+    })
+    return rfm_df.rename(columns={'InvoiceDate': 'Recency', 'InvoiceNo': 'Frequency'})
+
+
+def test_rfm_matches_per_customer_baseline():
+    transaction_data = transactions()
+    cleaned = clust.clean_transactions(transaction_data)
+    expected_df = baseline_rfm(cleaned.assign(InvoiceDate=transaction_data.loc[cleaned.index, 'InvoiceDate']))
+    pd.testing.assert_frame_equal(clust.compute_rfm(cleaned), expected_df)
+
+
+def test_score_bins_match_pd_cut():
+    values = pd.Series([-1.0, 0.0, 19.5, 20.0, 20.5, 50.0, 149.0, 250.0, 251.0, 373.0])
+    bins = [-1.0, 20, 50, 150, 250, 373.0]
+    expected = pd.cut(values, bins=bins, labels=range(1, 6), include_lowest=True).astype(int)
+    np.testing.assert_array_equal(clust.score_bins(values, bins), expected.to_numpy())
+    with pytest.raises(ValueError):
+        clust.score_bins(values, [0, 20, 20, 150, 250, 373])
+
+
+def rfm_scores(rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.integers(1, 6, (rows, 3)), columns=['R_Score', 'F_Score', 'M_Score'])
+
+
+def test_weighted_point_fit_is_no_worse_than_the_full_fit():
+    rcache.set_backend(rcache.MemoryBackend())
+    features = rfm_scores()
+    kmeans_model, labels = clust.fit_clusters(features, n_clusters=4)
+    # the inertia of the weighted fit over every customer, not just the distinct points
+    weighted_inertia = ((features.to_numpy() - kmeans_model.cluster_centers_[labels]) ** 2).sum()
+    assert np.isclose(weighted_inertia, kmeans_model.inertia_)
+    full_model = KMeans(n_clusters=4, n_init=10, random_state=42).fit(features)
+    assert weighted_inertia <= full_model.inertia_ + 1e-6
+    np.testing.assert_array_equal(labels, kmeans_model.predict(features))
+
+
+def test_concurrent_sweep_matches_one_fit_per_k():
+    rcache.set_backend(rcache.MemoryBackend())
+    features = rfm_scores(rows=800, seed=1)
+    points, counts, _ = clust.unique_points(features)
+    sweep_df = clust.k_sweep(features, k_range=range(2, 8), workers=3)
+    # an empty cache, so the serial sweep fits every k again
+    rcache.set_backend(rcache.MemoryBackend())
+    serial_df = clust.k_sweep(features, k_range=range(2, 8), workers=1)
+    pd.testing.assert_frame_equal(sweep_df, serial_df)
+    for k, inertia in zip(sweep_df['Number of Clusters (k)'], sweep_df['Inertia']):
+        expected = KMeans(n_clusters=k, n_init=clust.point_inits, random_state=42).fit(points, sample_weight=counts)
+        assert np.isclose(inertia, expected.inertia_)
+    scored_df = clust.k_sweep(features, k_range=range(2, 8), with_scores=True, sample_size=300)
+    assert scored_df[['Silhouette', 'Davies-Bouldin']].notna().all().all()
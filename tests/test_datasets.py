@@ -0,0 +1,28 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import helper_funcs.datasets as dsets
+
+
+def test_streamed_csv_matches_whole_file_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(dsets, 'store_path', str(tmp_path / 'store'))
+    monkeypatch.setattr(dsets, 'csv_chunk_rows', 2)
+    # integers that gain a gap, text that starts empty and a column that never has a value
+    source = tmp_path / 'votes.csv'
+    pd.DataFrame({'year': ['1999', '2000', '2001', '2002', '2003'],
+                  'points': [1, 2, np.nan, 4, 5],
+                  'jury': [1, 2, 3, 4, 5],
+                  'country': [np.nan, np.nan, 'Malta', 'Norway', np.nan],
+                  'notes': np.nan}).to_csv(source, index=False)
+    dsets.materialize_dataset('eurovision_votes', source=str(source), force=True)
+    _, read_kwargs = dsets.dataset_dict['eurovision_votes']
+    # the table the whole file parse used to write
+    expected_df = pa.Table.from_pandas(pd.read_csv(source, **read_kwargs), preserve_index=False).to_pandas()
+    pd.testing.assert_frame_equal(dsets.load_dataset('eurovision_votes'), expected_df)
+    assert dsets.load_table('eurovision_votes').num_rows == 5
@@ -0,0 +1,61 @@
+import os
+import sys
+import json
+import importlib
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import helper_funcs.result_cache as rcache
+
+
+probe_source = '''import plotly.graph_objects as go
+import helper_funcs.figure_cache as figcache
+
+
+@figcache.cached_figure('probe')
+def probe_figure(values):
+    fig = go.Figure(go.Bar(y=values))
+    fig.update_layout(height={height})
+    return fig
+'''
+
+
+def write_probe(directory, modified, height):
+    file_path = directory / 'figure_probe.py'
+    file_path.write_text(probe_source.format(height=height))
+    os.utime(file_path, ns=(modified, modified))
+
+
+def test_changed_layout_literal_misses(tmp_path, monkeypatch):
+    rcache.set_backend(rcache.MemoryBackend())
+    monkeypatch.syspath_prepend(str(tmp_path))
+    write_probe(tmp_path, 1_000_000_000, 800)
+    probe = importlib.import_module('figure_probe')
+    assert json.loads(probe.probe_figure([1, 2]))['layout']['height'] == 800
+    write_probe(tmp_path, 2_000_000_000, 600)
+    probe = importlib.reload(probe)
+    assert json.loads(probe.probe_figure([1, 2]))['layout']['height'] == 600
+    sys.modules.pop('figure_probe')
+
+
+def chart_app():
+    import plotly.graph_objects as go
+    import streamlit as st
+    import helper_funcs.figure_cache as figcache
+    fig = go.Figure(go.Bar(y=[1, 2, 3]))
+    figcache.plotly_chart(st.container(), figcache.figure_json(fig), use_container_width=True)
+
+
+def test_unsupported_streamlit_falls_back_to_plotly_chart(monkeypatch):
+    from streamlit.testing.v1 import AppTest
+    import helper_funcs.figure_cache as figcache
+    spec_list = []
+    for direct_proto in [True, False]:
+        monkeypatch.setattr(figcache, 'direct_proto', direct_proto)
+        app = AppTest.from_function(chart_app)
+        app.run()
+        chart = app.get('plotly_chart')[0].proto
+        assert chart.use_container_width
+        spec_list.append(json.loads(chart.figure.spec))
+    assert spec_list[0]['data'] == spec_list[1]['data']
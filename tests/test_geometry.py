@@ -0,0 +1,18 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import helper_funcs.geometry as geometry
+
+
+def test_served_url_only_inside_app_static_folder():
+    assert geometry.served_url('static/geo') == 'app/static/geo'
+    assert geometry.served_url(os.path.join('data', 'geometry', 'subsets')) is None
+    assert geometry.served_url('static_other') is None
+
+
+def test_subsets_are_served_by_default():
+    if 'PORTFOLIO_STATIC_GEO_DIR' not in os.environ:
+        assert geometry.static_url == 'app/static/geo'
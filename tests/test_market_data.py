@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import socket
+import threading
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import helper_funcs.images as images
+import helper_funcs.market_data as mktdata
+import helper_funcs.price_store as pricestore
+
+
+class CountingProvider(mktdata.FixtureProvider):
+    # fixture prices, with the calls made for each symbol and the most fetches that were ever running at once
+    max_workers = 2
+
+    def __init__(self, failures=None):
+        super().__init__()
+        self.failures = failures or {}
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.running = 0
+        self.max_running = 0
+
+    def fetch(self, symbol, start, end):
+        with self.lock:
+            self.calls[symbol] = self.calls.get(symbol, 0) + 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            attempt = self.calls[symbol]
+        try:
+            # not time.sleep, which the backoff tests record
+            threading.Event().wait(0.02)
+            if attempt <= self.failures.get(symbol, 0):
+                raise ConnectionError(f'{symbol} attempt {attempt} failed')
+            return super().fetch(symbol, start, end)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def record_sleeps(monkeypatch):
+    sleep_list = []
+    monkeypatch.setattr(mktdata.time, 'sleep', sleep_list.append)
+    return sleep_list
+
+
+def test_requests_are_batched_within_the_worker_limit():
+    provider = CountingProvider()
+    symbols = ['AAPL', 'TSLA', 'NVDA', 'AAPL', 'MSFT', 'GOOG']
+    price_data, error_dict = mktdata.fetch_prices(symbols, '2024-01-01', '2024-02-01', provider)
+    assert sorted(price_data) == ['AAPL', 'GOOG', 'MSFT', 'NVDA', 'TSLA']
+    assert error_dict == {}
+    # a repeated symbol is fetched once
+    assert set(provider.calls.values()) == {1}
+    assert provider.max_running == 2
+
+
+def test_transient_failures_retry_with_backoff(monkeypatch):
+    sleep_list = record_sleeps(monkeypatch)
+    provider = CountingProvider(failures={'AAPL': 2})
+    price_data, error_dict = mktdata.fetch_prices(['AAPL'], '2024-01-01', '2024-02-01', provider)
+    assert 'AAPL' in price_data and error_dict == {}
+    assert provider.calls['AAPL'] == 3
+    assert sleep_list == [mktdata.backoff_seconds, mktdata.backoff_seconds * 2]
+
+
+def test_failing_symbol_does_not_hold_up_the_others(monkeypatch):
+    record_sleeps(monkeypatch)
+    provider = CountingProvider(failures={'TSLA': mktdata.max_attempts})
+    price_data, error_dict = mktdata.fetch_prices(['AAPL', 'TSLA', 'NVDA'], '2024-01-01', '2024-02-01', provider)
+    assert sorted(price_data) == ['AAPL', 'NVDA']
+    assert list(error_dict) == ['TSLA']
+    assert provider.calls['TSLA'] == mktdata.max_attempts
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = mktdata.RateLimiter(20)
+    time_list = []
+
+    def worker():
+        for _ in range(3):
+            limiter.wait()
+            time_list.append(time.monotonic())
+    thread_list = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in thread_list:
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+    time_list.sort()
+    # shared across threads, a little slack for the clock
+    assert min(later - earlier for earlier, later in zip(time_list, time_list[1:])) >= 0.045
+
+
+def test_stock_page_runs_offline(tmp_path, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    def blocked(*args, **kwargs):
+        raise OSError('network access is blocked in this test')
+    monkeypatch.setattr(socket.socket, 'connect', blocked)
+    monkeypatch.setattr(pricestore, 'price_path', str(tmp_path / 'prices'))
+    monkeypatch.setattr(images, 'asset_path', str(tmp_path / 'assets'))
+    monkeypatch.setattr(mktdata, '_provider', mktdata.FixtureProvider())
+    monkeypatch.chdir(repo_root)
+    app = AppTest.from_file(os.path.join('pages', '3 Stockmarket Comparison Analysis.py'), default_timeout=60)
+    app.run()
+    app.multiselect[0].set_value(['Apple', 'Tesla', 'NVIDIA']).run()
+    app.button[0].click().run()
+    assert not app.exception
+    assert len(app.get('plotly_chart')) == 6
+    assert sorted(os.listdir(tmp_path / 'prices')) == ['AAPL.arrow', 'NVDA.arrow', 'TSLA.arrow', '_GSPC.arrow']
+
@@ -0,0 +1,35 @@
+import os
+import sys
+import json
+import threading
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import helper_funcs.perf as perf
+
+
+def test_exports_read_consistent_copies_while_spans_record(monkeypatch):
+    monkeypatch.setattr(perf, 'span_stats', {})
+    monkeypatch.setattr(perf, 'rerun_stats', {})
+    stop = threading.Event()
+
+    def record():
+        while not stop.is_set():
+            with perf.span('figure', f'chart {len(perf.span_stats) % 50}'):
+                pass
+    thread = threading.Thread(target=record)
+    thread.start()
+    try:
+        for _ in range(200):
+            span_copy, _ = perf.snapshot()
+            assert all(stats['total'] >= stats['max'] for stats in span_copy.values())
+            json.loads(perf.export_json())
+            perf.export_prometheus()
+    finally:
+        stop.set()
+        thread.join()
+    span_copy, _ = perf.snapshot()
+    # the copies are not the live entries
+    span_copy[next(iter(span_copy))]['count'] = -1
+    assert all(stats['count'] > 0 for stats in perf.span_stats.values())
@@ -0,0 +1,32 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import helper_funcs.prerender as prerender
+import helper_funcs.result_cache as rcache
+
+
+def test_builder_dependencies_include_imported_helpers():
+    for page_name, expected in [('profitability', {'bootstrap.py', 'charts.py', 'figure_cache.py', 'aggregates.py'}),
+                                ('donations_network', {'donations.py', 'helper_funcs.py'})]:
+        _, _, builder = prerender.page_dict[page_name]
+        file_names = {os.path.basename(file_path) for file_path in rcache.source_files(builder.__module__)}
+        assert expected <= file_names
+
+
+def test_forced_render_replaces_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(prerender, 'artifact_path', str(tmp_path))
+    monkeypatch.setattr(prerender, 'artifact_key', lambda page_name: 'key')
+    build_count = []
+
+    def builder():
+        build_count.append(1)
+        return {'renders': len(build_count)}
+    monkeypatch.setitem(prerender.page_dict, 'test_page', ([], [], builder))
+    assert prerender.render_page('test_page')[2] == 'rendered'
+    assert prerender.render_page('test_page')[2] == 'current'
+    assert prerender.render_page('test_page', force=True)[2] == 'rendered'
+    assert prerender.read_artifacts('test_page', 'key') == {'renders': 2}
+    assert os.listdir(tmp_path / 'test_page') == ['key']
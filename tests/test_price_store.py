@@ -0,0 +1,47 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import pandas as pd
+import helper_funcs.market_data as mktdata
+import helper_funcs.price_store as pricestore
+
+
+class RecordingProvider(mktdata.FixtureProvider):
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def fetch(self, symbol, start, end):
+        self.requests.append((symbol, start, end))
+        return super().fetch(symbol, start, end)
+
+
+def test_missing_ranges_skip_covered_days():
+    range_list = [['2024-01-10', '2024-01-20'], ['2024-01-15', '2024-02-01'], ['2024-03-01', '2024-03-10']]
+    assert pricestore.merge_ranges(range_list) == [['2024-01-10', '2024-02-01'], ['2024-03-01', '2024-03-10']]
+    assert pricestore.missing_ranges(range_list, '2024-01-01', '2024-03-05') == [['2024-01-01', '2024-01-10'],
+                                                                                  ['2024-02-01', '2024-03-01']]
+
+
+def test_prices_round_trip_and_append_only_the_gaps(tmp_path, monkeypatch):
+    monkeypatch.setattr(pricestore, 'price_path', str(tmp_path))
+    provider = RecordingProvider()
+    price_data, errors = pricestore.read_prices(['AAPL', 'TSLA'], '2024-01-01', '2024-02-01', provider)
+    assert errors == {} and sorted(price_data) == ['AAPL', 'TSLA']
+    expected_df = mktdata.FixtureProvider().fetch('AAPL', '2024-01-01', '2024-02-01')
+    pd.testing.assert_frame_equal(price_data['AAPL'], expected_df, check_freq=False)
+    # a stored range is read from disk only
+    provider.requests.clear()
+    stored_data, _ = pricestore.read_prices(['AAPL', 'TSLA'], '2024-01-01', '2024-02-01', provider)
+    assert provider.requests == []
+    pd.testing.assert_frame_equal(stored_data['AAPL'], price_data['AAPL'], check_freq=False)
+    # a wider range fetches the days either side and appends them to the same file
+    wider_data, _ = pricestore.read_prices(['AAPL'], '2023-12-01', '2024-03-01', provider)
+    assert sorted(provider.requests) == [('AAPL', '2023-12-01', '2024-01-01'), ('AAPL', '2024-02-01', '2024-03-01')]
+    expected_df = mktdata.FixtureProvider().fetch('AAPL', '2023-12-01', '2024-03-01')
+    pd.testing.assert_frame_equal(wider_data['AAPL'], expected_df, check_freq=False)
+    _, range_list = pricestore.load_symbol('AAPL')
+    assert range_list == [['2023-12-01', '2024-03-01']]
@@ -0,0 +1,36 @@
+import io
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+import helper_funcs.profiling as profiling
+
+
+def test_info_text_matches_dataframe_info():
+    input_df = pd.DataFrame({'InvoiceNo': ['536365', '536366', None],
+                             'Quantity': [6, 8, 2],
+                             'UnitPrice': [2.55, np.nan, 1.85]})
+    for frame in [input_df, input_df.iloc[:0]]:
+        buffer = io.StringIO()
+        frame.info(buf=buffer)
+        assert profiling.profile_frame(frame)['info'] == buffer.getvalue()
+    # the index line for an index that is not a range
+    date_df = input_df.set_index(pd.date_range('2011-01-04', periods=3, name='InvoiceDate'))
+    buffer = io.StringIO()
+    date_df.info(buf=buffer)
+    assert profiling.index_summary(date_df.index) == buffer.getvalue().splitlines()[1]
+
+
+def test_tdigest_quartiles_track_exact_quantiles(monkeypatch):
+    monkeypatch.setattr(profiling, 'approximate_rows', 1000)
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.lognormal(1.0, 0.8, 200000))
+    summary = profiling.column_summary(values, len(values))
+    exact = np.quantile(values, profiling.quantile_list)
+    # the digest keeps the quartiles of a skewed column within a small fraction of the spread
+    spread = exact[-1] - exact[0]
+    assert np.allclose(summary[4:7], exact, atol=0.01 * spread)
@@ -0,0 +1,68 @@
+import os
+import re
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+import helper_funcs.profitability as prof
+
+
+def baseline_extract_discount(discount_str):
+    # the per row parser the vectorised cleaning replaced
+    match = re.search(r'(\d+(\.\d+)?)', str(discount_str))
+    if match:
+        return float(match.group(1))
+    return 0.0
+
+
+def baseline_clean_orders(orders_df):
+    orders_df['order_date_and_time'] = pd.to_datetime(orders_df['order_date_and_time'], format='%d/%m/%Y %H:%M')
+    orders_df['delivery_date_and_time'] = pd.to_datetime(orders_df['delivery_date_and_time'], format='%d/%m/%Y %H:%M')
+    orders_df['discount_percentage'] = orders_df['discounts_and_offers'].apply(lambda x: baseline_extract_discount(x))
+    orders_df['discount_amount'] = orders_df.apply(lambda x: (x['order_value'] * x['discount_percentage'] / 100)
+                                                   if x['discount_percentage'] > 1
+                                                   else x['discount_percentage'], axis=1)
+    return orders_df
+
+
+def raw_orders():
+    return pd.DataFrame({
+        'Order ID': [1, 2, 3, 4, 5, 6],
+        'Order Date and Time': ['01/01/2024 10:00', '01/01/2024 10:00', '02/01/2024 23:59', '03/02/2024 00:00',
+                                '01/01/2024 10:00', np.nan],
+        'Delivery Date and Time': ['01/01/2024 10:45', '01/01/2024 11:00', '03/01/2024 00:30', '03/02/2024 01:10',
+                                   '01/01/2024 10:45', '05/02/2024 12:00'],
+        'Order Value': [1200, 450, 800, 1999, 100, 640],
+        'Delivery Fee': [20, 0, 50, 30, 40, 20],
+        'Discounts and Offers': ['10%', np.nan, '15% New User', '50 off Promo', '0.5 off', '12.5% on App'],
+        'Commission Fee': [150, 60, 120, 199, 50, 80],
+        'Payment Processing Fee': [20, 10, 45, 30, 12, 25],
+    })
+
+
+def test_cleaning_matches_row_wise_baseline():
+    cleaned_df = prof.clean_orders(prof.normalise_columns(raw_orders()))
+    expected_df = baseline_clean_orders(prof.normalise_columns(raw_orders()))
+    pd.testing.assert_frame_equal(cleaned_df, expected_df, check_exact=True)
+    # a missing offer is no discount
+    assert cleaned_df.loc[1, 'discount_amount'] == 0.0
+
+
+def test_scenario_grid_matches_simulated_strategies():
+    rng = np.random.default_rng(0)
+    orders_df = pd.DataFrame({'order_value': rng.uniform(0, 2000, 500),
+                              'delivery_fee': rng.choice([0.0, 20.0, 30.0, 50.0], 500),
+                              'payment_processing_fee': rng.uniform(10, 50, 500)})
+    orders_df.loc[0, 'order_value'] = 0.0
+    commission_range = np.arange(0, 41, 5)
+    discount_range = np.arange(0, 21, 5)
+    scenarios = prof.evaluate_scenarios(prof.scenario_inputs(orders_df), commission_range, discount_range)
+    for row, discount in enumerate(discount_range):
+        for column, commission in enumerate(commission_range):
+            simulated_profit = prof.simulate_strategy(orders_df.copy(), commission, discount)['simulated_profit']
+            assert np.isclose(scenarios['profit'][row, column], simulated_profit.sum())
+            assert np.isclose(scenarios['profitable_percentage'][row, column], (simulated_profit > 0).mean() * 100)
+    assert scenarios['best']['profit'] == scenarios['profit'].max()
@@ -0,0 +1,69 @@
+import os
+import sys
+import importlib
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import helper_funcs.result_cache as rcache
+
+
+probe_source = '''import helper_funcs.result_cache as rcache
+
+
+@rcache.cached('probe')
+def offset(x, scale={scale}):
+    return x * scale + {constant}
+'''
+
+
+def write_probe(directory, modified, **values):
+    file_path = directory / 'cache_probe.py'
+    file_path.write_text(probe_source.format(**values))
+    # a fixed mtime, so two writes within the filesystem timestamp resolution still read as different files
+    os.utime(file_path, ns=(modified, modified))
+
+
+def load_probe(directory, monkeypatch, **values):
+    monkeypatch.syspath_prepend(str(directory))
+    write_probe(directory, 1_000_000_000, **values)
+    return importlib.import_module('cache_probe')
+
+
+def test_changed_constant_misses(tmp_path, monkeypatch):
+    rcache.set_backend(rcache.MemoryBackend())
+    probe = load_probe(tmp_path, monkeypatch, scale=1, constant=20)
+    assert probe.offset(1) == 21
+    # same compiled body, only the constant differs
+    write_probe(tmp_path, 2_000_000_000, scale=1, constant=30)
+    probe = importlib.reload(probe)
+    assert probe.offset(1) == 31
+    sys.modules.pop('cache_probe')
+
+
+def test_changed_default_misses(tmp_path, monkeypatch):
+    rcache.set_backend(rcache.MemoryBackend())
+    probe = load_probe(tmp_path, monkeypatch, scale=1, constant=0)
+    assert probe.offset(2) == 2
+    write_probe(tmp_path, 2_000_000_000, scale=3, constant=0)
+    probe = importlib.reload(probe)
+    assert probe.offset(2) == 6
+    sys.modules.pop('cache_probe')
+
+
+def test_unchanged_source_hits(tmp_path, monkeypatch):
+    backend = rcache.MemoryBackend()
+    rcache.set_backend(backend)
+    probe = load_probe(tmp_path, monkeypatch, scale=1, constant=5)
+    assert probe.offset(1) == 6
+    assert probe.offset(1) == 6
+    assert len(backend.entries) == 1
+    sys.modules.pop('cache_probe')
+
+
+def test_source_files_follow_package_imports():
+    import helper_funcs.profitability
+    file_names = [os.path.basename(file_path) for file_path in rcache.source_files('helper_funcs.profitability')]
+    assert 'profitability.py' in file_names
+    # reached through profitability's own imports of charts and datasets
+    assert {'charts.py', 'datasets.py', 'geometry.py'} <= set(file_names)
@@ -0,0 +1,79 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import pandas as pd
+import helper_funcs.clustering as clust
+import helper_funcs.datasets as dsets
+import helper_funcs.rfm_state as rfmstate
+
+
+def write_transactions(directory, quantities):
+    transaction_data = pd.DataFrame({'InvoiceNo': [f'{536000 + row // 2}' for row in range(len(quantities))],
+                                     'CustomerID': [float(12000 + row % 3) for row in range(len(quantities))],
+                                     'InvoiceDate': [f'2011-01-{row + 1:02d} 10:00' for row in range(len(quantities))],
+                                     'Quantity': quantities,
+                                     'UnitPrice': 2.0})
+    source = directory / 'online_retail.csv'
+    transaction_data.to_csv(source, index=False)
+    dsets.materialize_dataset('online_retail', source=str(source), force=True)
+    return transaction_data
+
+
+def refresh(start_rows):
+    # the rows read by this refresh only, the state is folded in process so every read is recorded
+    start_rows.clear()
+    return rfmstate.state_rfm(rfmstate.refresh_state('online_retail', chunk_rows=2, workers=1))
+
+
+def expected_rfm(transaction_data):
+    return clust.compute_rfm(clust.clean_transactions(transaction_data))
+
+
+def use_tmp_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(dsets, 'store_path', str(tmp_path / 'store'))
+    monkeypatch.setattr(rfmstate, 'state_path', str(tmp_path / 'state'))
+    # the first row of every read of the transactions
+    start_rows = []
+    load_chunks = dsets.load_chunks
+
+    def recording_chunks(dataset_name, chunk_rows, columns=None, start_row=0, stop_row=None):
+        start_rows.append(start_row)
+        return load_chunks(dataset_name, chunk_rows, columns, start_row, stop_row)
+    monkeypatch.setattr(dsets, 'load_chunks', recording_chunks)
+    return start_rows
+
+
+def test_append_folds_only_new_rows(tmp_path, monkeypatch):
+    start_rows = use_tmp_store(tmp_path, monkeypatch)
+    write_transactions(tmp_path, [1, 2, 3, 4, 5])
+    refresh(start_rows)
+    assert start_rows == [0, 2, 4]
+    transaction_data = write_transactions(tmp_path, [1, 2, 3, 4, 5, 6, 7])
+    rfm_df = refresh(start_rows)
+    assert start_rows == [5]
+    pd.testing.assert_frame_equal(rfm_df, expected_rfm(transaction_data), check_dtype=False)
+    # an unchanged dataset is not read at all
+    refresh(start_rows)
+    assert start_rows == []
+
+
+def test_rewritten_prefix_rebuilds(tmp_path, monkeypatch):
+    start_rows = use_tmp_store(tmp_path, monkeypatch)
+    write_transactions(tmp_path, [1, 2, 3, 4, 5])
+    refresh(start_rows)
+    # the export grew, but an earlier row changed as well
+    transaction_data = write_transactions(tmp_path, [10, 2, 3, 4, 5, 6, 7])
+    rfm_df = refresh(start_rows)
+    assert start_rows == [0, 2, 4, 6]
+    pd.testing.assert_frame_equal(rfm_df, expected_rfm(transaction_data), check_dtype=False)
+
+
+def test_partitioned_rfm_matches_compute_rfm(tmp_path, monkeypatch):
+    use_tmp_store(tmp_path, monkeypatch)
+    transaction_data = write_transactions(tmp_path, [1, 2, 3, 4, 5, 6, 7])
+    for workers in [1, 2]:
+        rfm_df = clust.partitioned_rfm(('online_retail',), chunk_rows=2, workers=workers)
+        pd.testing.assert_frame_equal(rfm_df.sort_index(), expected_rfm(transaction_data), check_dtype=False)
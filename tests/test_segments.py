@@ -0,0 +1,49 @@
+import os
+import sys
+import datetime
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+import helper_funcs.result_cache as rcache
+import helper_funcs.segments as segs
+
+
+def rfm_table(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Recency': rng.integers(1, 374, rows),
+                         'Frequency': np.ceil(rng.lognormal(1.2, 1.3, rows)).astype(int),
+                         'TotalSpend': rng.lognormal(6.5, 1.2, rows)},
+                        index=pd.Index(np.arange(12000, 12000 + rows), name='CustomerID'))
+
+
+def test_match_centroids_undoes_a_permutation():
+    reference = np.array([[1, 1, 1], [3, 3, 3], [5, 5, 5], [5, 1, 1]], dtype=float)
+    permutation = [2, 0, 3, 1]
+    centroids = reference[permutation] + 0.2
+    np.testing.assert_allclose(centroids[segs.match_centroids(reference, centroids)], reference + 0.2)
+
+
+def test_refit_keeps_segment_names_on_the_same_centroids(tmp_path, monkeypatch):
+    rcache.set_backend(rcache.MemoryBackend())
+    monkeypatch.setattr(segs, 'model_path', str(tmp_path))
+    rfm_df = rfm_table()
+    fitted_at = datetime.datetime.now()
+    model = segs.current_model('online_retail', rfm_df)
+    # inside the schedule the stored model is served as is
+    assert segs.current_model('online_retail', rfm_table(seed=1), now=fitted_at) == model
+    # a refit on the next export, with some new customers, keeps each name on the nearest old centroid
+    later_df = pd.concat([rfm_df.sample(frac=0.9, random_state=0), rfm_table(rows=200, seed=2).set_axis(
+        pd.Index(np.arange(20000, 20200), name='CustomerID'))])
+    refit = segs.current_model('online_retail', later_df, now=fitted_at + datetime.timedelta(days=segs.refit_days))
+    assert refit['version'] == 2 and refit['segments'] == model['segments']
+    shift = np.linalg.norm(np.subtract(refit['centroids'], model['centroids']), axis=1)
+    assert shift.max() < 0.5
+    # customers present in both fits mostly keep their segment
+    common = rfm_df.index.intersection(later_df.index)
+    before = segs.score_customers(model, rfm_df.loc[common])['Segment']
+    after = segs.score_customers(refit, later_df.loc[common])['Segment']
+    assert (before == after).mean() > 0.9
+    assert segs.load_model('online_retail', version=1) == model
@@ -0,0 +1,21 @@
+import os
+import sys
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import numpy as np
+import pandas as pd
+import helper_funcs.stocks as stocks
+
+
+def test_rolling_closes_skip_each_tickers_missing_days():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2024-01-01', periods=60)
+    close_matrix = pd.DataFrame(100 + rng.normal(0, 5, (60, 3)).cumsum(axis=0), index=dates,
+                                columns=['AAPL', 'TSLA', 'NVDA'])
+    close_matrix.iloc[rng.choice(60, 12, replace=False), 1] = np.nan
+    close_matrix.iloc[:25, 2] = np.nan
+    # the per ticker rolling mean over each ticker's own closes
+    expected_df = close_matrix.apply(lambda column: column.dropna().rolling(5).mean())
+    pd.testing.assert_frame_equal(stocks.rolling_closes(close_matrix, 5), expected_df)